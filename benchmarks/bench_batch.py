@@ -0,0 +1,49 @@
+"""
+Compares evaluating a formula over `array("d")` columns with one call of the
+scalar function per row (in a Python loop or through `starmap`) and with the loop-compiled function of
+`batch.compile_batch`.
+
+    python benchmarks/bench_batch.py --rows 1000000
+"""
+import argparse
+import timeit
+from array import array
+from itertools import starmap
+
+from formula_compiler import compile_formula
+from formula_compiler.batch import allocate, compile_batch
+
+FORMULAS = [
+    "2*X0 + X1",
+    "SQRT(X0^2 + X1^2) * COS(X0) + SIN(X1) * PI()",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--rows", type=int, default=100_000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    x0 = array("d", (i * 1e-3 for i in range(args.rows)))
+    x1 = array("d", (i * -2e-3 for i in range(args.rows)))
+    out = allocate(args.rows)
+
+    def loop(fun):
+        for i, (a, b) in enumerate(zip(x0, x1)):
+            out[i] = fun(a, b)
+
+    print(f"{'formula':<48} {'loop':>10} {'starmap':>10} {'batch':>10} {'speedup':>8}")
+    for formula in FORMULAS:
+        fun = compile_formula(formula, n_args=2)
+        batch = compile_batch(formula, n_args=2)
+        looped = min(timeit.repeat(lambda: loop(fun), number=1, repeat=args.repeat))
+        per_row = min(timeit.repeat(lambda: array("d", starmap(fun, zip(x0, x1))), number=1,
+                                    repeat=args.repeat))
+        batched = min(timeit.repeat(lambda: batch(x0, x1, out), number=1, repeat=args.repeat))
+        print(f"{formula[:48]:<48} {looped * 1e3:>8.1f}ms {per_row * 1e3:>8.1f}ms "
+              f"{batched * 1e3:>8.1f}ms {looped / batched:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
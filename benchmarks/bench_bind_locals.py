@@ -0,0 +1,50 @@
+"""
+Compares the per-call time of functions compiled with and without
+`bind_locals`.
+
+    python benchmarks/bench_bind_locals.py
+"""
+import argparse
+import timeit
+
+from formula_compiler import compile_formula
+
+FORMULAS = [
+    "SIN(X)",
+    "ROUND(2^1 + 2^3 + EXP(5*LN(x)))",
+    "SQRT(X0^2 + X1^2) * COS(X0) + SIN(X1) * PI()",
+    "SINH(X0) + COSH(X1) + TANH(X0*X1) + ASINH(X0) + ATAN(X1) + LOG10(X0 + 10)",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=200_000)
+    parser.add_argument("-r", "--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'formula':<72} {'attribute':>10} {'local':>10} {'speedup':>8}")
+    for formula in FORMULAS:
+        timers = [
+            timeit.Timer(
+                "fun(0.5, 0.25)",
+                globals={
+                    "fun": compile_formula(formula, n_args=2, strict=False, bind_locals=bind,
+                                           cache=False)
+                },
+            ) for bind in (False, True)
+        ]
+        # Interleave the measurements, such that both variants are equally
+        # affected by drifting machine load.
+        best = [float("inf")] * len(timers)
+        for _ in range(args.repeat):
+            for i, timer in enumerate(timers):
+                best[i] = min(best[i], timer.timeit(number=args.number))
+        timings = [b / args.number * 1e9 for b in best]
+
+        print(f"{formula:<72} {timings[0]:>8.1f}ns {timings[1]:>8.1f}ns "
+              f"{timings[0] / timings[1]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares the interpreter with compiled functions: the time to create a
+callable, the time per call and the number of calls from which compilation
+pays off. Also prints the costs measured by `interpreter.calibrate`, which
+are used by `compile_formula(..., engine="auto")`.
+
+    python benchmarks/bench_interpreter.py
+"""
+import argparse
+import timeit
+
+from formula_compiler import compile_formula
+from formula_compiler.interpreter import calibrate
+
+FORMULAS = [
+    "2*X",
+    "ROUND(2^1 + 2^3 + EXP(5*LN(x)))",
+    "SQRT(X0^2 + X1^2) * COS(X0) + SIN(X1) * PI()",
+    "+".join(f"SIN(X0*{i}) * X1" for i in range(20)),
+]
+
+
+def best(fun, number: int, repeat: int) -> float:
+    return min(timeit.repeat(fun, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'formula':<48} {'create':>21} {'call':>21} {'break-even':>11}")
+    print(f"{'':<48} {'interpret':>10} {'compile':>10} {'interpret':>10} {'compiled':>10}")
+    for formula in FORMULAS:
+        create = [
+            best(lambda: compile_formula(formula, n_args=2, strict=False, engine=engine, cache=False),
+                 number=50, repeat=args.repeat) for engine in ("interpret", "compile")
+        ]
+        functions = [
+            compile_formula(formula, n_args=2, strict=False, engine=engine, cache=False)
+            for engine in ("interpret", "compile")
+        ]
+        call = [best(lambda: f(0.5, 0.25), number=5000, repeat=args.repeat) for f in functions]
+        break_even = (create[1] - create[0]) / max(call[0] - call[1], 1e-12)
+
+        name = formula if len(formula) <= 48 else formula[:45] + "..."
+        print(f"{name:<48} {create[0] * 1e6:>8.1f}us {create[1] * 1e6:>8.1f}us "
+              f"{call[0] * 1e6:>8.2f}us {call[1] * 1e6:>8.2f}us {break_even:>11.0f}")
+
+    print()
+    print(calibrate(repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the time to tokenize long formulas with `Lexer.get_next_token`, the
+regular expression based `Scanner.get_next_token` and the bare `tokenize`
+iterator. The speedup is the one of `Scanner` over `Lexer`.
+
+    python benchmarks/bench_lexer.py
+"""
+import argparse
+import random
+import timeit
+
+from formula_compiler.lexer import Lexer
+from formula_compiler.scanner import Scanner, tokenize
+from formula_compiler.tokens import TokenType
+
+
+def generate(size: int, seed: int = 0) -> str:
+    """Generates a formula of roughly `size` characters."""
+    rng = random.Random(seed)
+    terms = []
+    length = 0
+    while length < size:
+        term = rng.choice([
+            f"X{rng.randrange(20)}",
+            f"{rng.uniform(0, 1000):.6f}",
+            f"{rng.randrange(1, 10**6)}",
+            f"SIN(X{rng.randrange(20)})",
+            f"EXP({rng.uniform(-1, 1):.3e} * X)",
+            "PI()",
+        ])
+        terms.append(term)
+        length += len(term) + 3
+    return " + ".join(terms)
+
+
+def drain(lexer) -> int:
+    n = 0
+    while lexer.get_next_token().type != TokenType.EOF:
+        n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'tokens':>8} {'Lexer':>10} {'Scanner':>10} {'tokenize':>10} "
+          f"{'speedup':>8}")
+    for size in (100, 1_000, 10_000, 100_000):
+        formula = generate(size)
+        n_tokens = drain(Scanner(formula))
+        number = max(1, 100_000 // size)
+
+        timings = []
+        for run in (
+                lambda: drain(Lexer(formula)),
+                lambda: drain(Scanner(formula)),
+                lambda: sum(1 for _ in tokenize(formula)),
+        ):
+            best = min(timeit.repeat(run, number=number, repeat=args.repeat))
+            timings.append(best / number * 1e3)
+
+        print(f"{len(formula):>8} {n_tokens:>8} {timings[0]:>8.3f}ms {timings[1]:>8.3f}ms "
+              f"{timings[2]:>8.3f}ms {timings[0] / timings[1]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Measures the throughput of `parallel.evaluate_parallel` for an increasing
+number of worker processes, relative to serial evaluation.
+
+    python benchmarks/bench_parallel.py --rows 10000000
+"""
+import argparse
+import os
+import time
+from array import array
+
+from formula_compiler import compile_formula
+from formula_compiler.parallel import evaluate, evaluate_parallel
+
+FORMULA = "SQRT(X0^2 + X1^2) * COS(X0) + SIN(X1) * PI()"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--rows", type=int, default=1_000_000)
+    parser.add_argument("-w", "--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    values = array("d", (i * 1e-6 for i in range(2 * args.rows)))
+
+    start = time.perf_counter()
+    evaluate(compile_formula(FORMULA, n_args=2), values, n_args=2)
+    serial = time.perf_counter() - start
+    print(f"{'serial':>8} {serial:8.2f}s {args.rows / serial / 1e6:8.2f}M rows/s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        start = time.perf_counter()
+        evaluate_parallel(FORMULA, values, workers=workers, n_args=2)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {elapsed:8.2f}s {args.rows / elapsed / 1e6:8.2f}M rows/s "
+              f"speedup {serial / elapsed:5.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Generators of realistic and adversarial formulas for the benchmarks. All
+generators are deterministic for a given seed.
+"""
+import random
+from typing import Callable, NamedTuple
+
+
+class Case(NamedTuple):
+    name: str
+    formula: str
+    # The number of arguments of the compiled function.
+    n_args: int
+
+
+def realistic(seed: int = 0, n_terms: int = 8, n_variables: int = 4) -> str:
+    """A formula as typically found in spreadsheets: a few weighted terms."""
+    rng = random.Random(seed)
+    terms = []
+    for _ in range(n_terms):
+        x = f"X{rng.randrange(n_variables)}"
+        kind = rng.randrange(4)
+        if kind == 0:
+            terms.append(f"{rng.uniform(0, 10):.2f} * {x}")
+        elif kind == 1:
+            terms.append(f"{x}^{rng.randrange(2, 4)}")
+        elif kind == 2:
+            function = rng.choice(["SIN", "COS", "EXP", "SQRT", "ATAN"])
+            terms.append(f"{function}({x} / {rng.randrange(1, 100)})")
+        else:
+            terms.append(f"ROUND({x} * {rng.uniform(0, 1):.3f})")
+    return " + ".join(terms)
+
+
+def deep_nesting(depth: int) -> str:
+    """Nested parentheses and function calls, e.g. `SIN((COS((X + 1)) + 1))`."""
+    formula = "X"
+    for i in range(depth):
+        formula = f"({formula} + {i})" if i % 2 else f"SIN({formula})"
+    return formula
+
+
+def long_sum(n_terms: int, seed: int = 0) -> str:
+    """A flat sum of many products."""
+    rng = random.Random(seed)
+    return " + ".join(f"{rng.randrange(1, 1000)} * X" for _ in range(n_terms))
+
+
+def many_variables(n_variables: int) -> str:
+    """A formula referencing many distinct arguments."""
+    return " + ".join(f"X{i} * X{(i + 1) % n_variables}" for i in range(n_variables))
+
+
+def large_literals(n_terms: int, seed: int = 0) -> str:
+    """Long integer and float literals, including exponents."""
+    rng = random.Random(seed)
+    terms = []
+    for _ in range(n_terms):
+        terms.append(rng.choice([
+            str(rng.randrange(10**30, 10**31)),
+            f"{rng.uniform(0, 1):.17f}",
+            f"{rng.uniform(1, 10):.10f}e{rng.randrange(-300, 300)}",
+        ]))
+    return "X + " + " + ".join(terms)
+
+
+GENERATORS: dict[str, Callable[[], Case]] = {
+    "realistic": lambda: Case("realistic", realistic(), 4),
+    "deep_nesting": lambda: Case("deep_nesting", deep_nesting(100), 1),
+    "long_sum": lambda: Case("long_sum", long_sum(400), 1),
+    "many_variables": lambda: Case("many_variables", many_variables(100), 100),
+    "large_literals": lambda: Case("large_literals", large_literals(200), 1),
+}
+
+
+def cases() -> list[Case]:
+    return [generate() for generate in GENERATORS.values()]
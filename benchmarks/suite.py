@@ -0,0 +1,177 @@
+"""
+Times the stages of the compiler (`Lexer`, `Scanner`, `Parser.parse`,
+`IterativeParser.parse`, `compile_module`) and the evaluation of the compiled
+callables separately for the formulas of `formulas.py`, and measures the peak
+memory of a complete `compile_formula`.
+
+The results can be saved as a baseline and compared against it later. A stage
+that is slower than `threshold` times its baseline is reported as a
+regression, and the script exits with status 1.
+
+    python benchmarks/suite.py --save benchmarks/baseline.json
+    python benchmarks/suite.py --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from formulas import Case, cases
+
+from formula_compiler import compile_formula
+from formula_compiler.ast_compiler import compile_module
+from formula_compiler.lexer import Lexer
+from formula_compiler.parser import Parser, IterativeParser
+from formula_compiler.scanner import Scanner
+from formula_compiler.tokens import TokenType
+
+DEFAULT_THRESHOLD = 1.3
+
+
+def drain(lexer) -> int:
+    n = 0
+    while lexer.get_next_token().type != TokenType.EOF:
+        n += 1
+    return n
+
+
+def best_of(run: Callable[[], float], repeat: int) -> float:
+    """Returns the minimum of the timings in seconds returned by `run`."""
+    return min(run() for _ in range(repeat))
+
+
+def timed(fun: Callable[[], object], number: int) -> Callable[[], float]:
+    def run() -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            fun()
+        return (time.perf_counter() - start) / number
+
+    return run
+
+
+def timed_compile(case: Case, number: int) -> Callable[[], float]:
+    # `compile_module` modifies the module, hence each run gets a fresh one.
+    def run() -> float:
+        elapsed = 0.0
+        for _ in range(number):
+            module = IterativeParser(lexer=Scanner(case.formula)).parse()
+            start = time.perf_counter()
+            compile_module(module, n_args=case.n_args, strict=False)
+            elapsed += time.perf_counter() - start
+        return elapsed / number
+
+    return run
+
+
+def measure(case: Case, repeat: int) -> dict[str, Optional[float]]:
+    n_tokens = drain(Scanner(case.formula))
+    # Roughly 10 ms per timing for stages that are linear in the tokens.
+    number = max(1, 20_000 // max(n_tokens, 1))
+
+    stages: dict[str, Optional[Callable[[], float]]] = {
+        "lex": timed(lambda: drain(Lexer(case.formula)), number),
+        "scan": timed(lambda: drain(Scanner(case.formula)), number),
+        "parse": timed(lambda: Parser(lexer=Lexer(case.formula)).parse(), number),
+        "parse_iterative": timed(lambda: IterativeParser(lexer=Scanner(case.formula)).parse(),
+                                 number),
+        "compile": timed_compile(case, max(1, number // 10)),
+    }
+    fun = compile_formula(case.formula, n_args=case.n_args, strict=False, cache=False)
+    args = [0.5] * case.n_args
+    stages["call"] = timed(lambda: fun(*args), 1000)
+
+    results: dict[str, Optional[float]] = {}
+    for stage, run in stages.items():
+        try:
+            results[stage] = best_of(run, repeat)
+        except RecursionError:
+            results[stage] = None
+
+    tracemalloc.start()
+    compile_formula(case.formula, n_args=case.n_args, strict=False, cache=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results["tokens"] = n_tokens
+    results["peak_bytes"] = peak
+    return results
+
+
+def report(results: dict[str, dict], baseline: Optional[dict], threshold: float) -> list[str]:
+    """Prints the results and returns the regressed `case/stage` names."""
+    regressions = []
+    stages = ["lex", "scan", "parse", "parse_iterative", "compile", "call"]
+    print(f"{'case':<16} {'tokens':>7} {'peak':>9} " + " ".join(f"{s:>16}" for s in stages))
+    for name, result in results.items():
+        columns = []
+        for stage in stages:
+            seconds = result[stage]
+            if seconds is None:
+                columns.append(f"{'n/a':>16}")
+                continue
+            cell = f"{seconds * 1e6:.1f}us"
+            previous = (baseline or {}).get(name, {}).get(stage)
+            if previous:
+                ratio = seconds / previous
+                cell += f" {ratio:4.2f}x"
+                if ratio > threshold:
+                    cell += "!"
+                    regressions.append(f"{name}/{stage}")
+            columns.append(f"{cell:>16}")
+        print(f"{name:<16} {result['tokens']:>7} {result['peak_bytes'] / 1024:>7.0f}KB "
+              + " ".join(columns))
+
+    print()
+    for name, result in results.items():
+        throughput = [
+            f"{stage} {result['tokens'] / result[stage] / 1e6:.2f}M tokens/s"
+            for stage in ("lex", "scan", "parse_iterative") if result[stage]
+        ]
+        print(f"{name:<16} " + ", ".join(throughput)
+              + f", call {1 / result['call'] / 1e6:.2f}M calls/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--save", help="Save the results as baseline to this file.")
+    parser.add_argument("--compare", help="Compare the results with this baseline file.")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Maximum accepted ratio to the baseline (default: as saved in "
+                        f"the baseline or {DEFAULT_THRESHOLD}).")
+    args = parser.parse_args()
+
+    results = {case.name: measure(case, args.repeat) for case in cases()}
+
+    baseline = None
+    threshold = args.threshold or DEFAULT_THRESHOLD
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        threshold = args.threshold or saved.get("threshold", DEFAULT_THRESHOLD)
+
+    regressions = report(results, baseline, threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "threshold": threshold,
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+    if regressions:
+        print(f"\nRegressions (> {threshold:.2f}x): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
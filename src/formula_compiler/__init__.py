@@ -1,3 +1,3 @@
-from .compiler import compile_formula
+from .compiler import compile_formula, compile_formulas
 
-__all__ = ("compile_formula", )
+__all__ = ("compile_formula", "compile_formulas")
@@ -1,26 +1,147 @@
 import ast
+from types import CodeType
 from typing import Callable
 
+from . import binding
 from .parser import FUNCTION_NAME
+from .validation import safe_namespace, validate_module
+
+BACKENDS = ("math", "numpy")
+
+# The name of the single argument of functions compiled with `packed_args`.
+PACKED_ARGUMENT = "args"
 
 
 def compile_module(
     module: ast.Module,
     n_args: int = 1,
     strict: bool = True,
+    backend: str = "math",
+    bind_locals: bool = False,
+    packed_args: bool = False,
+    safe: bool = False,
 ) -> Callable[..., float]:
     """
     Compiles a module into a callable that takes `n_args` numeric values as
     arguments and returns a single numeric value.
+
+    With `backend="numpy"` the callable instead takes `n_args` arrays (columns)
+    and returns an array with the element-wise results.
+
+    With `bind_locals=True` the called functions are bound to the callable
+    once, such that each call site is a local variable load (see
+    `binding.bind_locals`).
+
+    With `packed_args=True` the callable takes a single sequence of `n_args`
+    values instead, which allows e.g. `map(fun, rows)`.
+
+    With `safe=True` the module is validated before compilation (see
+    `validation.validate_module`), i.e. it may only contain the nodes created
+    by the parser, and executed without builtins. Hence modules of untrusted
+    origin can be compiled in-process.
+    """
+    code = compile_code(
+        module=module,
+        n_args=n_args,
+        strict=strict,
+        backend=backend,
+        bind_locals=bind_locals,
+        packed_args=packed_args,
+        safe=safe,
+    )
+    return load_code(code, safe=safe)
+
+
+def compile_code(
+    module: ast.Module,
+    n_args: int = 1,
+    strict: bool = True,
+    backend: str = "math",
+    bind_locals: bool = False,
+    packed_args: bool = False,
+    safe: bool = False,
+) -> CodeType:
+    """
+    Compiles a module into a code object, which can be turned into a callable
+    by `load_code`. See `compile_module` for the meaning of the arguments.
+    """
+    if safe:
+        if backend != "math":
+            raise ValueError("Safe compilation only supports the `math` backend.")
+        validate_module(module)
+
+    module = prepare_module(
+        module=module,
+        n_args=n_args,
+        strict=strict,
+        backend=backend,
+        bind_locals=bind_locals,
+        packed_args=packed_args,
+    )
+    if safe:
+        # `math` is provided by the namespace, since imports require builtins.
+        module.body = [b for b in module.body if not isinstance(b, ast.Import)]
+
+    # Raises ValueError if e.g. body is empty.
+    # Raises TypeError if no (return) statement is provided in body
+    # Raises SyntaxError if module contains invalid syntax (e.g. return outside of
+    # function)
+    # Can also raise MemoryError and RecursionError
+    return compile(
+        fix_missing_locations(module),
+        filename="tmp",
+        mode="exec",
+    )
+
+
+def fix_missing_locations(module: ast.Module) -> ast.Module:
+    """
+    Iterative replacement of `ast.fix_missing_locations`, which recurses for
+    every level of the tree. Since the nodes created by the parser do not
+    correspond to lines of Python source code, all nodes simply get the
+    location of the first line.
     """
-    f_def = None
+    for node in ast.walk(module):
+        if "lineno" in node._attributes:
+            if getattr(node, "lineno", None) is None:
+                node.lineno = 1
+                node.col_offset = 0
+            if getattr(node, "end_lineno", None) is None:
+                node.end_lineno = node.lineno
+                node.end_col_offset = node.col_offset
+    return module
+
+
+def find_function(module: ast.Module) -> ast.FunctionDef:
+    """Returns the first `FunctionDef` of the module."""
     for b in module.body:
         if isinstance(b, ast.FunctionDef):
-            f_def = b
-            break
+            return b
 
-    if not f_def:
-        raise ValueError("Provided module does not compile a `FunctionDef`!")
+    raise ValueError("Provided module does not compile a `FunctionDef`!")
+
+
+def prepare_module(
+    module: ast.Module,
+    n_args: int = 1,
+    strict: bool = True,
+    backend: str = "math",
+    bind_locals: bool = False,
+    packed_args: bool = False,
+) -> ast.Module:
+    """
+    Applies the backend transformation to the module and checks (and, if strict
+    is False, pads) the arguments of its function, such that the module is
+    ready to be compiled.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend `{backend}`. Expected one of {BACKENDS}.")
+
+    if backend == "numpy":
+        from .numpy_backend import to_numpy
+        module = to_numpy(module)
+
+    f_def = find_function(module)
 
     n_args_required = len(f_def.args.args)
     # If strict is True, we expect exactly the module must have `n_args`
@@ -43,18 +164,39 @@ def compile_module(
                     arg=f"temporary_placeholder_argument_{i}",
                     annotation=ast.Name(id="float", ctx=ast.Load()),
                 ))
+            i += 1
 
-    # Raises ValueError if e.g. body is empty.
-    # Raises TypeError if no (return) statement is provided in body
-    # Raises SyntaxError if module contains invalid syntax (e.g. return outside of
-    # function)
-    # Can also raise MemoryError and RecursionError
-    code = compile(
-        ast.fix_missing_locations(module),
-        filename="tmp",
-        mode="exec",
-    )
-    namespace = {}
+    if packed_args:
+        pack_arguments(f_def)
+
+    if bind_locals:
+        module = binding.bind_locals(module)
+
+    return module
+
+
+def pack_arguments(f_def: ast.FunctionDef) -> None:
+    """
+    Replaces the arguments of the function by a single sequence argument, which
+    is unpacked into the original arguments on entry.
+    """
+    targets = [ast.Name(id=arg.arg, ctx=ast.Store()) for arg in f_def.args.args]
+    f_def.args.args = [ast.arg(arg=PACKED_ARGUMENT)]
+    f_def.body.insert(
+        0,
+        ast.Assign(
+            targets=[ast.Tuple(elts=targets, ctx=ast.Store())],
+            value=ast.Name(id=PACKED_ARGUMENT, ctx=ast.Load()),
+        ))
+
+
+def load_code(code: CodeType, safe: bool = False) -> Callable[..., float]:
+    """
+    Executes a code object created by `compile_code` and returns the callable.
+    Code compiled with `safe=True` must be loaded with `safe=True`, which
+    executes it without builtins.
+    """
+    namespace = safe_namespace() if safe else {}
 
     exec(code, namespace)
 
@@ -0,0 +1,127 @@
+import ast
+from array import array
+from typing import Any, Callable, Optional, Sequence
+
+from .ast_compiler import compile_code, find_function, prepare_module
+from .compiler import parse_formula
+from .intervals import guard_module
+from .parser import FUNCTION_NAME
+
+INDEX_NAME = "_i"
+LENGTH_NAME = "_n"
+OUTPUT_NAME = "out"
+ALLOCATE_NAME = "_allocate"
+
+
+def allocate(n: int) -> array:
+    """Returns an array of `n` zeros."""
+    return array("d", bytes(8 * n))
+
+
+def compile_batch(
+    formula: str,
+    n_args: int = 1,
+    strict: bool = True,
+    optimize: bool = False,
+    fast_math: bool = False,
+    cse: bool = False,
+    bind_locals: bool = True,
+    ranges: Optional[Sequence[Optional[tuple[float, float]]]] = None,
+) -> Callable[..., Any]:
+    """
+    Compiles the formula into a function that evaluates it for whole columns
+    of values, e.g. `array("d")` or `memoryview` objects, without NumPy.
+
+    The function takes one column per argument of the scalar function (in the
+    same order) and an optional `out` buffer of the same length, into which
+    the results are written. If `out` is omitted, an `array("d")` is allocated.
+    The loop over the rows is part of the compiled function:
+
+        def fun(x0, x1, out=None):
+            ...
+            for _i, (x0, x1) in enumerate(zip(x0, x1)):
+                out[_i] = <formula>
+            return out
+
+    The called functions are bound once per function by default (see
+    `binding.bind_locals`), since they are called in a loop.
+
+    If `ranges` are given, the rows for which an operation would raise get
+    NaN results instead, and the operations that cannot raise for arguments
+    within the ranges are not guarded (see `intervals.guard_module`).
+    """
+    module = parse_formula(formula, optimize=optimize, fast_math=fast_math, cse=cse)
+    if ranges is not None:
+        module = guard_module(module, ranges)
+    module = prepare_module(module=module, n_args=n_args, strict=strict)
+    f_def = find_function(module)
+    names = [arg.arg for arg in f_def.args.args]
+    if not names:
+        raise ValueError("Batch evaluation requires at least one argument")
+
+    def name(id: str, ctx: ast.expr_context = ast.Load()) -> ast.Name:
+        return ast.Name(id=id, ctx=ctx)
+
+    def length(id: str) -> ast.Call:
+        return ast.Call(func=name("len"), args=[name(id)], keywords=[])
+
+    def check_length(test: ast.expr, message: str) -> ast.If:
+        return ast.If(
+            test=ast.Compare(left=test, ops=[ast.NotEq()], comparators=[name(LENGTH_NAME)]),
+            body=[
+                ast.Raise(exc=ast.Call(func=name("ValueError"), args=[ast.Constant(value=message)],
+                                       keywords=[]))
+            ],
+            orelse=[],
+        )
+
+    *statements, result = f_def.body
+    target: ast.expr = name(names[0], ast.Store())
+    iterable: ast.expr = name(names[0])
+    if len(names) > 1:
+        target = ast.Tuple(elts=[name(n, ast.Store()) for n in names], ctx=ast.Store())
+        iterable = ast.Call(func=name("zip"), args=[name(n) for n in names], keywords=[])
+
+    f_def.args.args = [ast.arg(arg=n) for n in names]
+    f_def.args.args.append(ast.arg(arg=OUTPUT_NAME))
+    f_def.args.defaults = [ast.Constant(value=None)]
+    f_def.returns = None
+    f_def.body = [
+        ast.Assign(targets=[name(LENGTH_NAME, ast.Store())], value=length(names[0])),
+        *(check_length(length(n), "All columns must have the same length") for n in names[1:]),
+        ast.If(
+            test=ast.Compare(left=name(OUTPUT_NAME), ops=[ast.Is()],
+                             comparators=[ast.Constant(value=None)]),
+            body=[
+                ast.Assign(
+                    targets=[name(OUTPUT_NAME, ast.Store())],
+                    value=ast.Call(func=name(ALLOCATE_NAME), args=[name(LENGTH_NAME)],
+                                   keywords=[]),
+                )
+            ],
+            orelse=[check_length(length(OUTPUT_NAME), "The output must have the length of the "
+                                 "columns")],
+        ),
+        ast.For(
+            target=ast.Tuple(elts=[name(INDEX_NAME, ast.Store()), target], ctx=ast.Store()),
+            iter=ast.Call(func=name("enumerate"), args=[iterable], keywords=[]),
+            body=[
+                *statements,
+                ast.Assign(
+                    targets=[
+                        ast.Subscript(value=name(OUTPUT_NAME), slice=name(INDEX_NAME),
+                                      ctx=ast.Store())
+                    ],
+                    value=result.value,
+                ),
+            ],
+            orelse=[],
+        ),
+        ast.Return(value=name(OUTPUT_NAME)),
+    ]
+
+    # The module has already been prepared, such that only the binding remains.
+    code = compile_code(module=module, n_args=len(f_def.args.args), bind_locals=bind_locals)
+    namespace: dict[str, Any] = {ALLOCATE_NAME: allocate}
+    exec(code, namespace)
+    return namespace[FUNCTION_NAME]
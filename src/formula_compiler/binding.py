@@ -0,0 +1,102 @@
+import ast
+import math
+
+# Modules whose attributes are bound to the compiled functions.
+BOUND_MODULES = ("math", "numpy")
+
+# Builtins that are bound to the compiled functions.
+BOUND_BUILTINS = ("round", )
+
+# Module attributes that are constants and can be inlined.
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+FACTORY_PREFIX = "_bind_"
+
+
+class LocalBinder(ast.NodeTransformer):
+    """
+    Replaces the attribute lookups of module functions (e.g. `math.sin`) and
+    the lookups of builtins (e.g. `round`) with variables of an enclosing
+    scope, and inlines constants such as `math.pi`.
+    """
+
+    def __init__(self):
+        self.bindings: dict[str, ast.expr] = {}
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        if not (isinstance(node.value, ast.Name) and node.value.id in BOUND_MODULES):
+            return self.generic_visit(node)
+
+        if node.attr in CONSTANTS:
+            return ast.Constant(value=CONSTANTS[node.attr])
+
+        name = f"_{node.value.id}_{node.attr}"
+        self.bindings.setdefault(name, node)
+        return ast.Name(id=name, ctx=ast.Load())
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        if node.id in BOUND_BUILTINS and isinstance(node.ctx, ast.Load):
+            name = f"_{node.id}"
+            self.bindings.setdefault(name, ast.Name(id=node.id, ctx=ast.Load()))
+            return ast.Name(id=name, ctx=ast.Load())
+        return node
+
+
+def bind_locals(module: ast.Module) -> ast.Module:
+    """
+    Rewrites the functions of the module, such that each call site of a `math`
+    (or `numpy`) function is a fast closure variable load instead of a global
+    lookup followed by an attribute lookup.
+
+    Each function `fun` is wrapped into a factory that binds the callables
+    once, which does not affect the signature of the function:
+
+        def _bind_fun():
+            _math_sin = math.sin
+
+            def fun(x0):
+                return _math_sin(x0)
+
+            return fun
+
+        fun = _bind_fun()
+    """
+    body = []
+    for b in module.body:
+        if not isinstance(b, ast.FunctionDef):
+            body.append(b)
+            continue
+
+        binder = LocalBinder()
+        b.body = [binder.visit(statement) for statement in b.body]
+        if not binder.bindings:
+            body.append(b)
+            continue
+
+        factory = f"{FACTORY_PREFIX}{b.name}"
+        body.append(
+            ast.FunctionDef(
+                name=factory,
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=[
+                    *(ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=value)
+                      for name, value in binder.bindings.items()),
+                    b,
+                    ast.Return(value=ast.Name(id=b.name, ctx=ast.Load())),
+                ],
+                decorator_list=[],
+            ))
+        body.append(
+            ast.Assign(
+                targets=[ast.Name(id=b.name, ctx=ast.Store())],
+                value=ast.Call(func=ast.Name(id=factory, ctx=ast.Load()), args=[], keywords=[]),
+            ))
+
+    module.body = body
+    return module
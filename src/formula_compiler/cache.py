@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class FormulaCache:
+    """
+    A thread-safe, bounded cache of compiled formulas with least recently used
+    (LRU) eviction.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 0:
+            raise ValueError("The maximum cache size must not be negative.")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, Callable[..., float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Callable[..., float]]:
+        """Returns the cached callable for `key` or `None` if there is none."""
+        with self._lock:
+            fun = self._entries.get(key, None)
+            if fun is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return fun
+
+    def put(self, key: Hashable, fun: Callable[..., float]) -> None:
+        """Stores a callable, evicting the least recently used ones if necessary."""
+        with self._lock:
+            self._entries[key] = fun
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def resize(self, maxsize: int) -> None:
+        """Changes the maximum number of cached callables."""
+        if maxsize < 0:
+            raise ValueError("The maximum cache size must not be negative.")
+
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self) -> None:
+        """Removes all entries and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                maxsize=self.maxsize,
+                currsize=len(self._entries),
+            )
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Process-wide cache used by `compile_formula`.
+FORMULA_CACHE = FormulaCache()
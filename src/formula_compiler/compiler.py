@@ -1,20 +1,336 @@
-from typing import Optional, Callable
+import ast
+from itertools import chain
+from typing import Optional, Callable, Hashable, NamedTuple, Sequence
 
-from .lexer import Lexer
-from .parser import Parser
-from .ast_compiler import compile_module
+from .lexer import normalize
+from .parser import IterativeParser, FUNCTION_NAME
+from .scanner import Scanner, tokenize
+from .ast_compiler import (compile_code, compile_module, load_code, find_function, prepare_module,
+                           fix_missing_locations)
+from .cache import FORMULA_CACHE
+from .disk_cache import DiskCache
+from .optimizer import optimize as optimize_module, count_nodes
+from .cse import eliminate_common_subexpressions
+from .interpreter import Program, lower, should_interpret
+from .tiered import TieredFunction, default_threshold
+from .incremental import TokenListReader
+from .instrumentation import Recorder, recorder as start_recorder, bytecode_size
+
+ENGINES = ("compile", "interpret", "auto", "tiered")
+
+
+def parse_formula(
+    formula: str,
+    optimize: bool = False,
+    fast_math: bool = False,
+    cse: bool = False,
+    recorder: Optional[Recorder] = None,
+    dense_args: bool = False,
+) -> ast.Module:
+    """
+    Parses the formula into a module. If `optimize` or `fast_math` is True, the
+    module is passed through the optimizer. If `cse` is True, repeated
+    subexpressions are hoisted into temporaries. See `Parser.parse` for
+    `dense_args`.
+
+    If a `recorder` is given, the tokens of the `Scanner` are collected up
+    front, such that the durations of lexing and parsing can be recorded
+    separately.
+    """
+    if recorder is None:
+        lexer = Scanner(text=formula)
+    else:
+        tokens = [token for _, token in tokenize(formula)]
+        recorder.n_tokens = len(tokens)
+        recorder.lap("lex")
+        lexer = TokenListReader(tokens)
+    parser = IterativeParser(lexer=lexer)
+    module = parser.parse(dense=dense_args)
+    if recorder is not None:
+        recorder.lap("parse")
+
+    if optimize or fast_math:
+        module, _ = optimize_module(module, fast_math=fast_math)
+        if recorder is not None:
+            recorder.lap("optimize")
+    if cse:
+        module = eliminate_common_subexpressions(module)
+        if recorder is not None:
+            recorder.lap("cse")
+    if recorder is not None:
+        recorder.n_nodes = count_nodes(module)
+        recorder.skip()
+    return module
+
+
+def cache_key(formula: str, *options: Hashable) -> tuple:
+    """
+    Returns the key of the compiled formula in the caches. `options` are all
+    arguments of `compile_formula` that affect the resulting callable.
+    """
+    return (normalize(formula), *options)
 
 
 def compile_formula(
     formula: str,
     n_args: int = 1,
     strict: bool = True,
+    backend: str = "math",
+    cache: bool = True,
+    disk_cache: Optional[DiskCache] = None,
+    optimize: bool = False,
+    fast_math: bool = False,
+    cse: bool = False,
+    bind_locals: bool = False,
+    engine: str = "compile",
+    expected_calls: Optional[int] = None,
+    tier_threshold: Optional[int] = None,
+    dense_args: bool = False,
+    packed_args: bool = False,
 ) -> Optional[Callable[..., float]]:
-    lexer = Lexer(text=formula)
-    parser = Parser(lexer=lexer)
-    module = parser.parse()
+    """
+    Compiles an Excel formula into a Python callable.
+
+    If `cache` is True, the compiled callable is looked up in (and stored to)
+    the process-wide `FORMULA_CACHE`, such that recurring formulas skip lexing,
+    parsing and compilation.
+
+    If a `disk_cache` is provided, the compiled code object is additionally
+    looked up in (and stored to) this persistent cache, such that other
+    processes only need to execute the cached code.
+
+    If `optimize` is True, constant subexpressions are folded and algebraic
+    identities that do not change the results are applied. `fast_math`
+    additionally enables rewrites that may change results slightly (see
+    `optimizer.Optimizer`).
+
+    If `cse` is True, expensive subexpressions that occur more than once are
+    evaluated only once per call.
+
+    If `bind_locals` is True, the called math functions are bound to the
+    callable once instead of being looked up on every call.
+
+    The arguments of the callable are the used variables in index order. If
+    `dense_args` is True, the callable takes the arguments `X0` up to the
+    highest used index, i.e. `Xi` is always the argument at position i. If
+    `packed_args` is True, the callable takes a single sequence of `n_args`
+    values instead of positional arguments, such that e.g. `map(fun, rows)`
+    evaluates the formula for each row.
+
+    With `engine="interpret"` the formula is not compiled to bytecode, but
+    lowered to a `interpreter.Program`, which is cheaper to create but slower
+    to call, and does not involve `exec`. With `engine="auto"` the cheaper of
+    both engines for `expected_calls` calls is chosen.
+
+    With `engine="tiered"` a `tiered.TieredFunction` is returned, which
+    interprets the formula until it has been called more than `tier_threshold`
+    times and then switches to the compiled function. By default the threshold
+    is the number of calls from which compiling pays off.
+
+    If hooks are installed in `instrumentation`, they are called with the
+    durations of the stages and the sizes of the intermediate results of each
+    call (see `instrumentation.CompileStats`).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine `{engine}`. Expected one of {ENGINES}.")
+    if engine != "compile" and backend != "math":
+        raise ValueError("The interpreter only supports the `math` backend.")
+    if engine != "compile" and packed_args:
+        raise ValueError("The interpreter does not support `packed_args`.")
+
+    recorder = start_recorder(formula)
+    key = cache_key(formula, n_args, strict, backend, optimize, fast_math, cse, bind_locals,
+                    engine, expected_calls, tier_threshold, dense_args, packed_args)
+    if cache:
+        if fun := FORMULA_CACHE.get(key):
+            if recorder is not None:
+                recorder.lap("cache")
+                recorder.finish(cached=True)
+            return fun
+
+    module = None
+    if engine != "compile":
+        module = parse_formula(formula, optimize=optimize, fast_math=fast_math, cse=cse,
+                               recorder=recorder, dense_args=dense_args)
+        module = prepare_module(module=module, n_args=n_args, strict=strict)
+        program = lower(module)
+        if recorder is not None:
+            recorder.lap("lower")
+        if engine == "tiered":
+            fun = _tiered_function(formula, module, program, n_args, strict, bind_locals,
+                                   tier_threshold)
+        elif engine == "interpret" or (expected_calls is not None
+                                       and should_interpret(program, expected_calls)):
+            fun = program
+        else:
+            fun = None
+
+        if fun is not None:
+            if cache:
+                FORMULA_CACHE.put(key, fun)
+            if recorder is not None:
+                recorder.finish()
+            return fun
+
+    code = disk_cache.get(key) if disk_cache is not None else None
+    if recorder is not None and disk_cache is not None:
+        recorder.lap("disk_cache")
+    if code is None:
+        if module is None:
+            module = parse_formula(formula, optimize=optimize, fast_math=fast_math, cse=cse,
+                                   recorder=recorder, dense_args=dense_args)
+        module = prepare_module(
+            module=module,
+            n_args=n_args,
+            strict=strict,
+            backend=backend,
+            bind_locals=bind_locals,
+            packed_args=packed_args,
+        )
+        if recorder is not None:
+            recorder.lap("prepare")
+        module = fix_missing_locations(module)
+        if recorder is not None:
+            recorder.lap("fix_locations")
+        code = compile(module, filename="tmp", mode="exec")
+        if recorder is not None:
+            recorder.lap("compile")
+        if disk_cache is not None:
+            disk_cache.put(key, code)
+            if recorder is not None:
+                recorder.lap("disk_cache")
+
+    fun = load_code(code)
+
+    if cache and fun is not None:
+        FORMULA_CACHE.put(key, fun)
+    if recorder is not None:
+        recorder.lap("exec")
+        recorder.bytecode_size = bytecode_size(code)
+        recorder.finish()
+    return fun
+
+
+def _tiered_function(
+    formula: str,
+    module: ast.Module,
+    program: Program,
+    n_args: int,
+    strict: bool,
+    bind_locals: bool,
+    threshold: Optional[int],
+) -> TieredFunction:
+    if threshold is None:
+        threshold = default_threshold(program)
+
+    def compile_tier() -> Callable[..., float]:
+        # The module has already been prepared, preparing it again is a no-op.
+        return compile_module(module=module, n_args=n_args, strict=strict, bind_locals=bind_locals)
+
+    return TieredFunction(formula=formula, program=program, compile_tier=compile_tier,
+                          threshold=threshold)
+
+
+class BatchResult(NamedTuple):
+    # The compiled callables in input order, `None` for failed formulas.
+    functions: list[Optional[Callable[..., float]]]
+    # Maps the index of each failed formula to the raised exception.
+    errors: dict[int, Exception]
+
+
+def compile_formulas(
+    formulas: Sequence[str],
+    n_args: int = 1,
+    strict: bool = True,
+    backend: str = "math",
+    cache: bool = True,
+    optimize: bool = False,
+    fast_math: bool = False,
+    cse: bool = False,
+    bind_locals: bool = False,
+    dense_args: bool = False,
+    packed_args: bool = False,
+) -> BatchResult:
+    """
+    Compiles many formulas at once. All functions are emitted into a single
+    module, which is compiled and executed only once.
+
+    Formulas that cannot be parsed or compiled do not fail the batch, but are
+    reported in the `errors` of the result. See `compile_formula` for the
+    remaining arguments.
+    """
+    functions: list[Optional[Callable[..., float]]] = [None] * len(formulas)
+    errors: dict[int, Exception] = {}
+
+    keys = {}
+    imports: dict[str, ast.alias] = {}
+    definitions: dict[int, list[ast.stmt]] = {}
+    for i, formula in enumerate(formulas):
+        try:
+            key = cache_key(formula, n_args, strict, backend, optimize, fast_math, cse,
+                            bind_locals, "compile", None, None, dense_args, packed_args)
+            if cache:
+                if fun := FORMULA_CACHE.get(key):
+                    functions[i] = fun
+                    continue
+
+            module = parse_formula(formula, optimize=optimize, fast_math=fast_math, cse=cse,
+                                   dense_args=dense_args)
+            find_function(module).name = f"{FUNCTION_NAME}_{i}"
+            module = prepare_module(
+                module=module,
+                n_args=n_args,
+                strict=strict,
+                backend=backend,
+                bind_locals=bind_locals,
+                packed_args=packed_args,
+            )
+        except Exception as e:
+            errors[i] = e
+            continue
+
+        definitions[i] = []
+        for b in module.body:
+            if isinstance(b, ast.Import):
+                imports.update((alias.name, alias) for alias in b.names)
+            else:
+                definitions[i].append(b)
+        keys[i] = key
+
+    if not definitions:
+        return BatchResult(functions=functions, errors=errors)
+
+    module = ast.Module(
+        body=[ast.Import(names=list(imports.values())), *chain.from_iterable(definitions.values())],
+        type_ignores=[],
+    )
+    namespace = {}
+    try:
+        exec(compile(fix_missing_locations(module), filename="tmp", mode="exec"), namespace)
+    except Exception:
+        # Compile the functions one by one to find out which of them failed.
+        for i, statements in definitions.items():
+            try:
+                exec(
+                    compile(
+                        fix_missing_locations(
+                            ast.Module(body=[module.body[0], *statements], type_ignores=[])),
+                        filename="tmp",
+                        mode="exec",
+                    ),
+                    namespace,
+                )
+            except Exception as e:
+                errors[i] = e
+
+    for i in definitions:
+        if i in errors:
+            continue
+        functions[i] = fun = namespace[f"{FUNCTION_NAME}_{i}"]
+        if cache:
+            FORMULA_CACHE.put(keys[i], fun)
 
-    return compile_module(module=module, n_args=n_args, strict=strict)
+    return BatchResult(functions=functions, errors=dict(sorted(errors.items())))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+import ast
+from collections import Counter
+from typing import Sequence
+
+# Estimated evaluation cost of the nodes, relative to an addition.
+CALL_COST = 20
+ROUND_COST = 5
+BINARY_COSTS = {
+    ast.Add: 1,
+    ast.Sub: 1,
+    ast.Mult: 1,
+    ast.Div: 2,
+    ast.Pow: 10,
+}
+UNARY_COST = 1
+
+# Subexpressions cheaper than this are recomputed, since storing and loading a
+# temporary costs about as much as a simple arithmetic operation.
+DEFAULT_MIN_COST = 3
+
+TEMPORARY_PREFIX = "_cse_"
+
+
+def node_cost(node: ast.AST) -> int:
+    """Returns the estimated cost of evaluating a node (excluding its children)."""
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name) and node.func.id == "round":
+            return ROUND_COST
+        return CALL_COST
+    if isinstance(node, ast.BinOp):
+        return BINARY_COSTS.get(type(node.op), 1)
+    if isinstance(node, ast.UnaryOp):
+        return UNARY_COST
+    return 0
+
+
+class StructuralHasher:
+    """
+    Assigns the same integer key to structurally identical subtrees. Keys are
+    hash-consed bottom-up, such that hashing a node is independent of its size.
+    """
+
+    def __init__(self):
+        self.table: dict[tuple, int] = {}
+        self.costs: dict[int, int] = {}
+        # Maps `id(node)` to the node (to keep the id valid) and its key.
+        self.keys: dict[int, tuple[ast.AST, int]] = {}
+
+    def key(self, node: ast.AST) -> int:
+        if (entry := self.keys.get(id(node))) is not None:
+            return entry[1]
+
+        if isinstance(node, ast.Constant):
+            # `repr` distinguishes `1` from `1.0` and `0.0` from `-0.0`.
+            structure = ("constant", type(node.value), repr(node.value))
+        else:
+            structure = [type(node)]
+            for _, value in ast.iter_fields(node):
+                if isinstance(value, ast.expr_context):
+                    continue
+                if isinstance(value, (ast.operator, ast.unaryop)):
+                    structure.append(type(value))
+                elif isinstance(value, ast.AST):
+                    structure.append(self.key(value))
+                elif isinstance(value, list):
+                    structure.append(tuple(self.key(v) for v in value))
+                else:
+                    structure.append(value)
+            structure = tuple(structure)
+
+        k = self.table.setdefault(structure, len(self.table))
+        if k not in self.costs:
+            self.costs[k] = node_cost(node) + sum(
+                self.costs[self.key(child)] for child in children_of(node))
+        self.keys[id(node)] = (node, k)
+        return k
+
+
+def children_of(node: ast.AST) -> list[ast.expr]:
+    return [child for child in ast.iter_child_nodes(node) if isinstance(child, ast.expr)]
+
+
+def hoist_common_subexpressions(
+    expressions: Sequence[ast.expr],
+    min_cost: int = DEFAULT_MIN_COST,
+    prefix: str = TEMPORARY_PREFIX,
+) -> tuple[list[ast.Assign], list[ast.expr]]:
+    """
+    Finds subexpressions that occur more than once in `expressions` and have an
+    estimated cost of at least `min_cost`. Returns the assignments of these
+    subexpressions to temporaries (in evaluation order) and the expressions
+    with the subexpressions replaced by the temporaries.
+    """
+    hasher = StructuralHasher()
+    for expression in expressions:
+        hasher.key(expression)
+
+    def candidate(node: ast.AST) -> bool:
+        return (isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Call))
+                and hasher.costs[hasher.key(node)] >= min_cost)
+
+    # Count all occurrences. Inside of a repeated candidate, only the first
+    # occurrence is descended into, since all others will be replaced.
+    counts: Counter[int] = Counter()
+    stack = list(reversed(expressions))
+    while stack:
+        node = stack.pop()
+        key = hasher.key(node)
+        counts[key] += 1
+        if counts[key] > 1 and candidate(node):
+            continue
+        stack.extend(reversed(children_of(node)))
+
+    assignments: list[ast.Assign] = []
+    temporaries: dict[int, str] = {}
+
+    def rewrite(node: ast.expr) -> ast.expr:
+        key = hasher.key(node)
+        if (name := temporaries.get(key)) is not None:
+            return ast.Name(id=name, ctx=ast.Load())
+
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, ast.expr):
+                setattr(node, field, rewrite(value))
+            elif isinstance(value, list):
+                setattr(node, field, [rewrite(v) if isinstance(v, ast.expr) else v for v in value])
+
+        if counts[key] > 1 and candidate(node):
+            name = temporaries[key] = f"{prefix}{len(temporaries)}"
+            assignments.append(
+                ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=node))
+            return ast.Name(id=name, ctx=ast.Load())
+        return node
+
+    return assignments, [rewrite(expression) for expression in expressions]
+
+
+def eliminate_common_subexpressions(
+    module: ast.Module,
+    min_cost: int = DEFAULT_MIN_COST,
+) -> ast.Module:
+    """
+    Hoists repeated subexpressions of the returned expression of the module's
+    function into temporaries, such that each of them is evaluated only once.
+    """
+    for b in module.body:
+        if not isinstance(b, ast.FunctionDef):
+            continue
+
+        body = []
+        for statement in b.body:
+            if isinstance(statement, ast.Return) and statement.value is not None:
+                assignments, (statement.value, ) = hoist_common_subexpressions(
+                    [statement.value], min_cost=min_cost)
+                body.extend(assignments)
+            body.append(statement)
+        b.body = body
+
+    return module
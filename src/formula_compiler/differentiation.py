@@ -0,0 +1,209 @@
+import ast
+import copy
+from typing import Callable, Optional
+
+from .ast_compiler import compile_code, find_function, load_code, prepare_module
+from .compiler import parse_formula
+from .cse import DEFAULT_MIN_COST, eliminate_common_subexpressions
+from .optimizer import is_constant, math_function, optimize as optimize_module
+
+
+def constant(value: float) -> ast.Constant:
+    return ast.Constant(value=value)
+
+
+def is_zero(node: ast.expr) -> bool:
+    return is_constant(node) and node.value == 0
+
+
+def is_one(node: ast.expr) -> bool:
+    return is_constant(node) and node.value == 1
+
+
+def add(left: ast.expr, right: ast.expr) -> ast.expr:
+    if is_zero(left):
+        return right
+    if is_zero(right):
+        return left
+    return ast.BinOp(left=left, op=ast.Add(), right=right)
+
+
+def sub(left: ast.expr, right: ast.expr) -> ast.expr:
+    if is_zero(right):
+        return left
+    if is_zero(left):
+        return neg(right)
+    return ast.BinOp(left=left, op=ast.Sub(), right=right)
+
+
+def mul(left: ast.expr, right: ast.expr) -> ast.expr:
+    if is_zero(left) or is_zero(right):
+        return constant(0)
+    if is_one(left):
+        return right
+    if is_one(right):
+        return left
+    return ast.BinOp(left=left, op=ast.Mult(), right=right)
+
+
+def div(left: ast.expr, right: ast.expr) -> ast.expr:
+    if is_zero(left):
+        return constant(0)
+    if is_one(right):
+        return left
+    return ast.BinOp(left=left, op=ast.Div(), right=right)
+
+
+def power(base: ast.expr, exponent: ast.expr) -> ast.expr:
+    if is_one(exponent):
+        return base
+    return ast.BinOp(left=base, op=ast.Pow(), right=exponent)
+
+
+def neg(operand: ast.expr) -> ast.expr:
+    if is_constant(operand):
+        return constant(-operand.value)
+    return ast.UnaryOp(op=ast.USub(), operand=operand)
+
+
+def call(name: str, arg: ast.expr) -> ast.Call:
+    return ast.Call(
+        func=ast.Attribute(value=ast.Name(id="math", ctx=ast.Load()), attr=name, ctx=ast.Load()),
+        args=[arg],
+        keywords=[],
+    )
+
+
+def square(u: ast.expr) -> ast.expr:
+    return mul(u, copy.deepcopy(u))
+
+
+# Derivatives of the functions emitted by the parser with respect to their
+# argument `u`. The argument may be used more than once, hence each rule gets a
+# function returning a fresh copy of it.
+DERIVATIVES: dict[str, Callable[[Callable[[], ast.expr]], ast.expr]] = {
+    "sqrt": lambda u: div(constant(0.5), call("sqrt", u())),
+    "log": lambda u: div(constant(1), u()),
+    "log10": lambda u: div(constant(1), mul(u(), call("log", constant(10)))),
+    "exp": lambda u: call("exp", u()),
+    "sin": lambda u: call("cos", u()),
+    "cos": lambda u: neg(call("sin", u())),
+    "tan": lambda u: div(constant(1), square(call("cos", u()))),
+    "asin": lambda u: div(constant(1), call("sqrt", sub(constant(1), square(u())))),
+    "acos": lambda u: div(constant(-1), call("sqrt", sub(constant(1), square(u())))),
+    "atan": lambda u: div(constant(1), add(constant(1), square(u()))),
+    "sinh": lambda u: call("cosh", u()),
+    "cosh": lambda u: call("sinh", u()),
+    "tanh": lambda u: sub(constant(1), square(call("tanh", u()))),
+    "asinh": lambda u: div(constant(1), call("sqrt", add(square(u()), constant(1)))),
+    "acosh": lambda u: div(constant(1), call("sqrt", sub(square(u()), constant(1)))),
+    "atanh": lambda u: div(constant(1), sub(constant(1), square(u()))),
+}
+
+
+def differentiate(node: ast.expr, variable: str) -> ast.expr:
+    """
+    Returns the derivative of an expression created by the parser with respect
+    to the variable `variable` (e.g. `"x0"`). `round` is treated as piecewise
+    constant, i.e. its derivative is zero.
+
+    The expression is not modified, the derivative contains copies of its
+    subexpressions. Trivial terms (multiplications by zero or one, additions of
+    zero) are dropped, repeated subexpressions are left to `cse`.
+    """
+    # Derivatives by node id. Also keeps the subexpressions that do not depend
+    # on the variable, for which all terms containing their derivative vanish.
+    derivatives: dict[int, ast.expr] = {}
+
+    def d(node: ast.expr) -> ast.expr:
+        if (result := derivatives.get(id(node))) is None:
+            result = derivatives[id(node)] = _derivative(node)
+        return copy.deepcopy(result)
+
+    def c(node: ast.expr) -> Callable[[], ast.expr]:
+        return lambda: copy.deepcopy(node)
+
+    def _derivative(node: ast.expr) -> ast.expr:
+        if isinstance(node, ast.Name):
+            return constant(1 if node.id == variable else 0)
+        if isinstance(node, (ast.Constant, ast.Attribute)):
+            return constant(0)
+
+        if isinstance(node, ast.UnaryOp):
+            du = d(node.operand)
+            return neg(du) if isinstance(node.op, ast.USub) else du
+
+        if isinstance(node, ast.BinOp):
+            u, v = c(node.left), c(node.right)
+            du, dv = d(node.left), d(node.right)
+            if isinstance(node.op, ast.Add):
+                return add(du, dv)
+            if isinstance(node.op, ast.Sub):
+                return sub(du, dv)
+            if isinstance(node.op, ast.Mult):
+                return add(mul(du, v()), mul(u(), dv))
+            if isinstance(node.op, ast.Div):
+                # (u / v)' = (u' - (u / v) * v') / v
+                return div(sub(du, mul(div(u(), v()), dv)), v())
+            if isinstance(node.op, ast.Pow):
+                if is_zero(dv):
+                    # (u ^ c)' = c * u ^ (c - 1) * u'
+                    exponent = constant(node.right.value - 1) if is_constant(node.right) \
+                        else sub(v(), constant(1))
+                    return mul(mul(v(), power(u(), exponent)), du)
+                # (u ^ v)' = u ^ v * (v' * ln(u) + v * u' / u)
+                return mul(power(u(), v()), add(mul(dv, call("log", u())),
+                                                div(mul(v(), du), u())))
+            raise ValueError(f"Unsupported operator {type(node.op).__name__}")
+
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name) and node.func.id == "round":
+                return constant(0)
+            name = math_function(node)
+            if name not in DERIVATIVES:
+                raise ValueError(f"Unsupported function `{ast.dump(node.func)}`")
+            du = d(node.args[0])
+            if is_zero(du):
+                return du
+            return mul(DERIVATIVES[name](c(node.args[0])), du)
+
+        raise ValueError(f"Unsupported node {type(node).__name__}")
+
+    return d(node)
+
+
+def compile_gradient(
+    formula: str,
+    n_args: int = 1,
+    strict: bool = True,
+    optimize: bool = True,
+    min_cost: Optional[int] = DEFAULT_MIN_COST,
+    bind_locals: bool = False,
+) -> Callable[..., tuple]:
+    """
+    Compiles the formula into a function that returns the value of the formula
+    and the tuple of its partial derivatives with respect to all arguments:
+
+        value, gradient = compile_gradient("X0 * SIN(X1)", n_args=2)(1.0, 2.0)
+
+    Subexpressions shared by the value and the derivatives are evaluated only
+    once (unless `min_cost` is `None`). If `optimize` is True, constant
+    subexpressions of the derivatives are folded.
+    """
+    module = parse_formula(formula)
+    module = prepare_module(module=module, n_args=n_args, strict=strict)
+    f_def = find_function(module)
+    value = f_def.body[-1].value
+    gradient = [differentiate(value, arg.arg) for arg in f_def.args.args]
+    f_def.body[-1].value = ast.Tuple(
+        elts=[value, ast.Tuple(elts=gradient, ctx=ast.Load())],
+        ctx=ast.Load(),
+    )
+    f_def.returns = None
+
+    if optimize:
+        module, _ = optimize_module(module)
+    if min_cost is not None:
+        module = eliminate_common_subexpressions(module, min_cost=min_cost)
+    return load_code(compile_code(module=module, n_args=n_args, strict=strict,
+                                  bind_locals=bind_locals))
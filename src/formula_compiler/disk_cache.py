@@ -0,0 +1,166 @@
+import hashlib
+import marshal
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from types import CodeType
+from typing import Hashable, Optional, Union
+
+SUFFIX = ".fcc"
+
+
+def package_version() -> str:
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        return version("formula-compiler")
+    except (ImportError, PackageNotFoundError):
+        return "unknown"
+
+
+class DiskCache:
+    """
+    A persistent cache of marshalled code objects created by
+    `ast_compiler.compile_code`.
+
+    Entries are stored in a subdirectory that is specific to the package
+    version and the Python implementation/version, since neither the generated
+    code nor the marshal format are guaranteed to be compatible across them.
+    Entries of other versions can be removed with `invalidate`.
+
+    Writes are atomic (write to a temporary file followed by `os.replace`), so
+    multiple processes may share one cache directory. If the total size of the
+    entries exceeds `max_bytes`, the least recently used entries are pruned.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        max_bytes: int = 64 * 1024 * 1024,
+        version: Optional[str] = None,
+    ):
+        self.root = Path(directory)
+        self.max_bytes = max_bytes
+        self.version = version or package_version()
+        self.directory = self.root / (f"{self.version}-{sys.implementation.cache_tag}"
+                                      f"-marshal{marshal.version}")
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: Hashable) -> Path:
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}{SUFFIX}"
+
+    def get(self, key: Hashable) -> Optional[CodeType]:
+        """Returns the cached code object for `key` or `None` if there is none."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+
+        try:
+            code = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            # Corrupt entry, e.g. written by a crashed process on a file system
+            # without atomic renames.
+            path.unlink(missing_ok=True)
+            return None
+
+        if not isinstance(code, CodeType):
+            return None
+
+        # Update the access time used for pruning.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return code
+
+    def put(self, key: Hashable, code: CodeType) -> None:
+        """Stores a code object and prunes the cache if it exceeds `max_bytes`."""
+        data = marshal.dumps(code)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # The size of the entry that is replaced, if any.
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += len(data) - replaced
+            needs_pruning = self._size > self.max_bytes
+
+        if needs_pruning:
+            self.prune()
+
+    def size(self) -> int:
+        """Returns the total size of all entries of the current version in bytes."""
+        total = 0
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Removes the least recently used entries until the cache occupies at most
+        `max_bytes` (defaults to 90% of the configured maximum, such that
+        pruning does not occur on every write). Returns the number of removed
+        entries.
+        """
+        if max_bytes is None:
+            max_bytes = int(self.max_bytes * 0.9)
+
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._size = total
+        return removed
+
+    def invalidate(self) -> None:
+        """Removes the entries of all other package and Python versions."""
+        if not self.root.is_dir():
+            return
+        for path in self.root.iterdir():
+            if path.is_dir() and path != self.directory:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Removes all entries of the current version."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        with self._lock:
+            self._size = 0
@@ -0,0 +1,117 @@
+import ast
+from array import array
+from collections import namedtuple
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence, Union
+
+from .ast_compiler import compile_code, find_function
+from .compiler import parse_formula
+from .cse import DEFAULT_MIN_COST, hoist_common_subexpressions
+from .parser import FUNCTION_NAME
+
+RECORD_NAME = "_record"
+
+
+class FormulaSet:
+    """
+    Compiles many formulas over the same arguments `X0..Xn` into one function,
+    which evaluates all of them in a single call and returns their results as
+    a tuple, or as a named tuple if the formulas are given as a mapping from
+    names to formulas.
+
+    If `cse` is True, subexpressions that occur more than once (within or
+    across formulas) are evaluated only once per call.
+
+    With `backend="numpy"`, the function takes columns and returns one array
+    per formula, i.e. all formulas are evaluated in one pass per vector chunk.
+    """
+
+    def __init__(
+        self,
+        formulas: Union[Sequence[str], Mapping[str, str]],
+        n_args: Optional[int] = None,
+        backend: str = "math",
+        optimize: bool = False,
+        fast_math: bool = False,
+        cse: bool = True,
+        min_cost: int = DEFAULT_MIN_COST,
+        bind_locals: bool = False,
+    ):
+        if isinstance(formulas, Mapping):
+            self.names: Optional[tuple[str, ...]] = tuple(formulas)
+            self.formulas = tuple(formulas.values())
+            self.record: Optional[type] = namedtuple("Record", self.names)
+        else:
+            self.names = None
+            self.formulas = tuple(formulas)
+            self.record = None
+
+        expressions = []
+        indices = set()
+        for formula in self.formulas:
+            f_def = find_function(
+                parse_formula(formula, optimize=optimize, fast_math=fast_math))
+            indices.update(int(arg.arg[1:]) for arg in f_def.args.args)
+            expressions.append(f_def.body[-1].value)
+
+        required = max(indices) + 1 if indices else 0
+        if n_args is None:
+            n_args = required
+        elif required > n_args:
+            raise ValueError(f"The formulas require {required} arguments, but only {n_args} "
+                             f"were provided!")
+        self.n_args = n_args
+
+        assignments: list[ast.stmt] = []
+        if cse:
+            assignments, expressions = hoist_common_subexpressions(expressions, min_cost=min_cost)
+        # The source of the hoisted subexpressions, e.g. for inspection.
+        self.temporaries = tuple(ast.unparse(assignment.value) for assignment in assignments)
+        self.n_temporaries = len(assignments)
+
+        result: ast.expr = ast.Tuple(elts=expressions, ctx=ast.Load())
+        if self.record is not None:
+            result = ast.Call(func=ast.Name(id=RECORD_NAME, ctx=ast.Load()), args=expressions,
+                              keywords=[])
+
+        module = ast.Module(
+            body=[
+                ast.Import(names=[ast.alias(name="math")]),
+                ast.FunctionDef(
+                    name=FUNCTION_NAME,
+                    args=ast.arguments(
+                        posonlyargs=[],
+                        args=[ast.arg(arg=f"x{i}") for i in range(n_args)],
+                        kwonlyargs=[],
+                        kw_defaults=[],
+                        defaults=[],
+                    ),
+                    body=[*assignments, ast.Return(value=result)],
+                    decorator_list=[],
+                ),
+            ],
+            type_ignores=[],
+        )
+        code = compile_code(module=module, n_args=n_args, backend=backend,
+                            bind_locals=bind_locals)
+        namespace: dict[str, Any] = {RECORD_NAME: self.record}
+        exec(code, namespace)
+        self.function: Callable[..., tuple] = namespace[FUNCTION_NAME]
+
+    def __len__(self) -> int:
+        return len(self.formulas)
+
+    def __call__(self, *args: Any) -> tuple:
+        return self.function(*args)
+
+    def evaluate(self, rows: Iterable[Sequence[Any]]) -> tuple[array, ...]:
+        """
+        Evaluates all formulas for each row of arguments in a single pass over
+        the rows. Returns one array of doubles per formula.
+        """
+        columns = tuple(array("d") for _ in self.formulas)
+        appends = [column.append for column in columns]
+        function = self.function
+        for row in rows:
+            for append, value in zip(appends, function(*row)):
+                append(value)
+        return columns
@@ -0,0 +1,309 @@
+import ast
+import copy
+from bisect import bisect_left
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Sequence
+
+from .ast_compiler import compile_module, find_function, prepare_module
+from .cache import FormulaCache
+from .interpreter import ADD, LOAD, SUB, Instruction, Program, lower_expression
+from .lexer import normalize
+from .parser import IterativeParser, function_module
+from .scanner import EOF_TOKEN, scan
+from .tiered import TieredFunction, default_threshold
+from .tokens import ConstantToken, Token, TokenType, VariableToken
+
+LPAREN = TokenType.LParen.value
+RPAREN = TokenType.RParen.value
+
+# Maps the keys of `+` and `-` to the AST operator and the opcode.
+TERM_OPERATORS = {
+    TokenType.Add.value: (ast.Add, ADD),
+    TokenType.Sub.value: (ast.Sub, SUB),
+}
+
+
+class Term(NamedTuple):
+    # The parsed term, which is shared between formulas and never modified.
+    expression: ast.expr
+    # The indices of the used variables.
+    variables: frozenset[int]
+    # The interpreter instructions, which load variable `Xi` from register i.
+    code: tuple[Instruction, ...]
+
+
+class UpdateStats(NamedTuple):
+    # The number of tokens lexed by the update.
+    relexed_tokens: int
+    # The number of tokens taken over from the previous formula.
+    reused_tokens: int
+    # The number of top-level terms that had to be parsed.
+    parsed_terms: int
+    # The number of top-level terms taken from the table of parsed terms.
+    reused_terms: int
+    # True if the function of an identical earlier formula was reused.
+    cached: bool
+
+
+class TokenListReader:
+    """Reads a list of tokens with the same interface as `Lexer`."""
+
+    def __init__(self, tokens: Sequence[Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def get_next_token(self) -> Token:
+        if self.pos >= len(self.tokens):
+            return EOF_TOKEN
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+
+def token_key(token: Token) -> Hashable:
+    """
+    Returns a hashable key of the token: the code of its type (see
+    `TokenType`), or a tuple of the code and the value for constants and
+    variables.
+    """
+    if isinstance(token, ConstantToken):
+        # The type distinguishes `1` from `1.0`.
+        return token.type.value, token.value
+    if isinstance(token, VariableToken):
+        return token.type.value, token.index
+    return token.type.value
+
+
+def split_terms(keys: Sequence[Hashable]) -> Optional[list[tuple[Optional[int], int, int]]]:
+    """
+    Splits the tokens (given by their `token_key`) at the binary `+` and `-`
+    operators outside of parentheses. Returns the operator preceding each term
+    (`None` for the first one) and the bounds of the term, or `None` if the
+    tokens cannot be split, e.g. due to unbalanced parentheses.
+    """
+    terms = []
+    depth = 0
+    start = 0
+    operator = None
+    # `+` and `-` are binary operators after an operand (a constant, a
+    # variable or a closing parenthesis) and signs otherwise.
+    after_operand = False
+    for i, key in enumerate(keys):
+        if key == LPAREN:
+            depth += 1
+            after_operand = False
+        elif key == RPAREN:
+            depth -= 1
+            if depth < 0:
+                return None
+            after_operand = True
+        elif type(key) is tuple:
+            after_operand = True
+        else:
+            if after_operand and depth == 0 and key in TERM_OPERATORS:
+                terms.append((operator, start, i))
+                operator = key
+                start = i + 1
+            after_operand = False
+
+    if depth != 0 or start == len(keys):
+        return None
+    terms.append((operator, start, len(keys)))
+    return terms
+
+
+def common_prefix(a: str, b: str) -> int:
+    """Returns the length of the common prefix of both strings."""
+    # Binary search, such that the characters are compared by slice comparisons.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix(a: str, b: str, limit: int) -> int:
+    """Returns the length of the common suffix of both strings, at most `limit`."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class CompilationSession:
+    """
+    Compiles successive versions of a formula, e.g. while it is being edited.
+
+    Each `update` only lexes the edited part of the formula again, and only
+    parses the top-level terms (the operands of `+` and `-` outside of
+    parentheses) that changed. Parsed terms are kept in a table keyed by their
+    tokens, such that identical terms are shared between versions.
+
+    The returned callables are `tiered.TieredFunction`s, which are assembled
+    from the interpreter code of the terms and only compiled to bytecode once
+    they have been called `tier_threshold` times. Returning to an earlier
+    version of the formula reuses its callable.
+    """
+
+    def __init__(
+        self,
+        n_args: int = 1,
+        strict: bool = True,
+        dense_args: bool = False,
+        bind_locals: bool = False,
+        tier_threshold: Optional[int] = None,
+        maxsize: int = 4096,
+    ):
+        self.n_args = n_args
+        self.strict = strict
+        self.dense_args = dense_args
+        self.bind_locals = bind_locals
+        self.tier_threshold = tier_threshold
+
+        self.text = ""
+        self.tokens: list[Token] = []
+        self.offsets: list[int] = []
+        # The `token_key` of each token.
+        self.keys: list[Hashable] = []
+        self.function: Optional[TieredFunction] = None
+        self.stats: Optional[UpdateStats] = None
+
+        self._terms = FormulaCache(maxsize=maxsize)
+        self._functions = FormulaCache(maxsize=maxsize)
+
+    def update(self, formula: str) -> TieredFunction:
+        """
+        Compiles the new version of the formula. Raises `ValueError` or
+        `SyntaxError` for invalid formulas, in which case the session keeps the
+        previous version.
+        """
+        text = normalize(formula)
+        tokens, offsets, token_keys, relexed = self._relex(text)
+
+        terms = split_terms(token_keys)
+        parsed = 0
+        if terms is None:
+            # Parsing the whole formula raises the appropriate error.
+            terms = [(None, 0, len(tokens))]
+        parts: list[tuple[Optional[int], Term]] = []
+        keys = []
+        for operator, start, stop in terms:
+            key = tuple(token_keys[start:stop])
+            if (term := self._terms.get(key)) is None:
+                try:
+                    term = self._parse(tokens[start:stop])
+                except Exception:
+                    if len(terms) == 1:
+                        raise
+                    # Report the error for the whole formula.
+                    self._parse(tokens)
+                    raise
+                self._terms.put(key, term)
+                parsed += 1
+            parts.append((operator, term))
+            keys.append((operator, key))
+
+        key = tuple(keys)
+        fun = self._functions.get(key)
+        cached = fun is not None
+        if fun is None:
+            fun = self._assemble(formula, parts)
+            self._functions.put(key, fun)
+
+        self.text, self.tokens, self.offsets, self.keys = text, tokens, offsets, token_keys
+        self.function = fun
+        self.stats = UpdateStats(
+            relexed_tokens=relexed,
+            reused_tokens=len(tokens) - relexed,
+            parsed_terms=parsed,
+            reused_terms=len(parts) - parsed,
+            cached=cached,
+        )
+        return fun
+
+    def _relex(self, text: str) -> tuple[list[Token], list[int], list[Hashable], int]:
+        """
+        Returns the tokens of the new text, their offsets and keys, reusing the
+        tokens before and after the edited span, and the number of lexed tokens.
+        """
+        old_text, old_tokens, old_offsets, old_keys = self.text, self.tokens, self.offsets, self.keys
+
+        # The edited span is `[prefix, len(text) - suffix)` of the new text.
+        prefix = common_prefix(old_text, text)
+        suffix = common_suffix(old_text, text, min(len(old_text), len(text)) - prefix)
+        delta = len(text) - len(old_text)
+
+        # Tokens are contiguous in the normalized text. A token is kept if the
+        # character following it is unchanged, since that character ended it.
+        n_kept = max(bisect_left(old_offsets, prefix) - 1, 0)
+        tokens = old_tokens[:n_kept]
+        offsets = old_offsets[:n_kept]
+        keys = old_keys[:n_kept]
+        start = old_offsets[n_kept] if n_kept < len(old_offsets) else 0
+
+        relexed = 0
+        edit_end = len(text) - suffix
+        for offset, token in scan(text, start):
+            if offset >= edit_end:
+                # From a token boundary within the unchanged suffix on, the old
+                # tokens are still valid.
+                i = bisect_left(old_offsets, offset - delta)
+                if i < len(old_offsets) and old_offsets[i] == offset - delta:
+                    tokens += old_tokens[i:]
+                    offsets += map(delta.__add__, old_offsets[i:])
+                    keys += old_keys[i:]
+                    break
+            tokens.append(token)
+            offsets.append(offset)
+            keys.append(token_key(token))
+            relexed += 1
+
+        return tokens, offsets, keys, relexed
+
+    def _parse(self, tokens: Sequence[Token]) -> Term:
+        parser = IterativeParser(lexer=TokenListReader(tokens))
+        expression = find_function(parser.parse()).body[-1].value
+        code: list[Instruction] = []
+        lower_expression(expression, {f"x{i}": i for i in parser.variables}, code)
+        return Term(expression=expression, variables=frozenset(parser.variables), code=tuple(code))
+
+    def _assemble(self, formula: str, parts: list[tuple[Optional[int], Term]]) -> TieredFunction:
+        expression: Optional[ast.expr] = None
+        code: list[Instruction] = []
+        variables: set[int] = set()
+        for operator, term in parts:
+            variables.update(term.variables)
+            code.extend(term.code)
+            if operator is None:
+                expression = term.expression
+            else:
+                op, opcode = TERM_OPERATORS[operator]
+                expression = ast.BinOp(left=expression, op=op(), right=term.expression)
+                code.append((opcode, None))
+
+        module = function_module(expression, variables, dense=self.dense_args)
+        module = prepare_module(module=module, n_args=self.n_args, strict=self.strict)
+
+        arg_names = tuple(arg.arg for arg in find_function(module).args.args)
+        registers = {int(name[1:]): i for i, name in enumerate(arg_names) if name[0] == "x"}
+        if any(index != register for index, register in registers.items()):
+            code = [(LOAD, registers[arg]) if op == LOAD else (op, arg) for op, arg in code]
+        program = Program(code=tuple(code), arg_names=arg_names, n_registers=len(arg_names))
+
+        n_args, strict, bind_locals = self.n_args, self.strict, self.bind_locals
+
+        def compile_tier() -> Callable[..., Any]:
+            # The terms are shared with other formulas and must not be modified.
+            return compile_module(copy.deepcopy(module), n_args=n_args, strict=strict,
+                                  bind_locals=bind_locals)
+
+        threshold = self.tier_threshold
+        if threshold is None:
+            threshold = default_threshold(program)
+        return TieredFunction(formula=formula, program=program, compile_tier=compile_tier,
+                              threshold=threshold)
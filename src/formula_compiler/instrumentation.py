@@ -0,0 +1,110 @@
+import time
+from contextlib import contextmanager
+from types import CodeType
+from typing import Callable, Iterator, NamedTuple, Optional
+
+
+class CompileStats(NamedTuple):
+    formula: str
+    # The duration of each stage in seconds, in the order of the stages.
+    durations: dict[str, float]
+    # The duration of the whole compilation in seconds.
+    total: float
+    # True if the callable was found in the `FORMULA_CACHE`.
+    cached: bool
+    # The number of tokens of the formula (`None` if not lexed).
+    n_tokens: Optional[int] = None
+    # The number of AST nodes of the parsed (and optimized) module.
+    n_nodes: Optional[int] = None
+    # The size of the bytecode of all compiled code objects in bytes.
+    bytecode_size: Optional[int] = None
+
+
+Hook = Callable[[CompileStats], None]
+
+# The hooks called with the statistics of each `compile_formula` call.
+HOOKS: list[Hook] = []
+
+
+class Recorder:
+    """
+    Collects the statistics of one compilation. Each call of `lap` attributes
+    the time since the previous call to a stage.
+    """
+
+    __slots__ = ("formula", "durations", "n_tokens", "n_nodes", "bytecode_size", "_start",
+                 "_last")
+
+    def __init__(self, formula: str):
+        self.formula = formula
+        self.durations: dict[str, float] = {}
+        self.n_tokens: Optional[int] = None
+        self.n_nodes: Optional[int] = None
+        self.bytecode_size: Optional[int] = None
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.durations[stage] = self.durations.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def skip(self) -> None:
+        """Excludes the time since the previous lap from all stages."""
+        self._last = time.perf_counter()
+
+    def finish(self, cached: bool = False) -> CompileStats:
+        """Passes the statistics to all hooks and returns them."""
+        stats = CompileStats(
+            formula=self.formula,
+            durations=self.durations,
+            total=time.perf_counter() - self._start,
+            cached=cached,
+            n_tokens=self.n_tokens,
+            n_nodes=self.n_nodes,
+            bytecode_size=self.bytecode_size,
+        )
+        for hook in list(HOOKS):
+            hook(stats)
+        return stats
+
+
+def recorder(formula: str) -> Optional[Recorder]:
+    """Returns a `Recorder` if any hook is installed, otherwise `None`."""
+    return Recorder(formula) if HOOKS else None
+
+
+def add_hook(hook: Hook) -> None:
+    HOOKS.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    HOOKS.remove(hook)
+
+
+@contextmanager
+def instrument(hook: Hook) -> Iterator[None]:
+    """Calls the hook with the `CompileStats` of each compilation within the block."""
+    add_hook(hook)
+    try:
+        yield
+    finally:
+        remove_hook(hook)
+
+
+@contextmanager
+def collect() -> Iterator[list[CompileStats]]:
+    """Collects the `CompileStats` of all compilations within the block in a list."""
+    stats: list[CompileStats] = []
+    with instrument(stats.append):
+        yield stats
+
+
+def bytecode_size(code: CodeType) -> int:
+    """Returns the size of the bytecode of the code object and all nested ones."""
+    size = 0
+    stack = [code]
+    while stack:
+        code = stack.pop()
+        size += len(code.co_code)
+        stack.extend(c for c in code.co_consts if isinstance(c, CodeType))
+    return size
@@ -0,0 +1,272 @@
+import ast
+import math
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+from .ast_compiler import find_function
+
+# Opcodes of the interpreter. Each instruction is a tuple `(opcode, argument)`.
+LOAD = 0  # Push register `argument`
+CONST = 1  # Push the constant `argument`
+ADD = 2
+SUB = 3
+MUL = 4
+DIV = 5
+POW = 6
+NEG = 7
+CALL = 8  # Replace the top of the stack by `argument(top)`
+STORE = 9  # Pop the top of the stack into register `argument`
+
+BINARY_OPCODES = {
+    ast.Add: ADD,
+    ast.Sub: SUB,
+    ast.Mult: MUL,
+    ast.Div: DIV,
+    ast.Pow: POW,
+}
+
+# The functions that may be called by interpreted programs.
+MATH_FUNCTIONS: dict[str, Callable[[Any], Any]] = {
+    name: getattr(math, name)
+    for name in ("sqrt", "log", "log10", "exp", "sin", "cos", "tan", "asin", "acos", "atan",
+                 "sinh", "cosh", "tanh", "asinh", "acosh", "atanh")
+}
+MATH_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+BUILTINS: dict[str, Callable[[Any], Any]] = {"round": round}
+
+Instruction = tuple[int, Any]
+
+
+class Program:
+    """
+    A formula lowered to a postfix program operating on a register file. The
+    first registers hold the arguments, the remaining ones the temporaries
+    introduced by `cse`.
+
+    Calling the program evaluates it with `execute`, without any code being
+    generated by `compile` or `exec`. The results are identical to those of the
+    compiled function, since the same Python operations are applied.
+    """
+
+    __slots__ = ("code", "arg_names", "n_registers")
+
+    def __init__(self, code: tuple[Instruction, ...], arg_names: tuple[str, ...], n_registers: int):
+        self.code = code
+        self.arg_names = arg_names
+        self.n_registers = n_registers
+
+    def __call__(self, *args: Any) -> Any:
+        if len(args) != len(self.arg_names):
+            raise TypeError(f"Expected {len(self.arg_names)} arguments, got {len(args)}")
+
+        registers = list(args)
+        if self.n_registers > len(args):
+            registers.extend([None] * (self.n_registers - len(args)))
+        return execute(self.code, registers)
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+
+def execute(code: tuple[Instruction, ...], registers: list) -> Any:
+    stack: list = []
+    push = stack.append
+    pop = stack.pop
+    for op, arg in code:
+        if op == LOAD:
+            push(registers[arg])
+        elif op == CONST:
+            push(arg)
+        elif op == CALL:
+            stack[-1] = arg(stack[-1])
+        elif op == MUL:
+            b = pop()
+            stack[-1] = stack[-1] * b
+        elif op == ADD:
+            b = pop()
+            stack[-1] = stack[-1] + b
+        elif op == SUB:
+            b = pop()
+            stack[-1] = stack[-1] - b
+        elif op == DIV:
+            b = pop()
+            stack[-1] = stack[-1] / b
+        elif op == POW:
+            b = pop()
+            stack[-1] = stack[-1]**b
+        elif op == NEG:
+            stack[-1] = -stack[-1]
+        else:
+            registers[arg] = pop()
+    return stack[-1]
+
+
+def lower(module: ast.Module) -> Program:
+    """
+    Lowers the function of a module created by the parser (optionally passed
+    through the optimizer and `cse`) to a `Program`. Raises `ValueError` for
+    nodes the parser does not emit.
+    """
+    f_def = find_function(module)
+    registers = {arg.arg: i for i, arg in enumerate(f_def.args.args)}
+    arg_names = tuple(registers)
+
+    code: list[Instruction] = []
+    for statement in f_def.body:
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1 \
+                and isinstance(statement.targets[0], ast.Name):
+            lower_expression(statement.value, registers, code)
+            name = statement.targets[0].id
+            code.append((STORE, registers.setdefault(name, len(registers))))
+        elif isinstance(statement, ast.Return) and statement.value is not None:
+            lower_expression(statement.value, registers, code)
+            break
+        else:
+            raise ValueError(f"Unsupported statement {type(statement).__name__}")
+    else:
+        raise ValueError("Function does not return a value")
+
+    return Program(code=tuple(code), arg_names=arg_names, n_registers=len(registers))
+
+
+def lower_expression(node: ast.expr, registers: dict[str, int], code: list[Instruction]) -> None:
+    """
+    Appends the instructions evaluating the expression to `code`. `registers`
+    maps the names of the variables to their registers.
+    """
+    # Iterative post-order traversal, such that deeply nested formulas do not
+    # raise a `RecursionError`. A `None` marker indicates that the children of
+    # the following node have already been emitted.
+    stack: list[Optional[ast.AST]] = [node]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            node = stack.pop()
+            if isinstance(node, ast.BinOp):
+                code.append((BINARY_OPCODES[type(node.op)], None))
+            elif isinstance(node, ast.UnaryOp):
+                if isinstance(node.op, ast.USub):
+                    code.append((NEG, None))
+            else:
+                code.append((CALL, _resolve_function(node.func)))
+            continue
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            code.append((CONST, node.value))
+        elif isinstance(node, ast.Name):
+            if node.id not in registers:
+                raise ValueError(f"Unknown variable `{node.id}`")
+            code.append((LOAD, registers[node.id]))
+        elif (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+              and node.value.id == "math" and node.attr in MATH_CONSTANTS):
+            code.append((CONST, MATH_CONSTANTS[node.attr]))
+        elif isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPCODES:
+            stack.extend((node, None, node.right, node.left))
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+            stack.extend((node, None, node.operand))
+        elif isinstance(node, ast.Call) and len(node.args) == 1 and not node.keywords:
+            _resolve_function(node.func)
+            stack.extend((node, None, node.args[0]))
+        else:
+            raise ValueError(f"Unsupported node {type(node).__name__}")
+
+
+def _resolve_function(func: ast.expr) -> Callable[[Any], Any]:
+    if (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+            and func.value.id == "math" and func.attr in MATH_FUNCTIONS):
+        return MATH_FUNCTIONS[func.attr]
+    if isinstance(func, ast.Name) and func.id in BUILTINS:
+        return BUILTINS[func.id]
+    raise ValueError(f"Unsupported function `{ast.dump(func)}`")
+
+
+class EngineCosts(NamedTuple):
+    """Estimated costs in seconds, see `calibrate`."""
+    # Fixed cost of `compile` + `exec` of a module.
+    compile_overhead: float
+    # Additional cost of `compile` + `exec` per AST node.
+    compile_per_node: float
+    # Per-call overhead of an interpreted program.
+    interpret_overhead: float
+    # Additional cost per interpreted instruction.
+    interpret_per_instruction: float
+    # Per-call cost of a compiled function per AST node.
+    compiled_per_node: float
+
+
+# Measured with `calibrate` on CPython 3.11 (x86-64).
+COSTS = EngineCosts(
+    compile_overhead=30e-6,
+    compile_per_node=3.5e-6,
+    interpret_overhead=0.5e-6,
+    interpret_per_instruction=88e-9,
+    compiled_per_node=13e-9,
+)
+
+
+def break_even_calls(program: Program, costs: Optional[EngineCosts] = None) -> float:
+    """
+    Returns the number of calls from which compiling the program is cheaper than
+    interpreting it. Both costs grow linearly with the size of the program,
+    whose number of instructions roughly equals the number of AST nodes of the
+    expression.
+    """
+    costs = costs or COSTS
+    n = len(program)
+    compile_cost = costs.compile_overhead + costs.compile_per_node * n
+    saved_per_call = (costs.interpret_overhead + costs.interpret_per_instruction * n
+                      - costs.compiled_per_node * n)
+    if saved_per_call <= 0:
+        return math.inf
+    return compile_cost / saved_per_call
+
+
+def should_interpret(program: Program, expected_calls: int, costs: Optional[EngineCosts] = None) -> bool:
+    """
+    Decides whether interpreting the program for `expected_calls` calls is
+    cheaper than compiling it first.
+    """
+    return expected_calls < break_even_calls(program, costs)
+
+
+def calibrate(repeat: int = 5) -> EngineCosts:
+    """
+    Measures the costs of both engines on this machine and makes them the
+    default for `should_interpret`.
+    """
+    global COSTS
+    from .ast_compiler import compile_module
+    from .parser import IterativeParser
+    from .scanner import Scanner
+
+    def best(fun: Callable[[], Any], number: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fun()
+            timings.append((time.perf_counter() - start) / number)
+        return min(timings)
+
+    def parse(formula: str) -> ast.Module:
+        return IterativeParser(lexer=Scanner(text=formula)).parse()
+
+    small, large = "X", "+".join(f"SIN(X*{i})" for i in range(50))
+    sizes = [len(lower(parse(f))) for f in (small, large)]
+    compile_times = [best(lambda: compile_module(parse(f)), number=20) - best(lambda: parse(f), 20)
+                     for f in (small, large)]
+    programs = [lower(parse(f)) for f in (small, large)]
+    interpret_times = [best(lambda: p(0.5), number=1000) for p in programs]
+    compiled = compile_module(parse(large))
+    compiled_time = best(lambda: compiled(0.5), number=1000)
+
+    compile_per_node = (compile_times[1] - compile_times[0]) / (sizes[1] - sizes[0])
+    per_instruction = (interpret_times[1] - interpret_times[0]) / (sizes[1] - sizes[0])
+    COSTS = EngineCosts(
+        compile_overhead=max(compile_times[0] - compile_per_node * sizes[0], 0.0),
+        compile_per_node=compile_per_node,
+        interpret_overhead=max(interpret_times[0] - per_instruction * sizes[0], 0.0),
+        interpret_per_instruction=per_instruction,
+        compiled_per_node=compiled_time / sizes[1],
+    )
+    return COSTS
@@ -0,0 +1,486 @@
+import ast
+import math
+from typing import Any, Callable, NamedTuple, Optional, Sequence
+
+from .ast_compiler import compile_module, find_function
+from .compiler import parse_formula
+from .optimizer import math_function
+
+INF = math.inf
+
+# The largest arguments for which `math.exp` and `math.cosh`/`math.sinh` do not
+# overflow.
+EXP_MAX = 709.782712893384
+HYPERBOLIC_MAX = 710.4758600739439
+
+GUARD_PREFIX = "_guard_"
+GUARDED_POW = "_guarded_pow"
+GUARDED_FLOAT = "_guarded_float"
+
+# Integers within these bounds can be converted to float.
+MAX_INTEGER = 2.0 ** 1023
+
+# Defined next to the function if any power cannot be proven safe. `**` raises
+# for `0 ** -1` and on overflow, and returns complex numbers for negative bases
+# with fractional exponents. Integer powers are converted to float, since the
+# analysis assumes float results, i.e. powers that do not fit become NaN.
+GUARDED_POW_SOURCE = f"""
+def {GUARDED_POW}(base, exponent):
+    try:
+        result = base ** exponent
+        if isinstance(result, complex):
+            return math.nan
+        return float(result)
+    except (ZeroDivisionError, OverflowError):
+        return math.nan
+"""
+
+# Integer arithmetic does not overflow, but integers that do not fit in a float
+# raise when they are mixed with floats or passed to `math` functions. Such
+# integers are converted with this function, i.e. become NaN.
+GUARDED_FLOAT_SOURCE = f"""
+def {GUARDED_FLOAT}(value):
+    try:
+        return float(value)
+    except OverflowError:
+        return math.nan
+"""
+
+
+class Interval(NamedTuple):
+    lo: float
+    hi: float
+    # True if the value may also be NaN.
+    nan: bool = False
+    # True if the value may be an integer (e.g. the result of `round`).
+    integer: bool = False
+
+    @property
+    def finite(self) -> bool:
+        return math.isfinite(self.lo) and math.isfinite(self.hi)
+
+    def __contains__(self, value: float) -> bool:
+        return self.lo <= value <= self.hi
+
+
+UNBOUNDED = Interval(-INF, INF)
+
+
+class Domain(NamedTuple):
+    """The arguments for which a function does not raise."""
+    lo: float
+    hi: float
+    lo_open: bool = False
+    hi_open: bool = False
+
+    def contains(self, interval: Interval) -> bool:
+        return ((interval.lo > self.lo if self.lo_open else interval.lo >= self.lo)
+                and (interval.hi < self.hi if self.hi_open else interval.hi <= self.hi))
+
+
+# Domains of the functions emitted by the parser. NaN arguments only raise in
+# `round`, which requires finite arguments.
+DOMAINS = {
+    "sqrt": Domain(0.0, INF),
+    "log": Domain(0.0, INF, lo_open=True),
+    "log10": Domain(0.0, INF, lo_open=True),
+    "exp": Domain(-INF, EXP_MAX),
+    "sin": Domain(-INF, INF, lo_open=True, hi_open=True),
+    "cos": Domain(-INF, INF, lo_open=True, hi_open=True),
+    "tan": Domain(-INF, INF, lo_open=True, hi_open=True),
+    "asin": Domain(-1.0, 1.0),
+    "acos": Domain(-1.0, 1.0),
+    "atan": Domain(-INF, INF),
+    "sinh": Domain(-HYPERBOLIC_MAX, HYPERBOLIC_MAX),
+    "cosh": Domain(-HYPERBOLIC_MAX, HYPERBOLIC_MAX),
+    "tanh": Domain(-INF, INF),
+    "asinh": Domain(-INF, INF),
+    "acosh": Domain(1.0, INF),
+    "atanh": Domain(-1.0, 1.0, lo_open=True, hi_open=True),
+    "round": Domain(-INF, INF, lo_open=True, hi_open=True),
+}
+
+# The ranges of the functions, to which the widened bounds are clipped.
+IMAGES = {
+    "sqrt": (0.0, INF),
+    "exp": (0.0, INF),
+    "acos": (0.0, math.pi),
+    "asin": (-math.pi / 2, math.pi / 2),
+    "atan": (-math.pi / 2, math.pi / 2),
+    "tanh": (-1.0, 1.0),
+    "cosh": (1.0, INF),
+    "acosh": (0.0, INF),
+}
+
+INCREASING = {"sqrt", "log", "log10", "exp", "asin", "atan", "sinh", "tanh", "asinh", "acosh",
+              "atanh", "round"}
+DECREASING = {"acos"}
+
+
+class RangeAnalysis(NamedTuple):
+    # The bounds of the result for arguments within their ranges.
+    bounds: Interval
+    # The operations that may raise (or return complex numbers) for arguments
+    # within their ranges, as source code.
+    unsafe: list[str]
+
+
+def _interval(lo: float, hi: float, nan: bool) -> Interval:
+    # NaN bounds result from e.g. `inf - inf` and mean that nothing is known.
+    return Interval(-INF if lo != lo else lo, INF if hi != hi else hi, nan)
+
+
+def _float(value: float) -> float:
+    """Converts an integer bound to float, integers that do not fit to infinity."""
+    try:
+        return float(value)
+    except OverflowError:
+        return INF if value > 0 else -INF
+
+
+def _widen(lo: float, hi: float, nan: bool) -> Interval:
+    """Widens bounds computed by library functions, which are not correctly rounded."""
+    return _interval(math.nextafter(lo, -INF), math.nextafter(hi, INF), nan)
+
+
+def _corners(op: Callable[[Any, Any], Any], a: Interval, b: Interval, nan: bool) -> Interval:
+    """Returns the bounds of an operation that is monotonic in both arguments."""
+    values = []
+    for x in (a.lo, a.hi):
+        for y in (b.lo, b.hi):
+            try:
+                value = op(x, y)
+            except (OverflowError, ZeroDivisionError):
+                value = INF
+            # `0 * inf` only occurs at unbounded ends of the intervals.
+            values.append(0.0 if value != value else value)
+    return _interval(min(values), max(values), nan)
+
+
+def _power(x: float, y: float) -> float:
+    result = float(x) ** float(y)
+    return INF if isinstance(result, complex) else result
+
+
+def _call_interval(name: str, arg: Interval, safe: bool) -> Interval:
+    nan = arg.nan or not safe
+    domain = DOMAINS[name]
+    lo, hi = max(arg.lo, domain.lo), min(arg.hi, domain.hi)
+    if lo > hi:
+        # All values are outside of the domain.
+        return Interval(-INF, INF, True)
+
+    function = round if name == "round" else getattr(math, name)
+
+    def f(x: float) -> float:
+        try:
+            return function(x)
+        except (ValueError, OverflowError):
+            # At an open end of the domain, i.e. `log(0)`, `atanh(±1)` or
+            # `round(±inf)`.
+            return -INF if name in ("log", "log10") else math.copysign(INF, x)
+
+    if name == "round":
+        return _interval(f(lo), f(hi), nan)
+    if name in INCREASING:
+        bounds = _widen(f(lo), f(hi), nan)
+    elif name in DECREASING:
+        bounds = _widen(f(hi), f(lo), nan)
+    elif name == "cosh":
+        high = f(max(abs(lo), abs(hi)))
+        low = 1.0 if lo <= 0 <= hi else f(min(abs(lo), abs(hi)))
+        bounds = _widen(low, high, nan)
+    elif name in ("sin", "cos"):
+        return Interval(-1.0, 1.0, nan)
+    elif name == "tan" and -math.pi / 2 < lo and hi < math.pi / 2:
+        # Increasing within a period.
+        bounds = _widen(f(lo), f(hi), nan)
+    else:
+        return Interval(-INF, INF, nan)
+    if name in IMAGES:
+        image_lo, image_hi = IMAGES[name]
+        bounds = Interval(max(bounds.lo, image_lo), min(bounds.hi, image_hi), nan)
+    return bounds
+
+
+def _pow_interval(a: Interval, b: Interval) -> tuple[Interval, bool]:
+    """Returns the bounds of `a ** b` and whether the power is safe."""
+    nan = a.nan or b.nan or not (a.finite and b.finite)
+    if b.lo == b.hi and float(b.lo).is_integer() and a.finite:
+        n = b.lo
+        if n < 0 and a.lo <= 0 <= a.hi:
+            return Interval(-INF, INF, True), False
+        if n % 2 == 0 and a.lo < 0 < a.hi:
+            try:
+                high = _power(max(-a.lo, a.hi), n)
+            except OverflowError:
+                high = INF
+            bounds = _widen(0.0, high, nan)
+        else:
+            bounds = _corners(_power, a, b, nan)
+            bounds = _widen(bounds.lo, bounds.hi, nan)
+    elif a.lo > 0 or a.lo >= 0 and b.lo > 0:
+        bounds = _corners(_power, a, b, nan)
+        bounds = _widen(bounds.lo, bounds.hi, nan)
+    else:
+        return Interval(-INF, INF, True), False
+    if a.lo >= 0 or b.lo % 2 == 0 and b.lo == b.hi:
+        # Even powers and powers of non-negative bases are not negative.
+        bounds = bounds._replace(lo=max(bounds.lo, 0.0))
+
+    # The power overflows if the bounds are not finite.
+    if not bounds.finite:
+        return bounds._replace(nan=True), False
+    return bounds, True
+
+
+def analyze_expression(
+    node: ast.expr,
+    names: dict[str, Interval],
+) -> tuple[dict[int, Interval], set[int], set[int]]:
+    """
+    Computes the bounds of all subexpressions of an expression created by the
+    parser, given the bounds of the variables in `names`. Returns the bounds by
+    node id, the ids of the nodes that may raise and the ids of the nodes that
+    may be integers too large for a float. The bounds of the latter are those
+    after the conversion by `_guarded_float`.
+    """
+    intervals: dict[int, Interval] = {}
+    unsafe: set[int] = set()
+    oversized: set[int] = set()
+    # Post-order traversal with an explicit stack, such that deeply nested
+    # expressions do not raise a `RecursionError`.
+    stack = [node]
+    while stack:
+        current = stack[-1]
+        pending = [child for child in ast.iter_child_nodes(current)
+                   if isinstance(child, ast.expr) and id(child) not in intervals
+                   and not (isinstance(current, ast.Call) and child is current.func)]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+
+        safe = True
+        if isinstance(current, ast.Constant):
+            value = current.value
+            if value != value:
+                result = Interval(-INF, INF, True)
+            else:
+                result = Interval(_float(value), _float(value), integer=type(value) is int)
+        elif isinstance(current, ast.Name):
+            result = names.get(current.id, UNBOUNDED)
+        elif isinstance(current, ast.Attribute):
+            value = getattr(math, current.attr)
+            result = Interval(value, value)
+        elif isinstance(current, ast.UnaryOp):
+            operand = intervals[id(current.operand)]
+            if isinstance(current.op, ast.USub):
+                operand = operand._replace(lo=-operand.hi, hi=-operand.lo)
+            result = operand
+        elif isinstance(current, ast.BinOp):
+            a, b = intervals[id(current.left)], intervals[id(current.right)]
+            nan = a.nan or b.nan or not (a.finite and b.finite)
+            integer = a.integer and b.integer
+            if isinstance(current.op, ast.Add):
+                result = _interval(a.lo + b.lo, a.hi + b.hi, nan)._replace(integer=integer)
+            elif isinstance(current.op, ast.Sub):
+                result = _interval(a.lo - b.hi, a.hi - b.lo, nan)._replace(integer=integer)
+            elif isinstance(current.op, ast.Mult):
+                result = _corners(lambda x, y: x * y, a, b, nan)._replace(integer=integer)
+            elif isinstance(current.op, ast.Div):
+                safe = b.lo > 0 or b.hi < 0
+                result = _corners(lambda x, y: x / y, a, b, nan) if safe \
+                    else Interval(-INF, INF, True)
+            elif isinstance(current.op, ast.Pow):
+                result, safe = _pow_interval(a, b)
+                # Guarded powers are converted to float.
+                result = result._replace(integer=safe and integer and b.lo >= 0)
+            else:
+                raise ValueError(f"Unsupported operator {type(current.op).__name__}")
+        elif isinstance(current, ast.Call):
+            name = "round" if isinstance(current.func, ast.Name) and current.func.id == "round" \
+                else math_function(current)
+            if name not in DOMAINS:
+                raise ValueError(f"Unsupported function `{ast.dump(current.func)}`")
+            arg = intervals[id(current.args[0])]
+            safe = DOMAINS[name].contains(arg) and not (name == "round" and arg.nan)
+            result = _call_interval(name, arg, safe)._replace(integer=name == "round")
+        else:
+            raise ValueError(f"Unsupported node {type(current).__name__}")
+
+        # The bounds of integers are rounded, hence the margin.
+        if result.integer and not (-MAX_INTEGER < result.lo and result.hi < MAX_INTEGER):
+            oversized.add(id(current))
+            result = result._replace(nan=True, integer=False)
+        intervals[id(current)] = result
+        if not safe:
+            unsafe.add(id(current))
+    return intervals, unsafe, oversized
+
+
+def argument_intervals(
+    f_def: ast.FunctionDef,
+    ranges: Sequence[Optional[tuple[float, float]]],
+) -> dict[str, Interval]:
+    """Returns the bounds of the arguments `xi` of the function, `ranges[i]`."""
+    names = {}
+    for arg in f_def.args.args:
+        if not (arg.arg[:1] == "x" and arg.arg[1:].isdigit()):
+            continue
+        i = int(arg.arg[1:])
+        if i < len(ranges) and ranges[i] is not None:
+            lo, hi = ranges[i]
+            if not lo <= hi:
+                raise ValueError(f"Invalid range {ranges[i]} of X{i}")
+            names[arg.arg] = Interval(lo, hi)
+    return names
+
+
+def _analyze_module(
+    module: ast.Module,
+    ranges: Sequence[Optional[tuple[float, float]]],
+) -> tuple[Interval, dict[int, Interval], set[int], set[int], list[ast.expr]]:
+    f_def = find_function(module)
+    names = argument_intervals(f_def, ranges)
+    intervals: dict[int, Interval] = {}
+    unsafe: set[int] = set()
+    oversized: set[int] = set()
+    expressions = []
+    # The statements are the assignments of temporaries (see `cse`) and the return.
+    for statement in f_def.body:
+        expressions.append(statement.value)
+        bounds, statement_unsafe, statement_oversized = analyze_expression(statement.value, names)
+        intervals.update(bounds)
+        unsafe |= statement_unsafe
+        oversized |= statement_oversized
+        if isinstance(statement, ast.Assign):
+            names[statement.targets[0].id] = bounds[id(statement.value)]
+    return intervals[id(f_def.body[-1].value)], intervals, unsafe, oversized, expressions
+
+
+def analyze(
+    formula: str,
+    ranges: Sequence[Optional[tuple[float, float]]] = (),
+    optimize: bool = False,
+) -> RangeAnalysis:
+    """
+    Computes the bounds of the result of the formula, given the range
+    `(lo, hi)` of each variable `Xi` as `ranges[i]` (variables without a range
+    are unbounded), and finds the operations that may raise for arguments
+    within the ranges.
+    """
+    module = parse_formula(formula, optimize=optimize)
+    bounds, _, unsafe, _, expressions = _analyze_module(module, ranges)
+    nodes = [node for expression in expressions for node in ast.walk(expression)
+             if id(node) in unsafe]
+    return RangeAnalysis(bounds=bounds, unsafe=[ast.unparse(node) for node in nodes])
+
+
+class _Guard(ast.NodeTransformer):
+    """Replaces the unsafe operations by expressions that return NaN instead of raising."""
+
+    def __init__(self, unsafe: set[int], oversized: set[int]):
+        self.unsafe = unsafe
+        self.oversized = oversized
+        self.n_guards = 0
+        self.pow_used = False
+        self.float_used = False
+
+    def visit(self, node: ast.AST) -> ast.AST:
+        is_oversized = id(node) in self.oversized
+        node = super().visit(node)
+        if not is_oversized:
+            return node
+        self.float_used = True
+        return ast.Call(func=ast.Name(id=GUARDED_FLOAT, ctx=ast.Load()), args=[node], keywords=[])
+
+    def temporary(self) -> str:
+        name = f"{GUARD_PREFIX}{self.n_guards}"
+        self.n_guards += 1
+        return name
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.expr:
+        is_unsafe = id(node) in self.unsafe
+        node = self.generic_visit(node)
+        if not is_unsafe:
+            return node
+        if isinstance(node.op, ast.Pow):
+            self.pow_used = True
+            return ast.Call(func=ast.Name(id=GUARDED_POW, ctx=ast.Load()),
+                            args=[node.left, node.right], keywords=[])
+        # Division: `left / t if (t := right) != 0 else nan`
+        name = self.temporary()
+        return ast.IfExp(
+            test=ast.Compare(left=ast.NamedExpr(target=ast.Name(id=name, ctx=ast.Store()),
+                                                value=node.right),
+                             ops=[ast.NotEq()], comparators=[ast.Constant(value=0)]),
+            body=ast.BinOp(left=node.left, op=node.op, right=ast.Name(id=name, ctx=ast.Load())),
+            orelse=ast.Constant(value=math.nan),
+        )
+
+    def visit_Call(self, node: ast.Call) -> ast.expr:
+        is_unsafe = id(node) in self.unsafe
+        node = self.generic_visit(node)
+        if not is_unsafe:
+            return node
+        name = "round" if isinstance(node.func, ast.Name) else math_function(node)
+        domain = DOMAINS[name]
+        # `f(t) if lo <= (t := arg) <= hi else nan`, which is False for NaN.
+        temporary = self.temporary()
+        ops: list[ast.cmpop] = []
+        operands: list[ast.expr] = []
+        if domain.lo != -INF or domain.lo_open:
+            ops.append(ast.Lt() if domain.lo_open else ast.LtE())
+            operands.append(ast.Constant(value=domain.lo))
+        operands.append(ast.NamedExpr(target=ast.Name(id=temporary, ctx=ast.Store()),
+                                      value=node.args[0]))
+        if domain.hi != INF or domain.hi_open:
+            ops.append(ast.Lt() if domain.hi_open else ast.LtE())
+            operands.append(ast.Constant(value=domain.hi))
+        node.args = [ast.Name(id=temporary, ctx=ast.Load())]
+        return ast.IfExp(
+            test=ast.Compare(left=operands[0], ops=ops, comparators=operands[1:]),
+            body=node,
+            orelse=ast.Constant(value=math.nan),
+        )
+
+
+def guard_module(
+    module: ast.Module,
+    ranges: Sequence[Optional[tuple[float, float]]] = (),
+) -> ast.Module:
+    """
+    Rewrites the module created by the parser (in place), such that the
+    operations that cannot be proven safe for arguments within `ranges` (see
+    `analyze`) return NaN instead of raising. Operations proven safe remain
+    unguarded, i.e. if all of them are safe, the module is not changed.
+    Arguments outside of their ranges may still raise.
+    """
+    _, _, unsafe, oversized, _ = _analyze_module(module, ranges)
+    if not (unsafe or oversized):
+        return module
+    guard = _Guard(unsafe, oversized)
+    f_def = find_function(module)
+    f_def.body = [guard.visit(statement) for statement in f_def.body]
+    if guard.pow_used:
+        module.body.extend(ast.parse(GUARDED_POW_SOURCE).body)
+    if guard.float_used:
+        module.body.extend(ast.parse(GUARDED_FLOAT_SOURCE).body)
+    return module
+
+
+def compile_guarded(
+    formula: str,
+    ranges: Sequence[Optional[tuple[float, float]]] = (),
+    n_args: int = 1,
+    strict: bool = True,
+    optimize: bool = False,
+    bind_locals: bool = False,
+) -> Callable[..., float]:
+    """
+    Compiles the formula into a callable that returns NaN instead of raising
+    for arguments within `ranges` (see `guard_module`).
+    """
+    module = guard_module(parse_formula(formula, optimize=optimize), ranges)
+    return compile_module(module, n_args=n_args, strict=strict, bind_locals=bind_locals)
@@ -0,0 +1,293 @@
+import ast
+import threading
+import weakref
+from typing import Any, Iterator, Union
+
+from .ast_compiler import find_function
+from .parser import FUNCTIONS, IterativeParser, function_module
+from .scanner import Scanner
+
+# The functions that may be called, e.g. "math.sin" or "round".
+CALLABLE = frozenset(FUNCTIONS.values())
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+
+# All live nodes by their structure. Nodes are removed once they are no longer
+# referenced, i.e. the table does not keep formulas alive.
+_TABLE: "weakref.WeakValueDictionary[tuple, Node]" = weakref.WeakValueDictionary()
+_LOCK = threading.Lock()
+
+
+def _intern(cls: type, key: tuple, values: tuple) -> Any:
+    """Returns the node with the given structure, creating it if necessary."""
+    with _LOCK:
+        node = _TABLE.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in zip(cls._fields, values):
+                object.__setattr__(node, name, value)
+            _TABLE[key] = node
+    return node
+
+
+class Node:
+    """
+    An immutable node of the intermediate representation of a formula.
+
+    Nodes are hash-consed: creating a node that is structurally equal to a live
+    node returns the existing one. Hence identical subexpressions of different
+    formulas share their nodes, and equality and hashing are by identity, i.e.
+    independent of the size of the expression.
+    """
+
+    __slots__ = ("__weakref__",)
+    _fields: tuple[str, ...] = ()
+
+    @property
+    def children(self) -> tuple["Node", ...]:
+        return ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def __copy__(self) -> "Node":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "Node":
+        return self
+
+    def __reduce__(self) -> tuple:
+        # Unpickled nodes are interned again.
+        return type(self), tuple(getattr(self, name) for name in self._fields)
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            getattr(value, "__name__", None) or repr(value)
+            for value in (getattr(self, name) for name in self._fields)
+        )
+        return f"{type(self).__name__}({values})"
+
+    def _lower(self, *children: ast.expr) -> ast.expr:
+        raise NotImplementedError
+
+
+class Constant(Node):
+    __slots__ = ("value",)
+    _fields = ("value",)
+    value: Union[int, float]
+
+    def __new__(cls, value: Union[int, float]) -> "Constant":
+        # `repr` distinguishes `1` from `1.0` and `0.0` from `-0.0`, and maps
+        # all NaNs to the same node.
+        return _intern(cls, (cls, type(value), repr(value)), (value,))
+
+    def _lower(self) -> ast.expr:
+        return ast.Constant(value=self.value)
+
+
+class Variable(Node):
+    __slots__ = ("index",)
+    _fields = ("index",)
+    index: int
+
+    def __new__(cls, index: int) -> "Variable":
+        return _intern(cls, (cls, index), (index,))
+
+    def _lower(self) -> ast.expr:
+        return ast.Name(id=f"x{self.index}", ctx=ast.Load())
+
+
+class MathConstant(Node):
+    """A constant of the `math` module, e.g. `pi`."""
+
+    __slots__ = ("name",)
+    _fields = ("name",)
+    name: str
+
+    def __new__(cls, name: str) -> "MathConstant":
+        return _intern(cls, (cls, name), (name,))
+
+    def _lower(self) -> ast.expr:
+        return ast.Attribute(value=ast.Name(id="math", ctx=ast.Load()), attr=self.name,
+                             ctx=ast.Load())
+
+
+class Unary(Node):
+    __slots__ = ("op", "operand")
+    _fields = ("op", "operand")
+    op: type
+    operand: Node
+
+    def __new__(cls, op: type, operand: Node) -> "Unary":
+        if op not in UNARY_OPERATORS:
+            raise ValueError(f"Unsupported operator {op.__name__}")
+        return _intern(cls, (cls, op, operand), (op, operand))
+
+    @property
+    def children(self) -> tuple[Node, ...]:
+        return (self.operand,)
+
+    def _lower(self, operand: ast.expr) -> ast.expr:
+        return ast.UnaryOp(op=self.op(), operand=operand)
+
+
+class Binary(Node):
+    __slots__ = ("op", "left", "right")
+    _fields = ("op", "left", "right")
+    op: type
+    left: Node
+    right: Node
+
+    def __new__(cls, op: type, left: Node, right: Node) -> "Binary":
+        if op not in BINARY_OPERATORS:
+            raise ValueError(f"Unsupported operator {op.__name__}")
+        return _intern(cls, (cls, op, left, right), (op, left, right))
+
+    @property
+    def children(self) -> tuple[Node, ...]:
+        return self.left, self.right
+
+    def _lower(self, left: ast.expr, right: ast.expr) -> ast.expr:
+        return ast.BinOp(left=left, op=self.op(), right=right)
+
+
+class Call(Node):
+    """The call of a function, given by its name as in `parser.FUNCTIONS`."""
+
+    __slots__ = ("function", "arg")
+    _fields = ("function", "arg")
+    function: str
+    arg: Node
+
+    def __new__(cls, function: str, arg: Node) -> "Call":
+        if function not in CALLABLE:
+            raise ValueError(f"Unsupported function `{function}`")
+        return _intern(cls, (cls, function, arg), (function, arg))
+
+    @property
+    def children(self) -> tuple[Node, ...]:
+        return (self.arg,)
+
+    def _lower(self, arg: ast.expr) -> ast.expr:
+        module, _, name = self.function.rpartition(".")
+        func: ast.expr = ast.Name(id=name, ctx=ast.Load())
+        if module:
+            func = ast.Attribute(value=ast.Name(id=module, ctx=ast.Load()), attr=name,
+                                 ctx=ast.Load())
+        return ast.Call(func=func, args=[arg], keywords=[])
+
+
+def interned_nodes() -> int:
+    """Returns the number of live nodes."""
+    return len(_TABLE)
+
+
+def _function_name(func: ast.expr) -> str:
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+        return f"{func.value.id}.{func.attr}"
+    raise ValueError(f"Unsupported function `{ast.dump(func)}`")
+
+
+def _ast_children(node: ast.expr) -> list[ast.expr]:
+    if isinstance(node, ast.UnaryOp):
+        return [node.operand]
+    if isinstance(node, ast.BinOp):
+        return [node.left, node.right]
+    if isinstance(node, ast.Call):
+        return list(node.args)
+    return []
+
+
+def from_ast(node: ast.expr) -> Node:
+    """
+    Converts an expression created by the parser (or the optimizer) into the
+    intermediate representation. Raises `ValueError` for other expressions.
+    """
+    # Post-order traversal with an explicit stack, such that deeply nested
+    # expressions do not raise a `RecursionError`.
+    results: dict[int, Node] = {}
+    stack = [node]
+    while stack:
+        current = stack[-1]
+        pending = [child for child in _ast_children(current) if id(child) not in results]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+
+        if isinstance(current, ast.Constant) and type(current.value) in (int, float):
+            result: Node = Constant(current.value)
+        elif isinstance(current, ast.Name) and current.id[:1] == "x" and current.id[1:].isdigit():
+            result = Variable(int(current.id[1:]))
+        elif isinstance(current, ast.Attribute) and _function_name(current) in ("math.pi",
+                                                                                 "math.e",
+                                                                                 "math.tau"):
+            result = MathConstant(current.attr)
+        elif isinstance(current, ast.UnaryOp):
+            result = Unary(type(current.op), results[id(current.operand)])
+        elif isinstance(current, ast.BinOp):
+            result = Binary(type(current.op), results[id(current.left)], results[id(current.right)])
+        elif isinstance(current, ast.Call) and len(current.args) == 1 and not current.keywords:
+            result = Call(_function_name(current.func), results[id(current.args[0])])
+        else:
+            raise ValueError(f"Unsupported node {type(current).__name__}")
+        results[id(current)] = result
+    return results[id(node)]
+
+
+def parse(formula: str) -> Node:
+    """Parses the formula into the intermediate representation."""
+    module = IterativeParser(lexer=Scanner(text=formula)).parse()
+    return from_ast(find_function(module).body[-1].value)
+
+
+def iter_nodes(node: Node) -> Iterator[Node]:
+    """Yields each distinct node of the expression once."""
+    seen = {node}
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        for child in current.children:
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+
+
+def variables(node: Node) -> frozenset[int]:
+    """Returns the indices of the variables used by the expression."""
+    return frozenset(n.index for n in iter_nodes(node) if isinstance(n, Variable))
+
+
+def to_ast(node: Node) -> ast.expr:
+    """
+    Lowers the expression to a tree of (new) AST nodes, i.e. shared
+    subexpressions are duplicated.
+    """
+    operands: list[ast.expr] = []
+    stack: list[tuple[Node, bool]] = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        children = current.children
+        if children and not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        n = len(operands) - len(children)
+        args = operands[n:]
+        del operands[n:]
+        operands.append(current._lower(*args))
+    return operands.pop()
+
+
+def to_module(node: Node, dense: bool = False) -> ast.Module:
+    """
+    Lowers the expression to a module, which can be passed to
+    `ast_compiler.compile_module`. See `Parser.parse` for `dense`.
+    """
+    return function_module(to_ast(node), variables(node), dense=dense)
@@ -1,17 +1,23 @@
 from .tokens import Token, ConstantToken, VariableToken, TokenType, RESERVED_KEYWORDS
 
 
+def normalize(text: str) -> str:
+    """Lower case the formula and strip all whitespace."""
+    # All lower case
+    text = text.lower()
+
+    # String cleanup
+    text = text.replace(" ", "")
+    text = text.replace("\n", "")
+    text = text.replace("\r", "")
+    text = text.replace("\t", "")
+    return text
+
+
 class Lexer:
 
     def __init__(self, text: str):
-        # All lower case
-        self.text = text.lower()
-
-        # String cleanup
-        self.text = self.text.replace(" ", "")
-        self.text = self.text.replace("\n", "")
-        self.text = self.text.replace("\r", "")
-        self.text = self.text.replace("\t", "")
+        self.text = normalize(text)
 
         self.pos = 0
         self.previous_char = ""
@@ -0,0 +1,234 @@
+import ast
+import functools
+import heapq
+import math
+import threading
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from .ast_compiler import find_function
+from .compiler import compile_formula, parse_formula
+from .cse import node_cost
+
+LRU = "lru"
+LFU = "lfu"
+POLICIES = (LRU, LFU)
+
+DEFAULT_MAXSIZE = 4096
+
+# Formulas with a lower estimated cost (see `estimate_cost`) are not memoized,
+# since a lookup costs about as much as evaluating them (a hit of the LRU
+# wrapper takes about as long as three `math` function calls).
+DEFAULT_MIN_COST = 60
+
+
+class _CanonicalArguments(Exception):
+    """Raised on a cache miss if the arguments have a different canonical key."""
+
+
+class MemoInfo(NamedTuple):
+    hits: int
+    # The calls that computed and cached their result.
+    misses: int
+    # The calls that raised, which are not cached.
+    failures: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses + self.failures
+        return self.hits / calls if calls else 0.0
+
+
+def canonical_key(args: tuple) -> tuple:
+    """
+    Returns the key of the arguments, in which `-0.0` is replaced by `0.0` and
+    all NaNs by `math.nan`.
+    """
+    # `x != x` holds for NaN only.
+    return tuple(math.nan if x != x else 0.0 if x == 0 and type(x) is float else x
+                 for x in args)
+
+
+def typed_key(args: tuple) -> tuple:
+    """
+    Returns the key of the arguments that also contains their types, such that
+    e.g. `1` and `1.0` (like `functools.lru_cache(typed=True)`) do not share
+    their entry.
+    """
+    return (*args, *map(type, args))
+
+
+def _has_nan(args: tuple) -> bool:
+    return any(x != x for x in args)
+
+
+def estimate_cost(module: ast.Module) -> int:
+    """Returns the estimated cost of a call of the function of the module."""
+    return sum(node_cost(node) for node in ast.walk(find_function(module)))
+
+
+def _memoize_lru(fun: Callable[..., Any], maxsize: int) -> Callable[..., Any]:
+    redirected = failures = 0
+    # The arguments of the call that is redirected to the canonical key.
+    local = threading.local()
+
+    def compute(*args: Any) -> Any:
+        nonlocal failures
+        if any(x != x and x is not math.nan for x in args):
+            # Distinct NaN objects never compare equal, hence the result is
+            # cached for the canonical key instead.
+            raise _CanonicalArguments
+        # The function is called with the original arguments, not the
+        # canonical ones.
+        original = getattr(local, "args", None)
+        local.args = None
+        try:
+            return fun(*(original or args))
+        except BaseException:
+            failures += 1
+            raise
+
+    # `lru_cache` looks up hits in C, which is crucial for cheap formulas.
+    cached = functools.lru_cache(maxsize=maxsize, typed=True)(compute)
+
+    def memoized(*args: Any) -> Any:
+        nonlocal redirected
+        try:
+            return cached(*args)
+        except _CanonicalArguments:
+            redirected += 1
+            local.args = args
+            try:
+                return cached(*canonical_key(args))
+            finally:
+                local.args = None
+
+    def cache_info() -> MemoInfo:
+        info = cached.cache_info()
+        # `lru_cache` counts redirected and raising calls as misses.
+        misses = info.misses - redirected - failures
+        stored = misses if maxsize else 0
+        return MemoInfo(hits=info.hits, misses=misses, failures=failures,
+                        evictions=max(0, stored - info.currsize), maxsize=maxsize,
+                        currsize=info.currsize)
+
+    def cache_clear() -> None:
+        nonlocal redirected, failures
+        cached.cache_clear()
+        redirected = failures = 0
+
+    memoized.cache_info = cache_info
+    memoized.cache_clear = cache_clear
+    return memoized
+
+
+def _memoize_lfu(fun: Callable[..., Any], maxsize: int) -> Callable[..., Any]:
+    # Maps the keys to lists of the result and the number of uses.
+    entries: dict[Hashable, list] = {}
+    get = entries.get
+    hits = misses = failures = evictions = 0
+    lock = threading.Lock()
+
+    def memoized(*args: Any) -> Any:
+        nonlocal hits, misses, failures, evictions
+        entry = get(key := typed_key(args))
+        if entry is None and _has_nan(args):
+            entry = get(key := typed_key(canonical_key(args)))
+        if entry is not None:
+            hits += 1
+            entry[1] += 1
+            return entry[0]
+
+        try:
+            result = fun(*args)
+        except BaseException:
+            failures += 1
+            raise
+        with lock:
+            misses += 1
+            if key not in entries and maxsize:
+                if len(entries) >= maxsize:
+                    # Evict the less frequently used half at once and age the
+                    # remaining entries.
+                    n = max(len(entries) // 2, 1)
+                    for evicted in heapq.nsmallest(n, entries, key=lambda k: entries[k][1]):
+                        del entries[evicted]
+                    evictions += n
+                    for entry in entries.values():
+                        entry[1] //= 2
+                entries[key] = [result, 1]
+        return result
+
+    def cache_info() -> MemoInfo:
+        return MemoInfo(hits=hits, misses=misses, failures=failures, evictions=evictions,
+                        maxsize=maxsize, currsize=len(entries))
+
+    def cache_clear() -> None:
+        nonlocal hits, misses, failures, evictions
+        with lock:
+            entries.clear()
+            hits = misses = failures = evictions = 0
+
+    memoized.cache_info = cache_info
+    memoized.cache_clear = cache_clear
+    return memoized
+
+
+def memoize(
+    fun: Callable[..., Any],
+    maxsize: int = DEFAULT_MAXSIZE,
+    policy: str = LRU,
+    cost: Optional[int] = None,
+    min_cost: int = DEFAULT_MIN_COST,
+) -> Callable[..., Any]:
+    """
+    Wraps a function of numeric arguments, such that the results for the most
+    recently (`policy="lru"`) or the most frequently (`policy="lfu"`) used
+    argument tuples are cached, at most `maxsize` of them. The wrapper has the
+    methods `cache_info()`, which returns the `MemoInfo`, and `cache_clear()`.
+
+    Arguments of different types have separate entries, e.g. `1` and `1.0`.
+    `-0.0` and `0.0` share their entry, and so do all NaNs, i.e. the cached
+    result is the one of the first call, which may differ from the result for
+    the other arguments in the sign of zero. Calls that raise are not cached.
+    With the LFU policy, the less frequently used half of the entries is
+    evicted at once when the cache is full, and the counts of the remaining
+    ones are halved, such that arguments that are no longer used age out.
+
+    If the estimated `cost` of the function (see `estimate_cost`) is below
+    `min_cost`, the function itself is returned, since looking up its results
+    would not be faster than evaluating it.
+    """
+    if maxsize < 0:
+        raise ValueError("The maximum cache size must not be negative.")
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy `{policy}`. Expected one of {POLICIES}.")
+    if cost is not None and cost < min_cost:
+        return fun
+    if policy == LRU:
+        return _memoize_lru(fun, maxsize)
+    return _memoize_lfu(fun, maxsize)
+
+
+def compile_memoized(
+    formula: str,
+    n_args: int = 1,
+    maxsize: int = DEFAULT_MAXSIZE,
+    policy: str = LRU,
+    min_cost: int = DEFAULT_MIN_COST,
+    **options: Any,
+) -> Callable[..., Any]:
+    """
+    Compiles the formula (see `compile_formula` for the `options`) and memoizes
+    the callable, unless the formula is too cheap to benefit from it.
+    """
+    if options.get("backend", "math") != "math" or options.get("packed_args", False):
+        raise ValueError("Only functions of scalar arguments can be memoized.")
+
+    fun = compile_formula(formula, n_args=n_args, **options)
+    module = parse_formula(formula, optimize=options.get("optimize", False),
+                           fast_math=options.get("fast_math", False), cse=options.get("cse", False))
+    return memoize(fun, maxsize=maxsize, policy=policy, cost=estimate_cost(module),
+                   min_cost=min_cost)
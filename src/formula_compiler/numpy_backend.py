@@ -0,0 +1,105 @@
+import ast
+
+# Maps the attributes of the `math` module emitted by the parser to their
+# vectorized NumPy counterparts.
+NUMPY_FUNCTIONS = {
+    "pi": "pi",
+    "sqrt": "sqrt",
+    "log": "log",
+    "log10": "log10",
+    "exp": "exp",
+    "sin": "sin",
+    "cos": "cos",
+    "tan": "tan",
+    "asin": "arcsin",
+    "acos": "arccos",
+    "atan": "arctan",
+    "sinh": "sinh",
+    "cosh": "cosh",
+    "tanh": "tanh",
+    "asinh": "arcsinh",
+    "acosh": "arccosh",
+    "atanh": "arctanh",
+}
+
+
+class NumpyTransformer(ast.NodeTransformer):
+    """
+    Rewrites a module created by the parser, such that the compiled function
+    operates on whole NumPy arrays instead of scalar values.
+    """
+
+    def visit_Import(self, node: ast.Import) -> ast.Import:
+        names = [ast.alias(name="numpy") if alias.name == "math" else alias for alias in node.names]
+        return ast.Import(names=names)
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.Attribute:
+        if isinstance(node.value, ast.Name) and node.value.id == "math":
+            if node.attr not in NUMPY_FUNCTIONS:
+                raise ValueError(f"No NumPy equivalent for `math.{node.attr}`")
+            return ast.Attribute(
+                value=ast.Name(id="numpy", ctx=ast.Load()),
+                attr=NUMPY_FUNCTIONS[node.attr],
+                ctx=node.ctx,
+            )
+        return self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> ast.Call:
+        self.generic_visit(node)
+        # Python's `round` rounds half to even, just like `numpy.rint`.
+        if isinstance(node.func, ast.Name) and node.func.id == "round":
+            node.func = ast.Attribute(
+                value=ast.Name(id="numpy", ctx=ast.Load()),
+                attr="rint",
+                ctx=ast.Load(),
+            )
+        return node
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.FunctionDef:
+        self.generic_visit(node)
+        # Convert all inputs to float64 arrays. This accepts any array-like
+        # column and avoids integer overflow and the integer power
+        # restrictions of NumPy, which the scalar path does not have.
+        conversions = [
+            ast.Assign(
+                targets=[ast.Name(id=arg.arg, ctx=ast.Store())],
+                value=ast.Call(
+                    func=ast.Attribute(
+                        value=ast.Name(id="numpy", ctx=ast.Load()),
+                        attr="asarray",
+                        ctx=ast.Load(),
+                    ),
+                    args=[ast.Name(id=arg.arg, ctx=ast.Load())],
+                    keywords=[
+                        ast.keyword(
+                            arg="dtype",
+                            value=ast.Attribute(
+                                value=ast.Name(id="numpy", ctx=ast.Load()),
+                                attr="float64",
+                                ctx=ast.Load(),
+                            ),
+                        )
+                    ],
+                ),
+            ) for arg in node.args.args
+        ]
+        node.body = conversions + node.body
+        return node
+
+
+def to_numpy(module: ast.Module) -> ast.Module:
+    """
+    Converts a module created by the parser into a module whose function takes
+    NumPy arrays (or array-likes) as arguments and returns a NumPy array.
+
+    Note that domain errors (e.g. `SQRT(-1)`) and divisions by zero do not raise
+    an exception, but yield `nan` or `inf` respectively, as long as an operand
+    is an array. Operations on constants only (e.g. `1/0`) remain Python
+    scalar operations and still raise when the function is called.
+    """
+    try:
+        import numpy  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The `numpy` backend requires NumPy to be installed.") from e
+
+    return NumpyTransformer().visit(module)
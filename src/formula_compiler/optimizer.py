@@ -0,0 +1,219 @@
+import ast
+import math
+import operator
+from typing import Any, Callable, NamedTuple, Optional
+
+# Constants of the `math` module that can be replaced by their value.
+MATH_CONSTANTS = {"pi", "e", "tau"}
+
+# Functions without side effects that can be evaluated at compile time.
+PURE_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "sqrt": math.sqrt,
+    "log": math.log,
+    "log10": math.log10,
+    "exp": math.exp,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "asinh": math.asinh,
+    "acosh": math.acosh,
+    "atanh": math.atanh,
+}
+
+BINARY_OPERATORS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS: dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Integer powers are only folded if the result has at most this many bits, such
+# that e.g. `9^9^9` does not stall the compiler.
+MAX_FOLDED_INT_BITS = 4096
+
+
+class OptimizationResult(NamedTuple):
+    module: ast.Module
+    # The number of AST nodes removed by the optimization.
+    removed_nodes: int
+
+
+def is_constant(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and isinstance(node.value, (int, float))
+
+
+def is_int(node: ast.AST, value: int) -> bool:
+    """Checks whether the node is the integer constant `value` (not a float)."""
+    return isinstance(node, ast.Constant) and type(node.value) is int and node.value == value
+
+
+def math_function(node: ast.AST) -> Optional[str]:
+    """Returns the name of the called `math` function, if the node is such a call."""
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name) and node.func.value.id == "math"
+            and len(node.args) == 1 and not node.keywords):
+        return node.func.attr
+    return None
+
+
+def fold(fun: Callable[..., Any], *args: Any) -> Optional[ast.Constant]:
+    """
+    Evaluates `fun` at compile time. Returns `None` if this raises, such that the
+    error is still raised when the compiled function is called, or if the result
+    is not an `int` or `float` (e.g. the complex result of `(-8) ** (1 / 3)`),
+    which the interpreter and the validation do not accept as a constant.
+    """
+    try:
+        value = fun(*args)
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+    if type(value) not in (int, float):
+        return None
+    return ast.Constant(value=value)
+
+
+class Optimizer(ast.NodeTransformer):
+    """
+    Folds constant subexpressions and applies algebraic identities.
+
+    By default, only rewrites that leave the results (including the type and the
+    sign of zero) and raised exceptions unchanged are applied. With `fast_math`,
+    the following rewrites are applied in addition:
+
+    * `x + 0` -> `x` (turns `-0.0 + 0` into `-0.0` instead of `0.0`)
+    * `x ^ 2` -> `x * x` (overflows to `inf` instead of raising `OverflowError`)
+    * `EXP(a * LN(x))` -> `x ^ a` (may round differently and accepts `x <= 0`)
+    """
+
+    def __init__(self, fast_math: bool = False):
+        self.fast_math = fast_math
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        if (isinstance(node.value, ast.Name) and node.value.id == "math"
+                and node.attr in MATH_CONSTANTS):
+            return ast.Constant(value=getattr(math, node.attr))
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        operand = node.operand
+
+        if is_constant(operand):
+            if folded := fold(UNARY_OPERATORS[type(node.op)], operand.value):
+                return folded
+
+        # +x -> x
+        if isinstance(node.op, ast.UAdd):
+            return operand
+
+        # --x -> x
+        if (isinstance(node.op, ast.USub) and isinstance(operand, ast.UnaryOp)
+                and isinstance(operand.op, ast.USub)):
+            return operand.operand
+
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        left, op, right = node.left, node.op, node.right
+
+        if is_constant(left) and is_constant(right):
+            if not self._is_huge_power(node):
+                if folded := fold(BINARY_OPERATORS[type(op)], left.value, right.value):
+                    return folded
+
+        if isinstance(op, ast.Mult):
+            # x * 1 -> x, 1 * x -> x
+            if is_int(right, 1):
+                return left
+            if is_int(left, 1):
+                return right
+
+        elif isinstance(op, ast.Sub):
+            # x - 0 -> x
+            if is_int(right, 0):
+                return left
+            # x - (-y) -> x + y
+            if isinstance(right, ast.UnaryOp) and isinstance(right.op, ast.USub):
+                return ast.BinOp(left=left, op=ast.Add(), right=right.operand)
+
+        elif isinstance(op, ast.Add):
+            # x + (-y) -> x - y
+            if isinstance(right, ast.UnaryOp) and isinstance(right.op, ast.USub):
+                return ast.BinOp(left=left, op=ast.Sub(), right=right.operand)
+            if self.fast_math:
+                # x + 0 -> x, 0 + x -> x
+                if is_int(right, 0):
+                    return left
+                if is_int(left, 0):
+                    return right
+
+        elif isinstance(op, ast.Pow):
+            # x ^ 1 -> x
+            if is_int(right, 1):
+                return left
+            # x ^ 2 -> x * x (only for leafs, such that nothing is evaluated twice)
+            if (self.fast_math and is_int(right, 2)
+                    and isinstance(left, (ast.Name, ast.Constant))):
+                return ast.BinOp(left=left, op=ast.Mult(), right=left)
+
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+
+        name = math_function(node)
+        if name in PURE_FUNCTIONS and is_constant(node.args[0]):
+            if folded := fold(PURE_FUNCTIONS[name], node.args[0].value):
+                return folded
+
+        if (isinstance(node.func, ast.Name) and node.func.id == "round" and len(node.args) == 1
+                and is_constant(node.args[0])):
+            if folded := fold(round, node.args[0].value):
+                return folded
+
+        # EXP(a * LN(x)) -> x ^ a
+        if self.fast_math and name == "exp":
+            arg = node.args[0]
+            if isinstance(arg, ast.BinOp) and isinstance(arg.op, ast.Mult):
+                if math_function(arg.right) == "log":
+                    return ast.BinOp(left=arg.right.args[0], op=ast.Pow(), right=arg.left)
+                if math_function(arg.left) == "log":
+                    return ast.BinOp(left=arg.left.args[0], op=ast.Pow(), right=arg.right)
+
+        return node
+
+    @staticmethod
+    def _is_huge_power(node: ast.BinOp) -> bool:
+        if not isinstance(node.op, ast.Pow):
+            return False
+        base, exponent = node.left.value, node.right.value
+        if not (isinstance(base, int) and isinstance(exponent, int)) or exponent <= 0:
+            return False
+        return abs(base).bit_length() * exponent > MAX_FOLDED_INT_BITS
+
+
+def count_nodes(node: ast.AST) -> int:
+    return sum(1 for _ in ast.walk(node))
+
+
+def optimize(module: ast.Module, fast_math: bool = False) -> OptimizationResult:
+    """
+    Optimizes the module created by the parser in place. See `Optimizer` for the
+    applied rewrites.
+    """
+    n_nodes = count_nodes(module)
+    module = Optimizer(fast_math=fast_math).visit(module)
+    return OptimizationResult(module=module, removed_nodes=n_nodes - count_nodes(module))
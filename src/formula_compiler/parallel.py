@@ -0,0 +1,137 @@
+import mmap
+import os
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, starmap
+from typing import Any, Callable, Iterable, Optional, Union
+
+from .compiler import compile_formula
+
+INPUTS_FILE = "inputs.bin"
+OUTPUTS_FILE = "outputs.bin"
+
+Inputs = Union[Iterable[Any], memoryview, array]
+
+# The state of a worker process, set up once by `_init_worker`.
+_worker: dict[str, Any] = {}
+
+
+def pack_inputs(inputs: Inputs, n_args: int) -> array:
+    """
+    Packs the inputs into a flat array of float64 values in row-major order.
+    `inputs` is either an iterable of rows (of `n_args` values each, or plain
+    numbers if `n_args` is 1), or a buffer of doubles in row-major order.
+    Formulas without arguments are not supported, since the number of rows
+    cannot be derived from the values.
+    """
+    if n_args < 1:
+        raise ValueError(f"Expected at least one argument per row, got {n_args}")
+    try:
+        view = memoryview(inputs)
+    except TypeError:
+        view = None
+
+    if view is not None:
+        if view.format != "d":
+            raise TypeError(f"Expected a buffer of doubles, got format '{view.format}'")
+        values = array("d")
+        values.frombytes(view.cast("B"))
+    else:
+        rows = list(inputs)
+        try:
+            values = array("d", chain.from_iterable(rows))
+        except TypeError:
+            if n_args != 1:
+                raise
+            values = array("d", rows)
+        else:
+            if len(values) != len(rows) * n_args:
+                raise ValueError(f"Expected rows of {n_args} values")
+
+    if len(values) % n_args:
+        raise ValueError(f"The number of input values is not a multiple of {n_args}")
+    return values
+
+
+def evaluate(fun: Callable[..., float], values: Union[array, memoryview], n_args: int) -> array:
+    """Evaluates the function for each row of the flat row-major `values`."""
+    if n_args == 1:
+        return array("d", map(fun, values))
+    columns = [iter(values)] * n_args
+    return array("d", starmap(fun, zip(*columns)))
+
+
+def evaluate_parallel(
+    formula: str,
+    inputs: Inputs,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    n_args: int = 1,
+    strict: bool = True,
+    **options: Any,
+) -> array:
+    """
+    Evaluates the formula for each row of `inputs` (see `pack_inputs`) on a
+    pool of `workers` processes (by default one per CPU) and returns the
+    results as an array of doubles in input order.
+
+    Compiled functions cannot be pickled, hence each worker compiles the
+    formula itself once (through its own `FORMULA_CACHE`). Inputs and outputs
+    are exchanged through memory-mapped files, such that only the bounds of
+    each chunk of `chunksize` rows are sent to the workers. The remaining
+    `options` are passed on to `compile_formula`.
+    """
+    # Fail early (and in this process) for invalid formulas.
+    fun = compile_formula(formula, n_args=n_args, strict=strict, **options)
+    values = pack_inputs(inputs, n_args)
+    n_rows = len(values) // n_args
+
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        # A few chunks per worker balance the load.
+        chunksize = -(-n_rows // (workers * 4))
+    chunksize = max(chunksize, 1)
+    if workers == 1 or n_rows <= chunksize:
+        return evaluate(fun, values, n_args)
+
+    with tempfile.TemporaryDirectory(prefix="formula-compiler-") as directory:
+        with open(os.path.join(directory, INPUTS_FILE), "wb") as f:
+            values.tofile(f)
+        with open(os.path.join(directory, OUTPUTS_FILE), "wb") as f:
+            f.truncate(n_rows * values.itemsize)
+        del values
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(formula, n_args, strict, options, directory),
+        ) as executor:
+            futures = [
+                executor.submit(_evaluate_chunk, start, min(start + chunksize, n_rows))
+                for start in range(0, n_rows, chunksize)
+            ]
+            for future in futures:
+                # Re-raises the exceptions of the workers.
+                future.result()
+
+        results = array("d")
+        with open(os.path.join(directory, OUTPUTS_FILE), "rb") as f:
+            results.fromfile(f, n_rows)
+    return results
+
+
+def _init_worker(formula: str, n_args: int, strict: bool, options: dict[str, Any],
+                 directory: str) -> None:
+    _worker["fun"] = compile_formula(formula, n_args=n_args, strict=strict, **options)
+    _worker["n_args"] = n_args
+    with open(os.path.join(directory, INPUTS_FILE), "rb") as f:
+        _worker["inputs"] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast("d")
+    with open(os.path.join(directory, OUTPUTS_FILE), "r+b") as f:
+        _worker["outputs"] = memoryview(mmap.mmap(f.fileno(), 0)).cast("d")
+
+
+def _evaluate_chunk(start: int, stop: int) -> None:
+    n_args = _worker["n_args"]
+    results = evaluate(_worker["fun"], _worker["inputs"][start * n_args:stop * n_args], n_args)
+    _worker["outputs"][start:stop] = results
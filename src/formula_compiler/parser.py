@@ -1,5 +1,5 @@
 import ast
-from typing import Union
+from typing import Iterable, Union
 
 from .lexer import Lexer, TokenType, ConstantToken, VariableToken
 
@@ -7,6 +7,48 @@ Node = Union[ast.Constant, ast.BinOp, ast.UnaryOp, ast.Name, ast.Call, ast.Attri
 
 FUNCTION_NAME = "fun"
 
+# Maps the function tokens to the called functions. Functions of the `math`
+# module are prefixed with `math.`, all others are builtins.
+FUNCTIONS = {
+    # Square Root
+    TokenType.Sqrt: "math.sqrt",
+    # Logarithms and Exponential
+    TokenType.Log: "math.log",
+    TokenType.Log10: "math.log10",
+    TokenType.Exp: "math.exp",
+    # Trigonometric Functions
+    TokenType.Sin: "math.sin",
+    TokenType.Cos: "math.cos",
+    TokenType.Tan: "math.tan",
+    TokenType.ASin: "math.asin",
+    TokenType.ACos: "math.acos",
+    TokenType.ATan: "math.atan",
+    # Hyperbolic Functions
+    TokenType.Sinh: "math.sinh",
+    TokenType.Cosh: "math.cosh",
+    TokenType.Tanh: "math.tanh",
+    TokenType.ASinh: "math.asinh",
+    TokenType.ACosh: "math.acosh",
+    TokenType.ATanh: "math.atanh",
+    # Rounding
+    TokenType.Round: "round",
+}
+
+
+def function_call(token_type: TokenType, arg: Node) -> ast.Call:
+    """Creates the call of the function corresponding to the token type."""
+    module, _, name = FUNCTIONS[token_type].rpartition(".")
+    if module:
+        func = ast.Attribute(
+            value=ast.Name(id=module, ctx=ast.Load()),
+            attr=name,
+            ctx=ast.Load(),
+        )
+    else:
+        func = ast.Name(id=name, ctx=ast.Load())
+
+    return ast.Call(func=func, args=[arg], keywords=[])
+
 
 class Parser:
 
@@ -55,210 +97,10 @@ class Parser:
                 ctx=ast.Load(),
             )
 
-        # Square Root
-        elif token.type == TokenType.Sqrt:
-            self.eat(TokenType.Sqrt)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='sqrt',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        # Logarithms and Exponential
-        elif token.type == TokenType.Log:
-            self.eat(TokenType.Log)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='log',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.Log10:
-            self.eat(TokenType.Log10)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='log10',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.Exp:
-            self.eat(TokenType.Exp)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='exp',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        # Trigonometric Functions
-        elif token.type == TokenType.Sin:
-            self.eat(TokenType.Sin)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='sin',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.Cos:
-            self.eat(TokenType.Cos)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='cos',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.Tan:
-            self.eat(TokenType.Tan)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='tan',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.ASin:
-            self.eat(TokenType.ASin)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='asin',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.ACos:
-            self.eat(TokenType.ACos)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='acos',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.ATan:
-            self.eat(TokenType.ATan)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='atan',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        # Hyperbolic Functions
-        elif token.type == TokenType.Sinh:
-            self.eat(TokenType.Sinh)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='sinh',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.Cosh:
-            self.eat(TokenType.Cosh)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='cosh',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.Tanh:
-            self.eat(TokenType.Tanh)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='tanh',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.ASinh:
-            self.eat(TokenType.ASinh)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='asinh',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.ACosh:
-            self.eat(TokenType.ACosh)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='acosh',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        elif token.type == TokenType.ATanh:
-            self.eat(TokenType.ATanh)
-            return ast.Call(
-                func=ast.Attribute(
-                    value=ast.Name(id='math', ctx=ast.Load()),
-                    attr='atanh',
-                    ctx=ast.Load(),
-                ),
-                args=[self.factor()],
-                keywords=[],
-            )
-
-        # Rounding
-        elif token.type == TokenType.Round:
-            self.eat(TokenType.Round)
-            return ast.Call(
-                func=ast.Name(id='round', ctx=ast.Load()),
-                args=[self.factor()],
-                keywords=[],
-            )
+        # Mathematical Functions and Rounding
+        elif token.type in FUNCTIONS:
+            self.eat(token.type)
+            return function_call(token.type, self.factor())
 
         elif isinstance(token, ConstantToken):
             if token.type == TokenType.Integer:
@@ -331,38 +173,181 @@ class Parser:
             node = ast.BinOp(left=node, op=op, right=self.term())
         return node
 
-    def parse(self) -> ast.Module:
+    def parse(self, dense: bool = False) -> ast.Module:
         """
         Parses the formula and creates required boilerplate code for converting
         an AST into a module that can later be compiled.
+
+        The arguments of the function are the used variables in index order. If
+        `dense` is True, the function takes all arguments `x0` up to the highest
+        used index instead, such that `Xi` is always the argument at position i.
         """
         result = self.expr()
         if self.current_token.type != TokenType.EOF:
             raise SyntaxError("Incomplete formula provided. Did you check if all "
                               "parentheses are matched?")
 
-        args = [
-            ast.arg(arg=f"x{i}", annotation=ast.Name(id="float", ctx=ast.Load()))
-            for i in self.variables
-        ]
-        return ast.Module(
-            body=[
-                ast.Import(names=[ast.alias(name="math")]),
-                ast.FunctionDef(
-                    name="fun",
-                    args=ast.arguments(
-                        posonlyargs=[],
-                        args=args,
-                        kwonlyargs=[],
-                        kw_defaults=[],
-                        defaults=[],
-                    ),
-                    body=[
-                        ast.Return(value=result),
-                    ],
-                    decorator_list=[],
-                    returns=ast.Name(id="float", ctx=ast.Load()),
-                )
-            ],
-            type_ignores=[],
-        )
+        return function_module(result, self.variables, dense=dense)
+
+
+def function_module(expression: Node, variables: Iterable[int], dense: bool = False) -> ast.Module:
+    """
+    Creates the module defining the function that returns the expression. See
+    `Parser.parse` for the arguments of the function.
+    """
+    variables = set(variables)
+    if dense and variables:
+        indices: Iterable[int] = range(max(variables) + 1)
+    else:
+        indices = sorted(variables)
+    args = [
+        ast.arg(arg=f"x{i}", annotation=ast.Name(id="float", ctx=ast.Load()))
+        for i in indices
+    ]
+    return ast.Module(
+        body=[
+            ast.Import(names=[ast.alias(name="math")]),
+            ast.FunctionDef(
+                name="fun",
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=args,
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=[
+                    ast.Return(value=expression),
+                ],
+                decorator_list=[],
+                returns=ast.Name(id="float", ctx=ast.Load()),
+            )
+        ],
+        type_ignores=[],
+    )
+
+
+# Precedence of the binary operators. All of them are left associative.
+BINARY_OPERATORS = {
+    TokenType.Add: (1, ast.Add),
+    TokenType.Sub: (1, ast.Sub),
+    TokenType.Mul: (2, ast.Mult),
+    TokenType.Div: (2, ast.Div),
+    TokenType.Pow: (3, ast.Pow),
+}
+
+UNARY_OPERATORS = {
+    TokenType.Add: ast.UAdd,
+    TokenType.Sub: ast.USub,
+}
+
+# Kinds of the entries of the operator stack of the `IterativeParser`
+_PREFIX = 0
+_BINARY = 1
+_PAREN = 2
+
+
+class IterativeParser(Parser):
+    """
+    A parser for the same grammar as `Parser`, which produces the same AST, but
+    uses explicit stacks (shunting-yard) instead of recursion. Hence it parses
+    arbitrarily deeply nested formulas in linear time without raising a
+    `RecursionError`.
+
+    Prefix operators (unary signs and functions) bind tighter than any binary
+    operator, i.e. they only apply to the directly following factor, just like
+    in `Parser.factor`.
+    """
+
+    def expr(self) -> Node:
+        operands: list[Node] = []
+        # Entries are (_PREFIX, token type), (_BINARY, (precedence, operator))
+        # and (_PAREN, None).
+        operators: list[tuple[int, object]] = []
+
+        def push_operand(node: Node) -> None:
+            while operators and operators[-1][0] == _PREFIX:
+                token_type = operators.pop()[1]
+                if token_type in UNARY_OPERATORS:
+                    node = ast.UnaryOp(op=UNARY_OPERATORS[token_type](), operand=node)
+                else:
+                    node = function_call(token_type, node)
+            operands.append(node)
+
+        def reduce_binary(min_precedence: int) -> None:
+            while (operators and operators[-1][0] == _BINARY
+                   and operators[-1][1][0] >= min_precedence):
+                _, op = operators.pop()[1]
+                right = operands.pop()
+                operands.append(ast.BinOp(left=operands.pop(), op=op(), right=right))
+
+        depth = 0
+        expect_operand = True
+        while True:
+            token = self.current_token
+
+            if expect_operand:
+                if token.type in UNARY_OPERATORS or token.type in FUNCTIONS:
+                    self.eat(token.type)
+                    operators.append((_PREFIX, token.type))
+                    continue
+
+                if token.type == TokenType.LParen:
+                    self.eat(TokenType.LParen)
+                    operators.append((_PAREN, None))
+                    depth += 1
+                    continue
+
+                if token.type == TokenType.Pi:
+                    self.eat(TokenType.Pi)
+                    self.eat(TokenType.LParen)
+                    self.eat(TokenType.RParen)
+                    push_operand(
+                        ast.Attribute(
+                            value=ast.Name(id='math', ctx=ast.Load()),
+                            attr='pi',
+                            ctx=ast.Load(),
+                        ))
+
+                elif isinstance(token, ConstantToken):
+                    self.eat(token.type)
+                    push_operand(ast.Constant(value=token.value))
+
+                elif isinstance(token, VariableToken):
+                    self.eat(TokenType.X)
+                    self.variables.add(token.index)
+                    push_operand(ast.Name(id=f"x{token.index}", ctx=ast.Load()))
+
+                elif token.type == TokenType.EOF:
+                    raise SyntaxError("Did you forget to close parentheses?")
+
+                else:
+                    raise NotImplementedError(f"{token.type}")
+
+                expect_operand = False
+
+            elif token.type in BINARY_OPERATORS:
+                precedence, op = BINARY_OPERATORS[token.type]
+                reduce_binary(precedence)
+                self.eat(token.type)
+                operators.append((_BINARY, (precedence, op)))
+                expect_operand = True
+
+            elif token.type == TokenType.RParen and depth > 0:
+                reduce_binary(0)
+                self.eat(TokenType.RParen)
+                operators.pop()
+                depth -= 1
+                # The parenthesized expression is the operand of the pending
+                # prefix operators.
+                push_operand(operands.pop())
+
+            else:
+                break
+
+        reduce_binary(0)
+        if depth > 0:
+            # Same error as `Parser.factor` raises for unclosed parentheses.
+            self.eat(TokenType.RParen)
+
+        return operands.pop()
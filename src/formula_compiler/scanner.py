@@ -0,0 +1,99 @@
+import re
+from typing import Iterator
+
+from .lexer import normalize
+from .tokens import Token, ConstantToken, VariableToken, TokenType, RESERVED_KEYWORDS
+
+# Operator tokens do not carry a value, hence a single instance is reused.
+OPERATOR_TOKENS = {
+    "+": Token(type=TokenType.Add),
+    "-": Token(type=TokenType.Sub),
+    "*": Token(type=TokenType.Mul),
+    "/": Token(type=TokenType.Div),
+    "^": Token(type=TokenType.Pow),
+    "(": Token(type=TokenType.LParen),
+    ")": Token(type=TokenType.RParen),
+}
+
+EOF_TOKEN = Token(type=TokenType.EOF)
+
+# Accepts the same language as `Lexer`: `x` followed by an optional index, then
+# identifiers (a letter followed by letters and digits), then numbers with
+# optional decimal places (`.` or `,`) and an optional exponent.
+TOKEN_PATTERN = re.compile(
+    r"""
+    x(?P<index>\d+)?
+    | (?P<keyword>[^\W\d_][^\W_]*)
+    | (?P<number>\d+(?:[.,]\d*)?(?:e[+-]?\d*)?)
+    | (?P<operator>[-+*/^()])
+    | (?P<error>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Variable tokens are interned by index.
+_variables: dict[int, VariableToken] = {}
+
+
+def variable_token(index: int) -> VariableToken:
+    if (token := _variables.get(index)) is None:
+        token = _variables[index] = VariableToken(index=index)
+    return token
+
+
+def scan(text: str, pos: int = 0) -> Iterator[tuple[int, Token]]:
+    """
+    Yields the tokens of an already normalized (see `lexer.normalize`) formula,
+    starting at offset `pos`, together with their offset in the text. The final
+    `EOF` token is not yielded.
+    """
+    for m in TOKEN_PATTERN.finditer(text, pos):
+        kind = m.lastgroup
+        if kind == "operator":
+            token = OPERATOR_TOKENS[m.group(kind)]
+        elif kind == "index":
+            token = variable_token(int(m.group(kind)))
+        elif kind == "number":
+            result = m.group(kind).replace(",", ".")
+            if "." in result or "e" in result:
+                token = ConstantToken(type=TokenType.Float, value=float(result))
+            else:
+                token = ConstantToken(type=TokenType.Integer, value=int(result))
+        elif kind == "keyword":
+            result = m.group(kind)
+            if (token := RESERVED_KEYWORDS.get(result, None)) is None:
+                raise ValueError(f"Unknown keyword {result}")
+        elif kind is None:
+            # `x` without index
+            token = variable_token(0)
+        else:
+            raise ValueError(f"Unhandled character '{m.group(kind)}'")
+
+        yield m.start(), token
+
+
+def tokenize(text: str) -> Iterator[tuple[int, Token]]:
+    """
+    Yields the tokens of a formula together with their offset in the normalized
+    formula (see `lexer.normalize`).
+    """
+    return scan(normalize(text))
+
+
+class Scanner:
+    """
+    A drop-in replacement for `Lexer` based on a regular expression, which
+    can be passed to the parsers.
+    """
+
+    def __init__(self, text: str):
+        self.text = normalize(text)
+        self.offset = 0
+        self._tokens = scan(self.text)
+
+    def get_next_token(self) -> Token:
+        for self.offset, token in self._tokens:
+            return token
+
+        self.offset = len(self.text)
+        return EOF_TOKEN
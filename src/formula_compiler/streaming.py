@@ -0,0 +1,162 @@
+import csv
+import mmap
+import os
+import sys
+from array import array
+from contextlib import ExitStack
+from itertools import islice, starmap
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, Sequence, Union
+
+# The number of rows evaluated (and yielded) at once.
+DEFAULT_CHUNKSIZE = 65536
+
+# Binary column files contain little-endian float64 values.
+LITTLE_ENDIAN = sys.byteorder == "little"
+
+Column = Union[str, int]
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def evaluate_rows(
+    fun: Callable[..., float],
+    rows: Iterable[Sequence[Any]],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[array]:
+    """
+    Evaluates the function for each row of arguments and lazily yields the
+    results in arrays of doubles of (at most) `chunksize` rows. Only one chunk
+    of rows is consumed from `rows` at a time.
+    """
+    rows = iter(rows)
+    while chunk := array("d", starmap(fun, islice(rows, chunksize))):
+        yield chunk
+
+
+def read_csv(
+    path: PathLike,
+    columns: Sequence[Column],
+    delimiter: str = ",",
+    header: bool = True,
+) -> Iterator[tuple[float, ...]]:
+    """
+    Lazily reads the rows of a CSV file as tuples of floats. `columns[i]` is the
+    name (if the file has a header) or the index of the column passed as
+    argument `Xi`.
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        names = next(reader, []) if header else []
+        indices = []
+        for column in columns:
+            if isinstance(column, int):
+                indices.append(column)
+            elif column in names:
+                indices.append(names.index(column))
+            else:
+                raise ValueError(f"Unknown column `{column}`")
+
+        for row in reader:
+            if row:
+                yield tuple(float(row[i]) for i in indices)
+
+
+def evaluate_csv(
+    fun: Callable[..., float],
+    path: PathLike,
+    columns: Sequence[Column],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    delimiter: str = ",",
+    header: bool = True,
+) -> Iterator[array]:
+    """Evaluates the function for the rows of a CSV file, see `read_csv`."""
+    return evaluate_rows(fun, read_csv(path, columns, delimiter=delimiter, header=header),
+                         chunksize=chunksize)
+
+
+def evaluate_columns(
+    fun: Callable[..., float],
+    paths: Sequence[PathLike],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[array]:
+    """
+    Evaluates the function for the values of binary column files, where
+    `paths[i]` contains the values of argument `Xi` as little-endian float64.
+
+    The files are memory-mapped, such that the values are read by the function
+    without being copied (except on big-endian machines, where each chunk is
+    byte-swapped).
+    """
+    with ExitStack() as stack:
+        columns = []
+        for path in paths:
+            f = stack.enter_context(open(path, "rb"))
+            size = os.fstat(f.fileno()).st_size
+            if size % 8:
+                raise ValueError(f"The size of `{path}` is not a multiple of 8 bytes")
+            if size == 0:
+                columns.append(memoryview(b"").cast("d"))
+                continue
+            view = memoryview(stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)))
+            # Release the view before the map is closed.
+            stack.callback(view.release)
+            columns.append(view.cast("d"))
+            stack.callback(columns[-1].release)
+
+        n_rows = len(columns[0]) if columns else 0
+        if any(len(column) != n_rows for column in columns):
+            raise ValueError("The column files have different lengths")
+
+        for start in range(0, n_rows, chunksize):
+            chunk = [column[start:start + chunksize] for column in columns]
+            if not LITTLE_ENDIAN:
+                chunk = [_byteswapped(column) for column in chunk]
+            try:
+                yield array("d", map(fun, *chunk))
+            finally:
+                for column in chunk:
+                    if isinstance(column, memoryview):
+                        column.release()
+
+
+def _byteswapped(column: memoryview) -> array:
+    values = array("d", column)
+    values.byteswap()
+    return values
+
+
+def write_column(chunks: Iterable[array], file: Union[PathLike, BinaryIO]) -> int:
+    """
+    Incrementally writes the chunks of results to a binary column file (as
+    little-endian float64) and returns the number of written values.
+    """
+    with ExitStack() as stack:
+        if isinstance(file, (str, os.PathLike)):
+            file = stack.enter_context(open(file, "wb"))
+        n = 0
+        for chunk in chunks:
+            if not LITTLE_ENDIAN:
+                chunk = array("d", chunk)
+                chunk.byteswap()
+            chunk.tofile(file)
+            n += len(chunk)
+        return n
+
+
+def write_csv(
+    chunks: Iterable[array],
+    path: PathLike,
+    header: Optional[str] = "result",
+) -> int:
+    """
+    Incrementally writes the chunks of results to a CSV file with a single
+    column and returns the number of written values.
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        if header is not None:
+            writer.writerow((header, ))
+        n = 0
+        for chunk in chunks:
+            writer.writerows((repr(value), ) for value in chunk)
+            n += len(chunk)
+        return n
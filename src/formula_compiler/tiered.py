@@ -0,0 +1,106 @@
+import math
+import sys
+import threading
+import time
+import weakref
+from typing import Any, Callable, NamedTuple, Optional
+
+from .interpreter import Program, break_even_calls
+
+INTERPRETED = "interpreted"
+COMPILED = "compiled"
+
+
+class TierStats(NamedTuple):
+    formula: str
+    # The current tier, `INTERPRETED` or `COMPILED`.
+    tier: str
+    # The total number of calls.
+    calls: int
+    # The number of calls after which the function is compiled.
+    threshold: int
+    # The call with which the function was promoted, `None` if not yet promoted.
+    promoted_at: Optional[int]
+    # The time spent compiling in seconds.
+    compile_seconds: float
+
+
+# All live tiered functions, see `tier_statistics`.
+_registry: "weakref.WeakSet[TieredFunction]" = weakref.WeakSet()
+
+
+class TieredFunction:
+    """
+    A callable that starts out interpreting a formula and counts its calls. Once
+    more than `threshold` calls have been made, `compile_tier` is called to
+    create the compiled function, which is used for all subsequent calls.
+
+    The call counter is not synchronized, hence concurrent calls may be
+    undercounted. Promotion itself happens at most once.
+    """
+
+    def __init__(
+        self,
+        formula: str,
+        program: Program,
+        compile_tier: Callable[[], Callable[..., Any]],
+        threshold: int,
+    ):
+        self.formula = formula
+        self.threshold = threshold
+        self.calls = 0
+        self.promoted_at: Optional[int] = None
+        self.compile_seconds = 0.0
+        self._program = program
+        self._current: Callable[..., Any] = program
+        self._compile: Optional[Callable[[], Callable[..., Any]]] = compile_tier
+        self._lock = threading.Lock()
+        _registry.add(self)
+
+    def __call__(self, *args: Any) -> Any:
+        self.calls += 1
+        if self.calls > self.threshold and self._compile is not None:
+            self.promote()
+        return self._current(*args)
+
+    @property
+    def tier(self) -> str:
+        return INTERPRETED if self._current is self._program else COMPILED
+
+    def promote(self) -> None:
+        """Compiles the function (if not done already) and uses it from now on."""
+        with self._lock:
+            if self._compile is None:
+                return
+            start = time.perf_counter()
+            try:
+                self._current = self._compile()
+                self.promoted_at = self.calls
+            except (RecursionError, MemoryError):
+                # Formulas that are too deeply nested for `compile` remain
+                # interpreted.
+                pass
+            self.compile_seconds += time.perf_counter() - start
+            # Release the reference to the module.
+            self._compile = None
+
+    def stats(self) -> TierStats:
+        return TierStats(
+            formula=self.formula,
+            tier=self.tier,
+            calls=self.calls,
+            threshold=self.threshold,
+            promoted_at=self.promoted_at,
+            compile_seconds=self.compile_seconds,
+        )
+
+
+def default_threshold(program: Program) -> int:
+    """Returns the number of calls from which compiling the program pays off."""
+    calls = break_even_calls(program)
+    return int(calls) if calls != math.inf else sys.maxsize
+
+
+def tier_statistics() -> list[TierStats]:
+    """Returns the statistics of all tiered functions that are still alive."""
+    return [fun.stats() for fun in list(_registry)]
@@ -0,0 +1,168 @@
+from array import array
+from typing import Iterable, Optional
+
+from .lexer import normalize
+from .scanner import TOKEN_PATTERN, OPERATOR_TOKENS, EOF_TOKEN, variable_token
+from .tokens import Token, ConstantToken, TokenType, RESERVED_KEYWORDS
+
+# Tokens without payload by their code.
+SINGLETON_TOKENS: dict[int, Token] = {
+    token.type.value: token
+    for token in (*OPERATOR_TOKENS.values(), *RESERVED_KEYWORDS.values(), EOF_TOKEN)
+}
+
+OPERATOR_CODES = {char: token.type.value for char, token in OPERATOR_TOKENS.items()}
+KEYWORD_CODES = {keyword: token.type.value for keyword, token in RESERVED_KEYWORDS.items()}
+
+INTEGER = TokenType.Integer.value
+FLOAT = TokenType.Float.value
+X = TokenType.X.value
+
+# Integers up to this magnitude are stored exactly in the `values` column.
+MAX_EXACT_INTEGER = 2**53
+
+
+class TokenBuffer:
+    """
+    Stores the tokens of many formulas in parallel arrays instead of one
+    `Token` object per token:
+
+    * `codes`: the token type (`TokenType.value`)
+    * `values`: the numeric payload of integer and float constants
+    * `indices`: the index of variables
+    * `offsets`: the offset of the token in its normalized formula
+
+    Formula `i` consists of the tokens `starts[i]` up to `starts[i + 1]`.
+    Integer constants beyond the exactly representable range of a float are
+    kept in `big_integers`, keyed by their token position.
+    """
+
+    def __init__(self):
+        self.codes = array("B")
+        self.values = array("d")
+        self.indices = array("q")
+        self.offsets = array("q")
+        self.starts = array("q", [0])
+        self.big_integers: dict[int, int] = {}
+
+    @classmethod
+    def from_formulas(cls, formulas: Iterable[str]) -> "TokenBuffer":
+        buffer = cls()
+        buffer.extend(formulas)
+        return buffer
+
+    def __len__(self) -> int:
+        """Returns the number of formulas."""
+        return len(self.starts) - 1
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the size of the token columns in bytes."""
+        return sum(a.itemsize * len(a) for a in (self.codes, self.values, self.indices,
+                                                  self.offsets, self.starts))
+
+    def append(self, formula: str) -> int:
+        """
+        Tokenizes the formula into the buffer and returns its index. Raises
+        `ValueError` for invalid formulas and `OverflowError` for variable
+        indices that do not fit in the index column, in which case the buffer
+        remains unchanged.
+        """
+        codes, values, indices, offsets = self.codes, self.values, self.indices, self.offsets
+        start = len(codes)
+        try:
+            for m in TOKEN_PATTERN.finditer(normalize(formula)):
+                kind = m.lastgroup
+                value = 0.0
+                index = 0
+                if kind == "operator":
+                    code = OPERATOR_CODES[m.group(kind)]
+                elif kind == "index":
+                    code = X
+                    index = int(m.group(kind))
+                elif kind == "number":
+                    result = m.group(kind).replace(",", ".")
+                    if "." in result or "e" in result:
+                        code = FLOAT
+                        value = float(result)
+                    else:
+                        code = INTEGER
+                        integer = int(result)
+                        if integer > MAX_EXACT_INTEGER:
+                            self.big_integers[len(codes)] = integer
+                        else:
+                            value = integer
+                elif kind == "keyword":
+                    result = m.group(kind)
+                    if (code := KEYWORD_CODES.get(result, None)) is None:
+                        raise ValueError(f"Unknown keyword {result}")
+                elif kind is None:
+                    code = X
+                else:
+                    raise ValueError(f"Unhandled character '{m.group(kind)}'")
+
+                codes.append(code)
+                values.append(value)
+                indices.append(index)
+                offsets.append(m.start())
+        except (ValueError, OverflowError):
+            self._truncate(start)
+            raise
+
+        self.starts.append(len(codes))
+        return len(self) - 1
+
+    def extend(self, formulas: Iterable[str]) -> None:
+        for formula in formulas:
+            self.append(formula)
+
+    def reader(self, index: int) -> "TokenBufferReader":
+        """Returns a token source for formula `index`, which a parser can consume."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Formula index {index} out of range")
+        return TokenBufferReader(buffer=self, start=self.starts[index], end=self.starts[index + 1])
+
+    def _truncate(self, n_tokens: int) -> None:
+        for column in (self.codes, self.values, self.indices, self.offsets):
+            del column[n_tokens:]
+        for position in [p for p in self.big_integers if p >= n_tokens]:
+            del self.big_integers[position]
+
+
+class TokenBufferReader:
+    """
+    Reads the tokens of one formula from a `TokenBuffer` with the same interface
+    as `Lexer`. Tokens without payload and variables are shared instances, only
+    constants are materialized.
+    """
+
+    def __init__(self, buffer: TokenBuffer, start: int, end: int):
+        self.buffer = buffer
+        self.pos = start
+        self.end = end
+        self.offset: Optional[int] = None
+
+    def get_next_token(self) -> Token:
+        pos = self.pos
+        if pos >= self.end:
+            return EOF_TOKEN
+
+        buffer = self.buffer
+        self.pos = pos + 1
+        self.offset = buffer.offsets[pos]
+
+        code = buffer.codes[pos]
+        if code == X:
+            return variable_token(buffer.indices[pos])
+        if code == FLOAT:
+            return ConstantToken(type=TokenType.Float, value=buffer.values[pos])
+        if code == INTEGER:
+            value = buffer.big_integers.get(pos)
+            if value is None:
+                value = int(buffer.values[pos])
+            return ConstantToken(type=TokenType.Integer, value=value)
+        return SINGLETON_TOKENS[code]
@@ -56,7 +56,7 @@ class TokenType(Enum):
 
 
 class Token:
-    __slots__ = ("type")
+    __slots__ = ("type", )
 
     def __init__(self, /, type: TokenType):
         self.type = type
@@ -69,7 +69,7 @@ class Token:
 
 
 class ConstantToken(Token):
-    __slots__ = ("type", "value")
+    __slots__ = ("value", )
 
     def __init__(self, type: TokenType, value: NumericType):
         super().__init__(type)
@@ -83,7 +83,7 @@ class ConstantToken(Token):
 
 
 class VariableToken(Token):
-    __slots__ = ("type", "index")
+    __slots__ = ("index", )
 
     def __init__(self, index: int):
         super().__init__(TokenType.X)
@@ -0,0 +1,127 @@
+import ast
+import builtins
+import math
+from typing import Any
+
+from .parser import FUNCTION_NAME, FUNCTIONS
+
+# The attributes of the `math` module that formulas may use.
+MATH_ATTRIBUTES = frozenset(
+    name.partition(".")[2] for name in FUNCTIONS.values() if name.startswith("math.")
+) | {"pi", "e", "tau"}
+
+# The builtins that formulas may call.
+BUILTIN_FUNCTIONS = frozenset(name for name in FUNCTIONS.values() if "." not in name)
+
+# Names that arguments and temporaries must not shadow.
+RESERVED_NAMES = frozenset({"math", "float"}) | BUILTIN_FUNCTIONS
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+
+def _is_float(node: ast.expr) -> bool:
+    return isinstance(node, ast.Name) and node.id == "float" and isinstance(node.ctx, ast.Load)
+
+
+def _is_math_attribute(node: ast.expr) -> bool:
+    return (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+            and node.value.id == "math" and node.attr in MATH_ATTRIBUTES)
+
+
+def validate_expression(node: ast.expr, names: set[str]) -> None:
+    """
+    Checks that the expression only consists of the nodes emitted by the
+    parser, the optimizer and `cse`, and only loads the given names. Raises
+    `ValueError` otherwise.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise ValueError(f"Unsupported constant {node.value!r}")
+        elif isinstance(node, ast.Name):
+            if not isinstance(node.ctx, ast.Load) or node.id not in names:
+                raise ValueError(f"Unsupported name `{node.id}`")
+        elif isinstance(node, ast.Attribute):
+            if not _is_math_attribute(node):
+                raise ValueError(f"Unsupported attribute `{ast.unparse(node)}`")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, UNARY_OPERATORS):
+                raise ValueError(f"Unsupported operator {type(node.op).__name__}")
+            stack.append(node.operand)
+        elif isinstance(node, ast.BinOp):
+            if not isinstance(node.op, BINARY_OPERATORS):
+                raise ValueError(f"Unsupported operator {type(node.op).__name__}")
+            stack.extend((node.left, node.right))
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if not (_is_math_attribute(func) or isinstance(func, ast.Name)
+                    and func.id in BUILTIN_FUNCTIONS):
+                raise ValueError(f"Unsupported function `{ast.unparse(func)}`")
+            if len(node.args) != 1 or node.keywords:
+                raise ValueError(f"Unsupported call `{ast.unparse(node)}`")
+            stack.append(node.args[0])
+        else:
+            raise ValueError(f"Unsupported node {type(node).__name__}")
+
+
+def validate_module(module: ast.Module) -> None:
+    """
+    Checks that the module has the shape of the modules created by
+    `Parser.parse`: an optional `import math` and the definition of `fun`,
+    which assigns temporaries (see `cse`) and returns an expression of
+    whitelisted nodes. Raises `ValueError` otherwise.
+    """
+    if not isinstance(module, ast.Module):
+        raise ValueError(f"Expected a module, got {type(module).__name__}")
+
+    *imports, f_def = module.body or [None]
+    for statement in imports:
+        if not (isinstance(statement, ast.Import)
+                and all(alias.name == "math" and alias.asname is None for alias in statement.names)):
+            raise ValueError("The module may only import `math`")
+
+    if not isinstance(f_def, ast.FunctionDef) or f_def.name != FUNCTION_NAME:
+        raise ValueError(f"The module must end with the definition of `{FUNCTION_NAME}`")
+    args = f_def.args
+    if (args.posonlyargs or args.vararg or args.kwonlyargs or args.kw_defaults or args.kwarg
+            or args.defaults or f_def.decorator_list):
+        raise ValueError("The function may only take positional arguments")
+    if any(arg.annotation is not None and not _is_float(arg.annotation) for arg in args.args):
+        raise ValueError("Arguments may only be annotated with `float`")
+    if f_def.returns is not None and not _is_float(f_def.returns):
+        raise ValueError("The return value may only be annotated with `float`")
+
+    *assignments, result = f_def.body or [None]
+    if not isinstance(result, ast.Return) or result.value is None:
+        raise ValueError("The function must end with a `return` statement")
+
+    # Builtins are only allowed as called functions (see `validate_expression`).
+    names: set[str] = set()
+
+    def declare(name: str) -> None:
+        if name in names or name in RESERVED_NAMES or name.startswith("__"):
+            raise ValueError(f"Invalid variable name `{name}`")
+        names.add(name)
+
+    for arg in args.args:
+        declare(arg.arg)
+    for statement in assignments:
+        if not (isinstance(statement, ast.Assign) and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name)):
+            raise ValueError("The function may only assign temporaries")
+        validate_expression(statement.value, names)
+        declare(statement.targets[0].id)
+    validate_expression(result.value, names)
+
+
+def safe_namespace() -> dict[str, Any]:
+    """
+    Returns the globals to execute validated modules in: no builtins besides
+    the used ones, and the `math` module in place of its import.
+    """
+    namespace: dict[str, Any] = {"__builtins__": {}, "math": math, "float": float}
+    namespace.update((name, getattr(builtins, name)) for name in BUILTIN_FUNCTIONS)
+    return namespace
@@ -0,0 +1,60 @@
+import math
+from array import array
+
+import pytest
+
+from formula_compiler import compile_formula
+from formula_compiler.batch import compile_batch
+
+
+@pytest.mark.parametrize("options", [{}, {"bind_locals": False}, {"cse": True}, {"optimize": True}])
+def test_matches_scalar_function(options):
+    formula = "ROUND(SIN(X0) * X1^2) + SIN(X0) * X1^2 / 3"
+    x0 = array("d", [i * 0.1 for i in range(50)])
+    x1 = array("d", [i * -0.3 for i in range(50)])
+
+    fun = compile_formula(formula, n_args=2)
+    batch = compile_batch(formula, n_args=2, **options)
+    result = batch(x0, x1)
+    assert isinstance(result, array) and result.typecode == "d"
+    assert list(result) == [float(fun(a, b)) for a, b in zip(x0, x1)]
+
+
+def test_single_column_and_memoryviews():
+    batch = compile_batch("SQRT(X)")
+    values = memoryview(array("d", [1.0, 4.0, 9.0]))
+    out = memoryview(bytearray(24)).cast("d")
+    assert batch(values, out) is out
+    assert out.tolist() == [1.0, 2.0, 3.0]
+
+    # Plain sequences work as well.
+    assert list(batch([16, 25])) == [4.0, 5.0]
+
+
+def test_preallocated_output_is_reused():
+    batch = compile_batch("2*X")
+    out = array("d", [0.0] * 3)
+    assert batch(array("d", [1, 2, 3]), out) is out
+    assert list(out) == [2.0, 4.0, 6.0]
+
+
+def test_non_strict():
+    batch = compile_batch("X0 + 1", n_args=3, strict=False)
+    assert list(batch([1, 2], [0, 0], [0, 0])) == [2.0, 3.0]
+
+
+def test_length_mismatch():
+    batch = compile_batch("X0 * X1", n_args=2)
+    with pytest.raises(ValueError):
+        batch([1, 2], [1])
+    with pytest.raises(ValueError):
+        batch([1, 2], [1, 2], array("d", [0.0]))
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        compile_batch("1 + 2", n_args=0)
+    with pytest.raises(ZeroDivisionError):
+        compile_batch("1/X")([1.0, 0.0])
+    assert list(compile_batch("EXP(X)")([])) == []
+    assert math.isclose(compile_batch("PI()*X")([1.0])[0], math.pi)
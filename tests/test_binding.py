@@ -0,0 +1,57 @@
+import ast
+import dis
+import math
+import pytest
+
+from formula_compiler.binding import bind_locals
+from formula_compiler.compiler import compile_formula, compile_formulas, parse_formula
+
+
+def test_bind_locals():
+    module = ast.fix_missing_locations(
+        bind_locals(parse_formula("SIN(X) + SIN(X)*PI() + ROUND(X)")))
+    factory = module.body[1]
+    assert [ast.unparse(b) for b in factory.body[:2]] == ["_math_sin = math.sin", "_round = round"]
+    assert ast.unparse(module.body[2]) == "fun = _bind_fun()"
+
+    f_def = factory.body[2]
+    assert [arg.arg for arg in f_def.args.args] == ["x0"]
+    assert "math.sin" not in ast.unparse(f_def.body[0])
+    assert repr(math.pi) in ast.unparse(f_def.body[0])
+
+
+def test_no_global_lookups():
+    fun = compile_formula("SQRT(X0) + EXP(X1) + ROUND(X1)", n_args=2, bind_locals=True, cache=False)
+    instructions = {i.opname for i in dis.get_instructions(fun)}
+    assert "LOAD_GLOBAL" not in instructions
+    assert "LOAD_ATTR" not in instructions
+    assert fun(4, 0) == 3.0
+
+
+@pytest.mark.parametrize("formula", [
+    "ROUND(2^1 + 2^3 + EXP(5*LN(x)))",
+    "SIN(X)*COS(X) + ATANH(X/10) - PI()",
+])
+def test_same_results(formula):
+    reference = compile_formula(formula, cache=False)
+    fun = compile_formula(formula, bind_locals=True, cache=False)
+    assert fun(1.5) == reference(1.5)
+
+
+def test_positional_arguments_unchanged():
+    fun = compile_formula("SIN(X)", n_args=2, strict=False, bind_locals=True, cache=False)
+    assert fun(1.0, 2.0) == math.sin(1.0)
+    with pytest.raises(TypeError):
+        fun(1.0, 2.0, 3.0)
+
+
+def test_numpy_backend():
+    np = pytest.importorskip("numpy")
+    fun = compile_formula("SIN(X) + ROUND(X)", backend="numpy", bind_locals=True, cache=False)
+    np.testing.assert_allclose(fun([0.4, 1.6]), [math.sin(0.4), math.sin(1.6) + 2])
+
+
+def test_compile_formulas():
+    functions, errors = compile_formulas(["SIN(X)", "COS(X)", "X"], bind_locals=True, cache=False)
+    assert not errors
+    assert [f(0) for f in functions] == [0.0, 1.0, 0]
@@ -0,0 +1,49 @@
+import pytest
+
+from formula_compiler.cache import FormulaCache, FORMULA_CACHE
+from formula_compiler.compiler import compile_formula
+
+
+def test_lru_eviction():
+    cache = FormulaCache(maxsize=2)
+    cache.put("a", abs)
+    cache.put("b", min)
+    assert cache.get("a") is abs
+    cache.put("c", max)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is abs
+    assert cache.get("c") is max
+
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (3, 1, 1, 2)
+
+
+def test_resize():
+    cache = FormulaCache(maxsize=3)
+    for key in "abc":
+        cache.put(key, abs)
+    cache.resize(1)
+    assert len(cache) == 1
+    assert cache.get("c") is abs
+    assert cache.info().evictions == 2
+
+
+def test_negative_size():
+    with pytest.raises(ValueError):
+        FormulaCache(maxsize=-1)
+
+
+def test_compile_formula_uses_normalized_text():
+    FORMULA_CACHE.clear()
+    fun = compile_formula("2 * X")
+    assert compile_formula("2*x") is fun
+    assert compile_formula("2*x", n_args=2, strict=False) is not fun
+    assert FORMULA_CACHE.info().hits == 1
+
+
+def test_compile_formula_without_cache():
+    FORMULA_CACHE.clear()
+    fun = compile_formula("3 * X", cache=False)
+    assert compile_formula("3 * X", cache=False) is not fun
+    assert len(FORMULA_CACHE) == 0
@@ -1,7 +1,80 @@
-from formula_compiler.compiler import compile_formula
+import pytest
+
+from formula_compiler.cache import FORMULA_CACHE
+from formula_compiler.compiler import compile_formula, compile_formulas
 
 
 def test_compiler():
     fun = compile_formula(formula="X", n_args=1, strict=True)
     assert fun is not None
     assert fun(42) == 42
+
+
+def test_compile_formulas():
+    functions, errors = compile_formulas(["X", "2*X", "SQRT(X)"], cache=False)
+    assert not errors
+    assert [f(4) for f in functions] == [4, 8, 2.0]
+
+
+def test_compile_formulas_errors():
+    functions, errors = compile_formulas(["X", "(X", "X0 + X1", "FOO(X)", "3*X"], cache=False)
+    assert list(errors) == [1, 2, 3]
+    assert isinstance(errors[1], SyntaxError)
+    assert isinstance(errors[2], ValueError)
+    assert functions[1] is None
+    assert functions[0](2) == 2
+    assert functions[4](2) == 6
+
+
+def test_compile_formulas_cache():
+    FORMULA_CACHE.clear()
+    fun = compile_formula("5*X")
+    functions, _ = compile_formulas(["5 * X", "6*X"])
+    assert functions[0] is fun
+    assert compile_formula("6*X") is functions[1]
+
+
+def test_compile_formulas_compile_error():
+    """ Formulas that can be parsed, but not compiled, do not fail the batch """
+    functions, errors = compile_formulas(["X", "+".join(["X"] * 5000)], cache=False)
+    assert list(errors) == [1]
+    assert isinstance(errors[1], RecursionError)
+    assert functions[0](1) == 1
+
+
+def test_arguments_are_sorted_by_index():
+    fun = compile_formula("X1 - X8", n_args=2, cache=False)
+    assert fun.__code__.co_varnames[:2] == ("x1", "x8")
+    assert fun(1, 8) == -7
+
+
+def test_dense_args():
+    with pytest.raises(ValueError):
+        compile_formula("X2 * 10", n_args=1, dense_args=True, cache=False)
+    fun = compile_formula("X2 * 10 - X0", n_args=3, dense_args=True, cache=False)
+    assert fun(1, 2, 3) == 29
+    assert compile_formula("X2", n_args=1)(5) == 5
+
+
+def test_packed_args():
+    fun = compile_formula("X0 + 2*X1", n_args=2, packed_args=True, cache=False)
+    assert fun((1, 2)) == 5
+    assert fun([1, 2]) == 5
+    assert list(map(fun, [(0, 1), (1, 1)])) == [2, 3]
+    with pytest.raises(ValueError):
+        fun((1, 2, 3))
+
+    fun = compile_formula("X2", n_args=3, strict=False, dense_args=True, packed_args=True,
+                          bind_locals=True, cache=False)
+    assert fun((1, 2, 3)) == 3
+    assert compile_formula("1 + 2", n_args=0, packed_args=True, cache=False)(()) == 3
+
+    with pytest.raises(ValueError):
+        compile_formula("X", packed_args=True, engine="interpret")
+
+
+def test_packed_args_batch():
+    functions, errors = compile_formulas(["X0 * X1", "X1"], n_args=2, strict=False,
+                                         packed_args=True, dense_args=True, cache=False)
+    assert not errors
+    assert [f((3, 4)) for f in functions] == [12, 4]
@@ -0,0 +1,55 @@
+import ast
+import math
+import pytest
+
+from formula_compiler.compiler import compile_formula, parse_formula
+from formula_compiler.cse import eliminate_common_subexpressions, hoist_common_subexpressions
+
+
+def function_body(formula: str, min_cost: int = 3) -> list[ast.stmt]:
+    module = eliminate_common_subexpressions(parse_formula(formula), min_cost=min_cost)
+    return ast.fix_missing_locations(module).body[1].body
+
+
+def test_hoist_repeated_call():
+    body = function_body("SQRT(X1^2+X2^2) + SQRT(X1^2+X2^2) * SIN(X1^2)")
+    assert len(body) == 3
+    assert ast.unparse(body[0]) == "_cse_0 = x1 ** 2"
+    assert ast.unparse(body[1]) == "_cse_1 = math.sqrt(_cse_0 + x2 ** 2)"
+    assert ast.unparse(body[2]) == "return _cse_1 + _cse_1 * math.sin(_cse_0)"
+
+
+def test_nested_repetitions_are_not_hoisted_twice():
+    """ A subexpression only repeated inside of a hoisted one is not hoisted """
+    body = function_body("SIN(EXP(X)) + SIN(EXP(X))")
+    assert len(body) == 2
+    assert ast.unparse(body[0]) == "_cse_0 = math.sin(math.exp(x0))"
+
+
+def test_min_cost():
+    assert len(function_body("(X+1)*(X+1)")) == 1
+    assert len(function_body("(X+1)*(X+1)", min_cost=1)) == 2
+
+
+def test_constants_are_distinguished():
+    _, (expression, ) = hoist_common_subexpressions(
+        [ast.parse("math.exp(1) + math.exp(1.0) + math.exp(-0.0) + math.exp(0.0)", mode="eval").body])
+    assert "_cse_" not in ast.unparse(expression)
+
+
+@pytest.mark.parametrize("formula", [
+    "SQRT(X0^2+X1^2) + 2*SQRT(X0^2+X1^2) - SQRT(X0^2+X1^2)/SIN(X0^2)",
+    "EXP(X0)*EXP(X0) + ROUND(X1/3) - ROUND(X1/3)",
+    "(X0 - X1)^3 / (X0 - X1)^3",
+])
+def test_same_results(formula):
+    reference = compile_formula(formula, n_args=2, cache=False)
+    fun = compile_formula(formula, n_args=2, cse=True, cache=False)
+    for x0, x1 in [(1.5, 2.0), (-3, 0.25)]:
+        assert fun(x0, x1) == reference(x0, x1)
+
+
+def test_numpy_backend():
+    np = pytest.importorskip("numpy")
+    fun = compile_formula("SIN(X)^2 + SIN(X)", backend="numpy", cse=True, cache=False)
+    np.testing.assert_allclose(fun(np.array([0.5, 1.0])), [math.sin(x)**2 + math.sin(x) for x in (0.5, 1.0)])
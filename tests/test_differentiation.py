@@ -0,0 +1,89 @@
+import ast
+import math
+
+import pytest
+
+from formula_compiler import compile_formula
+from formula_compiler.compiler import parse_formula
+from formula_compiler.ast_compiler import find_function
+from formula_compiler.differentiation import compile_gradient, differentiate
+
+
+def numeric_gradient(formula, n_args, args, h=1e-6):
+    fun = compile_formula(formula, n_args=n_args, cache=False)
+    gradient = []
+    for i in range(n_args):
+        upper = list(args)
+        lower = list(args)
+        upper[i] += h
+        lower[i] -= h
+        gradient.append((fun(*upper) - fun(*lower)) / (2 * h))
+    return gradient
+
+
+@pytest.mark.parametrize("function", [
+    "SQRT", "LN", "LOG10", "EXP", "SIN", "COS", "TAN", "ASIN", "ACOS", "ATAN", "SINH", "COSH",
+    "TANH", "ASINH", "ATANH"
+])
+def test_functions(function):
+    formula = f"{function}(X / 2)"
+    value, (derivative, ) = compile_gradient(formula)(0.6)
+    assert value == compile_formula(formula)(0.6)
+    assert derivative == pytest.approx(numeric_gradient(formula, 1, [0.6])[0], rel=1e-6)
+
+
+def test_acosh():
+    value, (derivative, ) = compile_gradient("ACOSH(X)")(2.0)
+    assert derivative == pytest.approx(1 / math.sqrt(3))
+
+
+@pytest.mark.parametrize("formula", [
+    "X0 * X1 - X0 / X1 + 3",
+    "X0 ^ 3 + X1 ^ 0.5",
+    "X0 ^ X1",
+    "2 ^ X1 * -X0",
+    "(X0 + X1) ^ (X0 - X1 + 3)",
+    "SIN(X0 * X1) / (1 + EXP(-X0))",
+    "SQRT(X0^2 + X1^2) * COS(SQRT(X0^2 + X1^2)) + PI() * X1",
+])
+def test_operators(formula):
+    args = [1.3, 0.7]
+    value, gradient = compile_gradient(formula, n_args=2)(*args)
+    assert value == pytest.approx(compile_formula(formula, n_args=2)(*args))
+    assert gradient == pytest.approx(numeric_gradient(formula, 2, args), rel=1e-5)
+
+
+def test_round_is_piecewise_constant():
+    value, gradient = compile_gradient("ROUND(X0 * 3) + X1", n_args=2)(1.4, 2.0)
+    assert value == 6.0
+    assert gradient == (0, 1)
+
+
+def test_non_strict_arguments():
+    value, gradient = compile_gradient("X0^2", n_args=3, strict=False)(3.0, 1.0, 1.0)
+    assert value == 9.0
+    assert gradient == (6.0, 0, 0)
+
+
+def test_shared_subexpressions_are_hoisted():
+    formula = "SIN(X0 * X1)"
+    fun = compile_gradient(formula, n_args=2)
+    # cos(x0 * x1) occurs in both partial derivatives
+    assert fun.__code__.co_varnames == ("x0", "x1", "_cse_0")
+    value, gradient = fun(0.5, 2.0)
+    assert gradient == pytest.approx((2.0 * math.cos(1.0), 0.5 * math.cos(1.0)))
+
+
+def test_differentiate_does_not_modify_expression():
+    expression = find_function(parse_formula("SIN(X0) * X0")).body[-1].value
+    before = ast.dump(expression)
+    derivative = differentiate(expression, "x0")
+    assert ast.dump(expression) == before
+    assert ast.dump(differentiate(expression, "x1")) == ast.dump(ast.Constant(value=0))
+    assert derivative is not expression
+
+
+@pytest.mark.parametrize("options", [{"optimize": False}, {"min_cost": None}, {"bind_locals": True}])
+def test_options(options):
+    value, gradient = compile_gradient("X0 * EXP(X0)", **options)(1.0)
+    assert gradient == (pytest.approx(2 * math.e), )
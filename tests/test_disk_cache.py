@@ -0,0 +1,74 @@
+import ast
+
+from formula_compiler.ast_compiler import compile_code
+from formula_compiler.compiler import compile_formula
+from formula_compiler.disk_cache import DiskCache
+
+
+def create_code(value: int):
+    module = ast.parse(f"def fun(x0):\n    return {value}")
+    return compile_code(module=module)
+
+
+def test_roundtrip(tmp_path):
+    cache = DiskCache(tmp_path)
+    assert cache.get("a") is None
+    cache.put("a", create_code(1))
+
+    code = DiskCache(tmp_path).get("a")
+    namespace = {}
+    exec(code, namespace)
+    assert namespace["fun"](0) == 1
+
+
+def test_corrupt_entry(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.put("a", create_code(1))
+    cache._path("a").write_bytes(b"\x00garbage")
+    assert cache.get("a") is None
+    assert not cache._path("a").exists()
+
+
+def test_prune(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=10**6)
+    for i in range(10):
+        cache.put(i, create_code(i))
+    assert cache.prune(max_bytes=cache.size() // 2) > 0
+    assert cache.size() <= cache.max_bytes
+
+
+def test_prune_on_put(tmp_path):
+    entry_size = len(__import__("marshal").dumps(create_code(0)))
+    cache = DiskCache(tmp_path, max_bytes=3 * entry_size)
+    for i in range(10):
+        cache.put(i, create_code(i))
+    assert cache.size() <= cache.max_bytes
+
+
+def test_overwriting_keeps_the_size(tmp_path):
+    cache = DiskCache(tmp_path)
+    for i in range(3):
+        cache.put("a", create_code(i))
+    assert cache._size == cache.size()
+
+
+def test_invalidate(tmp_path):
+    old = DiskCache(tmp_path, version="0.0.0")
+    old.put("a", create_code(1))
+    new = DiskCache(tmp_path, version="1.0.0")
+    new.put("a", create_code(2))
+
+    new.invalidate()
+    assert not old.directory.exists()
+    assert new.get("a") is not None
+
+
+def test_compile_formula(tmp_path):
+    cache = DiskCache(tmp_path)
+    fun = compile_formula("2*X", cache=False, disk_cache=cache)
+    assert fun(21) == 42
+    assert cache.size() > 0
+
+    # Served from the disk cache without parsing.
+    assert compile_formula("2 * x", cache=False, disk_cache=cache)(21) == 42
+    assert len(list(cache.directory.iterdir())) == 1
@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from formula_compiler.formula_set import FormulaSet
+
+FORMULAS = [
+    "SQRT(X0^2 + X1^2)",
+    "SQRT(X0^2 + X1^2) * COS(X0)",
+    "EXP(X2) + ROUND(X0)",
+    "2*X1",
+]
+
+
+@pytest.mark.parametrize("options", [{}, {"cse": False}, {"bind_locals": True}, {"optimize": True}])
+def test_matches_individual_formulas(options):
+    formula_set = FormulaSet(FORMULAS, **options)
+    assert formula_set.n_args == 3
+    assert len(formula_set) == 4
+
+    x0, x1, x2 = 1.5, -2.25, 0.5
+    norm = math.sqrt(x0**2 + x1**2)
+    assert formula_set(x0, x1, x2) == (norm, norm * math.cos(x0), math.exp(x2) + round(x0), 2 * x1)
+
+
+def test_shared_subexpressions_are_hoisted():
+    formula_set = FormulaSet(FORMULAS)
+    # `X0^2` and `X1^2` only occur within `SQRT(X0^2 + X1^2)`, hence only the
+    # latter is hoisted.
+    assert formula_set.temporaries == ("math.sqrt(x0 ** 2 + x1 ** 2)",)
+    assert formula_set.n_temporaries == 1
+    assert FormulaSet(FORMULAS, cse=False).n_temporaries == 0
+
+
+def test_records():
+    formula_set = FormulaSet({"norm": "SQRT(X0^2 + X1^2)", "double": "2*X0"})
+    result = formula_set(3, 4)
+    assert result.norm == 5.0
+    assert result.double == 6
+    assert result._fields == ("norm", "double")
+
+
+def test_n_args():
+    assert FormulaSet(["X0"], n_args=3)(1, 2, 3) == (1, )
+    assert FormulaSet(["1 + 2"])() == (3, )
+    with pytest.raises(ValueError):
+        FormulaSet(["X3"], n_args=2)
+
+
+def test_invalid_formula():
+    with pytest.raises(SyntaxError):
+        FormulaSet(["X0", "(X0"])
+
+
+def test_evaluate_rows():
+    formula_set = FormulaSet(["X0 + X1", "X0 * X1"])
+    sums, products = formula_set.evaluate([(1, 2), (3, 4), (5, 6)])
+    assert list(sums) == [3.0, 7.0, 11.0]
+    assert list(products) == [2.0, 12.0, 30.0]
+
+
+def test_numpy_backend():
+    np = pytest.importorskip("numpy")
+    formula_set = FormulaSet({"a": "SQRT(X0^2 + X1^2)", "b": "SQRT(X0^2 + X1^2) / 2"},
+                             backend="numpy")
+    result = formula_set(np.array([3.0, 6.0]), np.array([4.0, 8.0]))
+    np.testing.assert_array_equal(result.a, [5.0, 10.0])
+    np.testing.assert_array_equal(result.b, [2.5, 5.0])
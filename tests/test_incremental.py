@@ -0,0 +1,137 @@
+import random
+
+import pytest
+
+from formula_compiler.compiler import compile_formula
+from formula_compiler.incremental import CompilationSession, split_terms, token_key
+from formula_compiler.scanner import tokenize
+from formula_compiler.tiered import COMPILED
+from formula_compiler.tokens import TokenType
+
+
+def tokens_of(formula):
+    return [token for _, token in tokenize(formula)]
+
+
+def keys_of(formula):
+    return [token_key(token) for _, token in tokenize(formula)]
+
+
+def test_split_terms():
+    keys = keys_of("-X0 * 2 + SIN(X1 - 1) - 3^-X0")
+    assert split_terms(keys) == [
+        (None, 0, 4), (TokenType.Add.value, 5, 11), (TokenType.Sub.value, 12, 16)
+    ]
+    assert split_terms(keys_of("(X + 1")) is None
+    assert split_terms(keys_of("X + 1)")) is None
+    assert split_terms(keys_of("X +")) is None
+
+
+def test_typing_a_formula():
+    session = CompilationSession(n_args=2, strict=False)
+    target = "SQRT(X0^2 + X1^2) + 3.5 * X1 - ROUND(X0 / 7) + PI()"
+    for n in range(1, len(target) + 1):
+        text = target[:n]
+        try:
+            expected = compile_formula(text, n_args=2, strict=False, cache=False)
+        except Exception as e:
+            with pytest.raises(type(e)):
+                session.update(text)
+            continue
+        fun = session.update(text)
+        assert fun(1.25, -2.5) == expected(1.25, -2.5), text
+        assert session.tokens == tokens_of(text)
+        assert session.offsets == [offset for offset, _ in tokenize(text)]
+
+
+def test_only_edited_span_is_relexed():
+    session = CompilationSession(n_args=2, strict=False)
+    formula = " + ".join(f"SIN(X0 * {i})" for i in range(100))
+    session.update(formula)
+    n_tokens = len(session.tokens)
+
+    fun = session.update(formula.replace("SIN(X0 * 50)", "COS(X1 * 51)"))
+    stats = session.stats
+    assert stats.relexed_tokens <= 6
+    assert stats.reused_tokens == n_tokens - stats.relexed_tokens
+    assert stats.parsed_terms == 1
+    assert stats.reused_terms == 99
+    assert not stats.cached
+    assert session.tokens == tokens_of(formula.replace("SIN(X0 * 50)", "COS(X1 * 51)"))
+    expected = compile_formula(formula.replace("SIN(X0 * 50)", "COS(X1 * 51)"), n_args=2,
+                               cache=False)
+    assert fun(0.5, 0.25) == expected(0.5, 0.25)
+
+    # Undoing the edit returns the earlier function.
+    first = session.update(formula)
+    assert session.stats.cached
+    assert session.update(formula) is first
+
+
+def test_merging_tokens():
+    session = CompilationSession()
+    assert session.update("12 + X")(1) == 13
+    assert session.update("123 + X")(1) == 124
+    assert session.update("1.5e3 + X")(1) == 1501.0
+    with pytest.raises(SyntaxError):
+        session.update("1.5e3X")
+    # The session keeps the last valid version.
+    assert session.text == "1.5e3+x"
+    assert session.update("1.5e3*X")(2) == 3000.0
+
+
+def test_random_edits():
+    rng = random.Random(0)
+    alphabet = ["X0", "X1", "X2", "+", "-", "*", "/", "^", "(", ")", "1", "2.5", "SIN(", "EXP(",
+                "PI()", "ROUND(", "0"]
+    session = CompilationSession(n_args=3, strict=False)
+    formula = "X0 + X1"
+    for _ in range(500):
+        position = rng.randrange(len(formula) + 1)
+        if rng.random() < 0.3 and formula:
+            formula = formula[:position] + formula[position + rng.randrange(1, 4):]
+        else:
+            formula = formula[:position] + rng.choice(alphabet) + formula[position:]
+        try:
+            expected = compile_formula(formula, n_args=3, strict=False, cache=False)
+        except Exception as e:
+            # The whole formula is lexed before parsing, hence the error type
+            # can differ for formulas that are both lexically and syntactically
+            # invalid.
+            with pytest.raises((type(e), ValueError)):
+                session.update(formula)
+            continue
+        fun = session.update(formula)
+        assert session.tokens == tokens_of(formula), formula
+        try:
+            value = expected(0.5, 1.5, 2.5)
+        except Exception as e:
+            with pytest.raises(type(e)):
+                fun(0.5, 1.5, 2.5)
+        else:
+            assert fun(0.5, 1.5, 2.5) == pytest.approx(value, nan_ok=True), formula
+
+
+def test_arguments():
+    session = CompilationSession(n_args=2)
+    assert session.update("X1 - X8")(1, 8) == -7
+    with pytest.raises(ValueError):
+        session.update("X1 - X8 + X3")
+    assert session.update("X1 - X9")(1, 9) == -8
+
+    session = CompilationSession(n_args=3, dense_args=True)
+    assert session.update("X2 - X0")(1, 0, 3) == 2
+
+
+def test_promotion():
+    session = CompilationSession(tier_threshold=1, bind_locals=True)
+    first = session.update("SIN(X) + X")
+    first(1.0)
+    first(1.0)
+    assert first.tier == COMPILED
+    # The shared terms are not modified by the compilation.
+    second = session.update("SIN(X) + X + 1")
+    assert session.stats.reused_terms == 2
+    assert second(1.0) == first(1.0) + 1
+    second(1.0)
+    assert second(1.0) == first(1.0) + 1
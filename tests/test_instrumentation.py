@@ -0,0 +1,83 @@
+import pytest
+
+from formula_compiler import compile_formula
+from formula_compiler.cache import FORMULA_CACHE
+from formula_compiler.disk_cache import DiskCache
+from formula_compiler.instrumentation import HOOKS, collect, instrument, bytecode_size
+
+
+def test_stages():
+    with collect() as stats:
+        fun = compile_formula("SIN(X) + 2*X", cache=False, optimize=True, cse=True)
+    assert fun(0.0) == 0.0
+
+    assert len(stats) == 1
+    s = stats[0]
+    assert s.formula == "SIN(X) + 2*X"
+    assert not s.cached
+    assert list(s.durations) == [
+        "lex", "parse", "optimize", "cse", "prepare", "fix_locations", "compile", "exec"
+    ]
+    assert all(d >= 0 for d in s.durations.values())
+    assert sum(s.durations.values()) <= s.total
+    assert s.n_tokens == 8
+    assert s.n_nodes > 5
+    # Includes the code of the module and the function.
+    assert s.bytecode_size > bytecode_size(fun.__code__) > 0
+
+
+def test_cache_hits_are_reported():
+    FORMULA_CACHE.clear()
+    with collect() as stats:
+        compile_formula("X + 41")
+        compile_formula("X + 41")
+    assert [s.cached for s in stats] == [False, True]
+    assert list(stats[1].durations) == ["cache"]
+    assert stats[1].n_tokens is None
+
+
+def test_disk_cache(tmp_path):
+    disk_cache = DiskCache(tmp_path)
+    with collect() as stats:
+        compile_formula("X * 3", cache=False, disk_cache=disk_cache)
+        compile_formula("X * 3", cache=False, disk_cache=disk_cache)
+    assert "compile" in stats[0].durations
+    assert list(stats[1].durations) == ["disk_cache", "exec"]
+
+
+def test_interpreter_engine():
+    with collect() as stats:
+        compile_formula("X * 3", cache=False, engine="interpret")
+    assert list(stats[0].durations) == ["lex", "parse", "lower"]
+
+
+def test_hooks_are_removed():
+    calls = []
+    with instrument(calls.append):
+        compile_formula("X - 1", cache=False)
+        assert HOOKS == [calls.append]
+    compile_formula("X - 1", cache=False)
+    assert len(calls) == 1
+    assert HOOKS == []
+
+    with pytest.raises(ValueError):
+        with instrument(calls.append):
+            compile_formula("X + Y", cache=False)
+    assert HOOKS == []
+    assert len(calls) == 1
+
+
+def test_lexer_errors_are_unchanged():
+    with collect():
+        with pytest.raises(ValueError, match="Unknown keyword"):
+            compile_formula("FOO(X)", cache=False)
+        with pytest.raises(SyntaxError):
+            compile_formula("(X", cache=False)
+
+
+def test_large_indices_are_supported():
+    formula = "X99999999999999999999 + 12345678901234567890"
+    with collect() as stats:
+        fun = compile_formula(formula, cache=False)
+    assert fun.__code__.co_code == compile_formula(formula, cache=False).__code__.co_code
+    assert stats[0].n_tokens == 3
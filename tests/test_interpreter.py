@@ -0,0 +1,95 @@
+import ast
+import math
+import pytest
+
+from formula_compiler.compiler import compile_formula, parse_formula
+from formula_compiler.cse import eliminate_common_subexpressions
+from formula_compiler.interpreter import Program, lower, should_interpret, EngineCosts
+
+FORMULAS = [
+    "X0 + X1", "X0 - X1", "X0 * X1", "X0 / X1", "X0 ^ 2", "-X0", "+X0", "--X0",
+    "ROUND(X0 * 10) + X1", "SQRT(X1) + LN(X1) + LOG10(X1) + EXP(X0)",
+    "SIN(X0) + COS(X0) + TAN(X0) + ASIN(X0 / 10) + ACOS(X0 / 10) + ATAN(X1)",
+    "SINH(X0) + COSH(X0) + TANH(X0) + ASINH(X0) + ACOSH(X1 + 1) + ATANH(X0 / 10)",
+    "PI() * X0 - X1", "2^1 + 2^3 + X0 * X1", "X0 - -2 / 3 * X1 ^ -X0",
+]
+
+
+@pytest.mark.parametrize("formula", FORMULAS)
+def test_same_results(formula):
+    fun = compile_formula(formula, n_args=2, strict=False, cache=False)
+    program = compile_formula(formula, n_args=2, strict=False, engine="interpret", cache=False)
+    assert isinstance(program, Program)
+    for args in [(0.5, 2.0), (-3, 5), (2, 3)]:
+        expected = fun(*args)
+        result = program(*args)
+        assert type(result) is type(expected)
+        assert result == expected
+
+
+@pytest.mark.parametrize("engine", ["interpret", "auto", "tiered"])
+@pytest.mark.parametrize("options", [{"optimize": True}, {"fast_math": True}])
+@pytest.mark.parametrize("formula", FORMULAS + ["(-8)^(1/3) + X0", "EXP(2 * LN(X1)) + X0^1"])
+def test_same_results_with_optimizer(formula, options, engine):
+    fun = compile_formula(formula, n_args=2, strict=False, cache=False, **options)
+    other = compile_formula(formula, n_args=2, strict=False, cache=False, engine=engine,
+                            expected_calls=1, **options)
+    for args in [(0.5, 2.0), (-3, 5), (2, 3)]:
+        expected = fun(*args)
+        result = other(*args)
+        assert type(result) is type(expected)
+        assert result == expected
+
+
+def test_cse_temporaries():
+    module = eliminate_common_subexpressions(parse_formula("SIN(X)^2 + SIN(X)"))
+    program = lower(module)
+    assert program.n_registers == 2
+    assert program(0.5) == math.sin(0.5)**2 + math.sin(0.5)
+
+
+def test_errors():
+    program = compile_formula("SQRT(X) + 1/X", engine="interpret", cache=False)
+    with pytest.raises(ValueError):
+        program(-1)
+    with pytest.raises(ZeroDivisionError):
+        program(0)
+    with pytest.raises(TypeError):
+        program(1, 2)
+
+
+def test_deeply_nested():
+    """ The interpreter also handles formulas too deep for `compile` """
+    n = 5000
+    program = compile_formula("+".join(["X"] * n), engine="interpret", cache=False)
+    assert program(2) == 2 * n
+
+
+def test_unsupported_nodes():
+    module = parse_formula("X")
+    module.body[1].body[0].value = ast.parse("print(x0)", mode="eval").body
+    with pytest.raises(ValueError):
+        lower(module)
+
+
+def test_policy():
+    costs = EngineCosts(compile_overhead=30e-6, compile_per_node=3e-6, interpret_overhead=0.5e-6,
+                        interpret_per_instruction=0.1e-6, compiled_per_node=0.01e-6)
+    program = lower(parse_formula("SIN(X) * 2 + 1"))
+    assert should_interpret(program, expected_calls=1, costs=costs)
+    assert not should_interpret(program, expected_calls=10**6, costs=costs)
+
+
+def test_auto_engine():
+    program = compile_formula("SIN(X) * 2", engine="auto", expected_calls=1, cache=False)
+    assert isinstance(program, Program)
+    fun = compile_formula("SIN(X) * 2", engine="auto", expected_calls=10**9, cache=False)
+    assert not isinstance(fun, Program)
+    assert program(0.5) == fun(0.5)
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError):
+        compile_formula("X", engine="jit")
+    with pytest.raises(ValueError):
+        compile_formula("X", engine="interpret", backend="numpy")
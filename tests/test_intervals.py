@@ -0,0 +1,94 @@
+import math
+import random
+from array import array
+
+import pytest
+
+from formula_compiler.batch import compile_batch
+from formula_compiler.compiler import compile_formula
+from formula_compiler.intervals import Interval, analyze, compile_guarded
+
+FORMULAS = [
+    "SQRT(X0) + LN(X1) / X0 + X0^X1",
+    "ASIN(X0 / 10) * ACOS(X1 - 1) - ATANH(X0 / 11)",
+    "ROUND(SIN(X0) * 10) + TAN(X1) - COSH(X0 * 100)",
+    "EXP(X0 * X1) / (X1 - 1) + ACOSH(X0 + 1) ^ -2",
+    "LOG10(SQRT(X0 * X0 + 1)) - (X0 - X1) ^ 0.5 + SINH(X1) * -X0",
+    "1 / (X0 - 0.5) + 2 ^ (X1 * 100) - ATAN(X0 / X1)",
+]
+RANGES = [[(0, 10), (0, 2)], [(-10, 10), (-1, 1)], [(1, 2), (0.5, 1)]]
+
+
+def test_bounds():
+    assert analyze("2 * X + 1", [(0, 1)]) == (Interval(1, 3), [])
+    assert analyze("SQRT(SQRT(X))", [(0, 16)]).bounds == Interval(0.0, pytest.approx(2.0))
+    assert analyze("X^2", [(-3, 2)]).bounds.lo == 0
+    assert analyze("1/X", [(-1, 1)]) == (Interval(-math.inf, math.inf, True), ["1 / x0"])
+    assert analyze("LN(X0) + X1", [(0, 1), None]).unsafe == ["math.log(x0)"]
+    assert analyze("EXP(X)", [(0, 1000)]).unsafe == ["math.exp(x0)"]
+    for ranges in [[(0, 10)], [(-10, 10)]]:
+        assert analyze("X^400", ranges).unsafe == ["x0 ** 400"]
+    assert math.isnan(compile_guarded("X^400", [(-10, 10)])(-10.0))
+    assert math.isnan(compile_batch("X^400", ranges=[(-10, 10)])(array("d", [-10.0]))[0])
+    with pytest.raises(ValueError):
+        analyze("X", [(1, 0)])
+
+
+def test_safe_formulas_are_not_guarded():
+    guarded = compile_guarded("LN(X0) + ASIN(X1 / 2)", [(1, 10), (-2, 2)], n_args=2)
+    fun = compile_formula("LN(X0) + ASIN(X1 / 2)", n_args=2)
+    assert guarded.__code__.co_code == fun.__code__.co_code
+    # Outside of the ranges, errors are still raised.
+    with pytest.raises(ValueError):
+        guarded(0, 0)
+
+
+def test_guarded_functions_return_nan():
+    fun = compile_guarded("SQRT(X0) + LN(X1) / X0 + X0^X1", n_args=2, bind_locals=True)
+    assert fun(4, 0.5) == pytest.approx(2 + math.log(0.5) / 4 + 2)
+    for args in [(-1, 2), (0, 1), (-8, 0.5), (10.0, 400), (math.nan, 1)]:
+        assert math.isnan(fun(*args))
+
+
+@pytest.mark.parametrize("formula", [
+    "X / 2^2000",
+    "SQRT(X * 10^400)",
+    "10^300 * 10^300 * X",
+    "SQRT(10^300 * 10^300) + X",
+    "1" + "0" * 400 + " * X",
+])
+def test_integers_too_large_for_floats_return_nan(formula):
+    assert math.isnan(compile_guarded(formula, [(0.5, 2)])(1.5))
+    assert compile_guarded("2^3 * X", [(0.5, 2)])(1.5) == 12.0
+
+
+@pytest.mark.parametrize("formula", FORMULAS)
+@pytest.mark.parametrize("ranges", RANGES)
+def test_soundness(formula, ranges):
+    analysis = analyze(formula, ranges)
+    guarded = compile_guarded(formula, ranges, n_args=2)
+    fun = compile_formula(formula, n_args=2)
+    rng = random.Random(0)
+    points = [(lo, hi) for lo in ranges[0] for hi in ranges[1]]
+    points += [tuple(rng.uniform(*r) for r in ranges) for _ in range(500)]
+    for args in points:
+        result = guarded(*args)
+        try:
+            expected = fun(*args)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            assert math.isnan(result)
+            continue
+        if isinstance(expected, complex) or math.isnan(expected):
+            assert math.isnan(result)
+            continue
+        assert result == expected
+        assert analysis.bounds.lo <= result <= analysis.bounds.hi, args
+    if not analysis.unsafe:
+        assert not analysis.bounds.nan
+
+
+def test_guarded_batch():
+    fun = compile_batch("SQRT(X0) + X0^X1 + 1/X1", n_args=2, ranges=[(0, 10)], cse=True)
+    result = fun(array("d", [4, 2, 4, 0]), array("d", [1, 1, 0, -1]))
+    assert result[:2] == array("d", [7.0, 2 + math.sqrt(2) + 1])
+    assert all(math.isnan(x) for x in result[2:])
@@ -0,0 +1,65 @@
+import ast
+import copy
+import gc
+import math
+import pickle
+
+import pytest
+
+from formula_compiler import ir
+from formula_compiler.ast_compiler import compile_module
+from formula_compiler.compiler import compile_formula, parse_formula
+
+
+def test_interning():
+    a = ir.parse("SIN(X0 * 2) + X1")
+    b = ir.parse("x1 * sin(x0*2)")
+    assert a.left is b.right
+    assert ir.parse("SIN(X0 * 2) + X1") is a
+    assert ir.Binary(ast.Add, a.left, ir.Variable(1)) is a
+    assert a == ir.parse("(SIN(X0 * 2)) + X1") and a != b
+    assert len({a, b, ir.parse("SIN(X0*2)+X1")}) == 2
+
+
+def test_constants():
+    assert ir.Constant(1) is not ir.Constant(1.0)
+    assert ir.Constant(0.0) is not ir.Constant(-0.0)
+    assert ir.Constant(math.nan) is ir.Constant(float("nan"))
+
+
+def test_immutable():
+    node = ir.parse("X + 1")
+    with pytest.raises(AttributeError):
+        node.left = ir.Constant(2)
+    assert copy.deepcopy(node) is node
+    assert pickle.loads(pickle.dumps(node)) is node
+    with pytest.raises(ValueError):
+        ir.Call("print", node)
+
+
+def test_unused_nodes_are_released():
+    gc.collect()
+    before = ir.interned_nodes()
+    node = ir.parse("X0 * 123456 + X1 ^ 654321")
+    assert ir.interned_nodes() > before
+    del node
+    gc.collect()
+    assert ir.interned_nodes() == before
+
+
+def test_lowering():
+    for formula in ["-X0 * PI() + ROUND(X1 / 3) - 2^X0", "LN(X1) * LOG10(1.5)"]:
+        node = ir.parse(formula)
+        assert ast.dump(ir.to_module(node)) == ast.dump(parse_formula(formula))
+        assert ir.from_ast(ir.to_ast(node)) is node
+
+    fun = compile_module(ir.to_module(ir.parse("X2 - X0"), dense=True), n_args=3)
+    assert fun(1, 2, 3) == compile_formula("X2 - X0", n_args=2)(1, 3)
+
+
+def test_deep_expressions():
+    formula = "(" * 2000 + "X" + ")" * 2000 + "+1" * 2000
+    node = ir.parse(formula)
+    assert ir.variables(node) == {0}
+    assert ir.from_ast(ir.to_ast(node)) is node
+    assert len(list(ir.iter_nodes(node))) == 2002
@@ -0,0 +1,112 @@
+import math
+
+import pytest
+
+from formula_compiler.compiler import compile_formula
+from formula_compiler.memoize import LFU, LRU, compile_memoized, memoize
+
+EXPENSIVE = "SIN(X0) * COS(X1) + EXP(X0) + SQRT(X1)"
+
+
+class Counter:
+    def __init__(self, fun):
+        self.fun = fun
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.fun(*args)
+
+
+@pytest.mark.parametrize("policy", [LRU, LFU])
+def test_memoize(policy):
+    fun = Counter(compile_formula(EXPENSIVE, n_args=2))
+    memoized = memoize(fun, policy=policy)
+    for x in [(1.0, 2.0), (1.0, 2.0), (1, 2), (0.0, 4.0), (-0.0, 4.0)]:
+        assert memoized(*x) == fun.fun(*x)
+    assert math.isnan(memoized(float("nan"), 1.0))
+    assert math.isnan(memoized(float("nan"), 1.0))
+    assert math.isnan(memoized(-math.nan, 1.0))
+    assert fun.calls == 4
+
+    info = memoized.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (8 - fun.calls, fun.calls, fun.calls)
+    assert info.hit_rate == info.hits / 8
+
+    with pytest.raises(ValueError):
+        memoized(-1.0, -1.0)
+    with pytest.raises(ValueError):
+        memoized(-1.0, -1.0)
+    info = memoized.cache_info()
+    assert (info.misses, info.failures, info.evictions, info.currsize) == (4, 2, 0, 4)
+
+    memoized.cache_clear()
+    assert memoized.cache_info() == (0, 0, 0, 0, 4096, 0)
+
+
+@pytest.mark.parametrize("policy", [LRU, LFU])
+def test_uncached_calls_are_not_evictions(policy):
+    memoized = memoize(math.sqrt, maxsize=0, policy=policy)
+    for x in [1.0, 1.0, -1.0, 4.0]:
+        try:
+            memoized(x)
+        except ValueError:
+            pass
+    assert memoized.cache_info() == (0, 3, 1, 0, 0, 0)
+
+
+@pytest.mark.parametrize("policy", [LRU, LFU])
+def test_equal_arguments_share_the_first_result(policy):
+    memoized = memoize(lambda x, y: x * y, policy=policy)
+    assert math.copysign(1, memoized(0.0, 3.0)) == math.copysign(1, memoized(-0.0, 3.0)) == 1
+    assert type(memoized(1, 2)) is int
+    assert type(memoized(1.0, 2.0)) is float
+
+
+@pytest.mark.parametrize("policy", [LRU, LFU])
+def test_function_is_called_with_the_original_arguments(policy):
+    calls = []
+    memoized = memoize(lambda *args: calls.append(args) or 1.0, policy=policy)
+    nan = float("nan")
+    memoized(nan, -0.0)
+    assert calls[0][0] is nan and math.copysign(1, calls[0][1]) == -1
+    memoized(-math.nan, 0.0)
+    assert len(calls) == 1
+
+    fun = compile_memoized("X^400", min_cost=0, policy=policy)
+    assert fun(10) == 10**400
+    with pytest.raises(OverflowError):
+        fun(10.0)
+
+
+def test_lru_eviction():
+    fun = Counter(math.sin)
+    memoized = memoize(fun, maxsize=2, policy=LRU)
+    for x in [1, 2, 1, 3, 1, 2]:
+        memoized(x)
+    assert fun.calls == 4
+    assert memoized.cache_info().evictions == 2
+
+
+def test_lfu_eviction():
+    fun = Counter(math.sin)
+    memoized = memoize(fun, maxsize=4, policy=LFU)
+    for x in [1, 1, 1, 2, 2, 3, 4, 5, 1, 2, 3]:
+        memoized(x)
+    # Inserting 5 evicted 3 and 4, the two least frequently used arguments.
+    assert fun.calls == 6
+    assert memoized.cache_info().evictions == 2
+
+
+def test_cheap_formulas_are_not_memoized():
+    fun = compile_memoized("X + 1")
+    assert not hasattr(fun, "cache_info")
+    assert fun(1) == 2
+    fun = compile_memoized(EXPENSIVE, n_args=2)
+    assert fun(1.0, 1.0) == fun(1.0, 1.0)
+    assert fun.cache_info().hits == 1
+    assert hasattr(compile_memoized("X + 1", min_cost=0), "cache_info")
+    with pytest.raises(ValueError):
+        compile_memoized(EXPENSIVE, n_args=2, packed_args=True)
+    with pytest.raises(ValueError):
+        memoize(math.sin, policy="fifo")
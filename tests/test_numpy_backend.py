@@ -0,0 +1,53 @@
+import math
+import pytest
+
+from formula_compiler.compiler import compile_formula
+
+np = pytest.importorskip("numpy")
+
+FORMULAS = [
+    "X0 + X1",
+    "X0 * X1 - 3",
+    "X0 / X1",
+    "X0 ^ 2",
+    "2 ^ X1",
+    "-X0",
+    "ROUND(X0 * 10)",
+    "SQRT(X1) + X0",
+    "LN(X1) + LOG10(X1) - X0",
+    "EXP(X0 / 10)",
+    "SIN(X0) + COS(X0) + TAN(X0)",
+    "ASIN(X0 / 10) + ACOS(X0 / 10) + ATAN(X0)",
+    "SINH(X0) + COSH(X0) + TANH(X0)",
+    "ASINH(X0) + ACOSH(X1 + 1) + ATANH(X0 / 10)",
+    "PI() * X0",
+]
+
+
+@pytest.mark.parametrize("formula", FORMULAS)
+def test_matches_scalar(formula):
+    x0 = [-2.5, -0.5, 0.0, 0.5, 1.5, 2.5]
+    x1 = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    scalar = compile_formula(formula, n_args=2, strict=False)
+    vectorized = compile_formula(formula, n_args=2, strict=False, backend="numpy")
+
+    result = vectorized(np.array(x0), np.array(x1))
+    assert isinstance(result, np.ndarray)
+    np.testing.assert_allclose(result, [scalar(a, b) for a, b in zip(x0, x1)], rtol=1e-12)
+
+
+def test_integer_columns():
+    fun = compile_formula("X^-1", backend="numpy")
+    np.testing.assert_array_equal(fun([1, 2, 4]), [1.0, 0.5, 0.25])
+
+
+def test_domain_error_yields_nan():
+    fun = compile_formula("SQRT(X)", backend="numpy")
+    with np.errstate(invalid="ignore"):
+        assert math.isnan(fun(np.array([-1.0]))[0])
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        compile_formula("X", backend="cuda")
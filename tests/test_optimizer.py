@@ -0,0 +1,88 @@
+import ast
+import math
+import pytest
+
+from formula_compiler.compiler import compile_formula, parse_formula
+from formula_compiler.optimizer import optimize
+
+
+def optimized_return(formula: str, fast_math: bool = False) -> ast.AST:
+    module, _ = optimize(parse_formula(formula), fast_math=fast_math)
+    return module.body[1].body[0].value
+
+
+def test_fold_constants():
+    node = optimized_return("2^1 + 2^3")
+    assert isinstance(node, ast.Constant) and node.value == 10
+
+
+def test_fold_pi_and_functions():
+    node = optimized_return("SIN(PI() / 2) + ROUND(2.5)")
+    assert isinstance(node, ast.Constant) and node.value == math.sin(math.pi / 2) + round(2.5)
+
+
+def test_fold_keeps_errors():
+    """ Errors are raised when the function is called, not when it is compiled """
+    fun = compile_formula("X + 1/0", optimize=True, cache=False)
+    with pytest.raises(ZeroDivisionError):
+        fun(1)
+
+
+def test_huge_power_is_not_folded():
+    node = optimized_return("9^999999")
+    assert isinstance(node, ast.BinOp)
+
+
+def test_complex_results_are_not_folded():
+    node = optimized_return("(-8)^(1/3)")
+    assert isinstance(node, ast.BinOp)
+    program = compile_formula("(-8)^(1/3) + X", optimize=True, engine="interpret", cache=False)
+    assert program(1.0) == compile_formula("(-8)^(1/3) + X", cache=False)(1.0)
+
+@pytest.mark.parametrize("formula", ["X*1", "1*X", "X-0", "--X", "+X", "X^1"])
+def test_identities(formula):
+    node = optimized_return(formula)
+    assert isinstance(node, ast.Name)
+
+
+def test_unsafe_identities_require_fast_math():
+    assert isinstance(optimized_return("X+0"), ast.BinOp)
+    assert isinstance(optimized_return("X+0", fast_math=True), ast.Name)
+
+    assert isinstance(optimized_return("X^2").op, ast.Pow)
+    assert isinstance(optimized_return("X^2", fast_math=True).op, ast.Mult)
+
+
+def test_exp_ln():
+    assert isinstance(optimized_return("EXP(5*LN(X))"), ast.Call)
+
+    node = optimized_return("EXP(5*LN(X))", fast_math=True)
+    assert ast.unparse(node) == "x0 ** 5"
+
+
+def test_removed_nodes():
+    _, removed = optimize(parse_formula("2^1 + 2^3"))
+    assert removed == 9
+
+
+@pytest.mark.parametrize("formula", [
+    "ROUND(2^1 + 2^3 + EXP(5*LN(X)))",
+    "X - -X + X*1 - 0",
+    "-(-X) * PI() + SQRT(4)",
+    "X + (-X)",
+])
+@pytest.mark.parametrize("x", [-0.0, 0.0, 1.5, 3])
+def test_same_results(formula, x):
+    reference = compile_formula(formula, n_args=1, strict=False, cache=False)
+    fun = compile_formula(formula, n_args=1, strict=False, optimize=True, cache=False)
+    try:
+        expected = reference(x)
+    except ValueError:
+        with pytest.raises(ValueError):
+            fun(x)
+        return
+
+    result = fun(x)
+    assert type(result) is type(expected)
+    assert math.copysign(1, result) == math.copysign(1, expected)
+    assert result == expected
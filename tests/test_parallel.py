@@ -0,0 +1,60 @@
+import math
+from array import array
+
+import pytest
+
+from formula_compiler import compile_formula
+from formula_compiler.parallel import evaluate_parallel, pack_inputs
+
+
+def test_matches_serial_evaluation():
+    formula = "SQRT(X0^2 + X1^2) * COS(X0) + ROUND(X1)"
+    inputs = [(i * 0.25, i * 0.5) for i in range(1000)]
+    fun = compile_formula(formula, n_args=2)
+
+    results = evaluate_parallel(formula, inputs, workers=2, chunksize=64, n_args=2)
+    assert isinstance(results, array) and results.typecode == "d"
+    assert list(results) == [float(fun(*row)) for row in inputs]
+
+
+def test_single_argument_and_buffer_inputs():
+    values = array("d", range(100))
+    expected = [math.exp(x / 100) for x in values]
+    assert list(evaluate_parallel("EXP(X/100)", list(values), workers=2, chunksize=7)) == expected
+    assert list(evaluate_parallel("EXP(X/100)", values, workers=2, chunksize=7)) == expected
+    assert list(evaluate_parallel("EXP(X/100)", values, workers=1)) == expected
+
+
+def test_compile_options():
+    results = evaluate_parallel("X0 * 2", [(1, 5, 6), (2, 7, 8)], workers=2, chunksize=1,
+                                n_args=3, strict=False, optimize=True)
+    assert list(results) == [2.0, 4.0]
+
+
+def test_empty_inputs():
+    assert len(evaluate_parallel("X", [], workers=2)) == 0
+
+
+def test_worker_errors_are_raised():
+    with pytest.raises(ZeroDivisionError):
+        evaluate_parallel("1/X", [1.0, 2.0, 0.0, 4.0], workers=2, chunksize=1)
+
+
+def test_invalid_formula():
+    with pytest.raises(SyntaxError):
+        evaluate_parallel("(X", [1.0], workers=2)
+
+
+def test_pack_inputs():
+    assert list(pack_inputs([(1, 2), (3, 4)], n_args=2)) == [1.0, 2.0, 3.0, 4.0]
+    assert list(pack_inputs(array("d", [1, 2, 3, 4]), n_args=2)) == [1.0, 2.0, 3.0, 4.0]
+    with pytest.raises(ValueError):
+        pack_inputs([(1, 2), (3, )], n_args=2)
+    with pytest.raises(ValueError):
+        pack_inputs(array("d", [1, 2, 3]), n_args=2)
+    with pytest.raises(TypeError):
+        pack_inputs(array("i", [1, 2]), n_args=1)
+    with pytest.raises(ValueError):
+        pack_inputs([(), ()], n_args=0)
+    with pytest.raises(ValueError):
+        evaluate_parallel("1 + 2", [(), ()], n_args=0)
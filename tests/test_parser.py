@@ -0,0 +1,100 @@
+import ast
+import random
+import pytest
+
+from formula_compiler.lexer import Lexer
+from formula_compiler.parser import Parser, IterativeParser
+
+ATOMS = ["X", "X1", "X12", "2", "3.5", "1e-3", "PI()"]
+FUNCTIONS = ["SIN", "COS", "SQRT", "LN", "EXP", "ROUND", "ATANH"]
+OPERATORS = ["+", "-", "*", "/", "^"]
+
+
+def random_formula(rng: random.Random, depth: int) -> str:
+    r = rng.random()
+    if depth == 0 or r < 0.3:
+        return rng.choice(ATOMS)
+    if r < 0.45:
+        return rng.choice(["-", "+"]) + random_formula(rng, depth - 1)
+    if r < 0.6:
+        return rng.choice(FUNCTIONS) + rng.choice(["({})", "{}"]).format(random_formula(rng, depth - 1))
+    if r < 0.7:
+        return f"({random_formula(rng, depth - 1)})"
+    return random_formula(rng, depth - 1) + rng.choice(OPERATORS) + random_formula(rng, depth - 1)
+
+
+def parse(parser_class, text: str):
+    try:
+        parser = parser_class(lexer=Lexer(text=text))
+        return ast.dump(parser.parse()), parser.variables
+    except Exception as e:
+        return type(e), str(e)
+
+
+def test_same_ast_as_recursive_parser():
+    rng = random.Random(42)
+    for _ in range(2000):
+        formula = random_formula(rng, depth=6)
+        assert parse(IterativeParser, formula) == parse(Parser, formula), formula
+
+
+@pytest.mark.parametrize("formula", [
+    "-2^2", "2^-2", "2^-X^2", "SIN X^2", "-(X+1)*2", "--X", "1-2-3", "2^3^2", "1/2*3",
+])
+def test_precedence(formula):
+    assert parse(IterativeParser, formula) == parse(Parser, formula)
+
+
+@pytest.mark.parametrize("formula", ["(", "(X", "((X)", "X)", "1(2)", ")", "PI", "SIN", "X+", "-"])
+def test_same_errors(formula):
+    expected = parse(Parser, formula)
+    assert issubclass(expected[0], Exception)
+    assert parse(IterativeParser, formula) == expected
+
+
+def depth(node: ast.AST) -> int:
+    """ Iteratively computes the depth of the tree of expressions """
+    result = 0
+    stack = [(node, 1)]
+    while stack:
+        node, d = stack.pop()
+        result = max(result, d)
+        stack.extend((child, d + 1) for child in ast.iter_child_nodes(node)
+                     if isinstance(child, ast.expr))
+    return result
+
+
+def returned(module: ast.Module) -> ast.AST:
+    return module.body[1].body[0].value
+
+
+def test_long_sum():
+    n = 50_000
+    parser = IterativeParser(lexer=Lexer(text="+".join(f"X{i % 10}" for i in range(n))))
+    node = returned(parser.parse())
+    assert parser.variables == set(range(10))
+    assert depth(node) == n
+
+
+def test_deep_parentheses():
+    n = 50_000
+    node = returned(IterativeParser(lexer=Lexer(text="(" * n + "X" + ")" * n)).parse())
+    assert isinstance(node, ast.Name)
+
+
+def test_long_unary_chain():
+    n = 100_000
+    node = returned(IterativeParser(lexer=Lexer(text="-" * n + "X")).parse())
+    assert depth(node) == n + 1
+
+
+def test_deep_functions():
+    n = 25_000
+    node = returned(IterativeParser(lexer=Lexer(text="SIN(" * n + "X" + ")" * n)).parse())
+    assert isinstance(node, ast.Call)
+    assert depth(node) == n + 2
+
+
+def test_recursive_parser_fails():
+    with pytest.raises(RecursionError):
+        Parser(lexer=Lexer(text="(" * 10_000 + "X" + ")" * 10_000)).parse()
@@ -0,0 +1,72 @@
+import pytest
+
+from formula_compiler.lexer import Lexer
+from formula_compiler.scanner import Scanner, tokenize
+from formula_compiler.tokens import ConstantToken, TokenType, VariableToken
+
+FORMULAS = [
+    "1", "1.2", "1,5", "1.", "1e-4", "1.e5", "2E+3", "12", "1 2",
+    "X", "X3", "x12 * X0", "xsin(x)",
+    "ROUND(2^1 + 2^3 + EXP(5*LN(x)))",
+    "SIN(X1)*cos(x2) - PI() / LOG10(3,25e2)",
+    "-(+x)^-2",
+    "sqrt\t(\nX\r)",
+]
+
+INVALID = ["1e", "2exp(1)", "ASDFJHLK", "%", "x12a", "1_000", "x+$"]
+
+
+def lexer_tokens(text: str):
+    lexer = Lexer(text=text)
+    tokens = []
+    while (token := lexer.get_next_token()).type != TokenType.EOF:
+        tokens.append(token)
+    return tokens
+
+
+def scanner_tokens(text: str):
+    scanner = Scanner(text=text)
+    tokens = []
+    while (token := scanner.get_next_token()).type != TokenType.EOF:
+        tokens.append(token)
+    return tokens
+
+
+def signature(tokens):
+    return [(t.type, getattr(t, "value", None), type(getattr(t, "value", None)),
+             getattr(t, "index", None)) for t in tokens]
+
+
+@pytest.mark.parametrize("formula", FORMULAS)
+def test_same_tokens_as_lexer(formula):
+    assert signature(scanner_tokens(formula)) == signature(lexer_tokens(formula))
+
+
+@pytest.mark.parametrize("formula", INVALID)
+def test_same_errors_as_lexer(formula):
+    with pytest.raises(ValueError) as expected:
+        lexer_tokens(formula)
+    with pytest.raises(ValueError) as e:
+        scanner_tokens(formula)
+    assert str(e.value) == str(expected.value)
+
+
+def test_offsets():
+    assert [(offset, token) for offset, token in tokenize("X1 + 2.5")] == [
+        (0, VariableToken(index=1)),
+        (2, scanner_tokens("+")[0]),
+        (3, ConstantToken(type=TokenType.Float, value=2.5)),
+    ]
+
+
+def test_singleton_tokens():
+    assert scanner_tokens("(")[0] is scanner_tokens("x)(")[2]
+    assert scanner_tokens("x3")[0] is scanner_tokens("X3")[0]
+
+
+def test_eof():
+    scanner = Scanner(text="x")
+    scanner.get_next_token()
+    assert scanner.get_next_token().type == TokenType.EOF
+    assert scanner.get_next_token().type == TokenType.EOF
+    assert scanner.offset == 1
@@ -0,0 +1,110 @@
+import math
+import tracemalloc
+from array import array
+
+import pytest
+
+from formula_compiler import compile_formula
+from formula_compiler.streaming import (evaluate_rows, evaluate_csv, evaluate_columns, read_csv,
+                                        write_column, write_csv)
+
+
+def test_evaluate_rows_in_chunks():
+    fun = compile_formula("X0 + 2*X1", n_args=2)
+    consumed = []
+
+    def rows():
+        for i in range(10):
+            consumed.append(i)
+            yield i, -i
+
+    chunks = evaluate_rows(fun, rows(), chunksize=4)
+    assert list(next(chunks)) == [0.0, -1.0, -2.0, -3.0]
+    assert len(consumed) == 4
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+
+
+def test_evaluate_rows_empty():
+    assert list(evaluate_rows(compile_formula("X"), [])) == []
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "inputs.csv"
+    path.write_text("a,b,c\n1,2,3\n4,5,6\n\n7,8,9\n")
+    assert list(read_csv(path, ["c", 0])) == [(3.0, 1.0), (6.0, 4.0), (9.0, 7.0)]
+
+    fun = compile_formula("X0 - X1", n_args=2)
+    chunks = list(evaluate_csv(fun, path, columns=["c", "a"], chunksize=2))
+    assert [list(chunk) for chunk in chunks] == [[2.0, 2.0], [2.0]]
+
+    with pytest.raises(ValueError):
+        list(read_csv(path, ["d"]))
+
+    path.write_text("1;2\n3;4\n")
+    assert list(read_csv(path, [1], delimiter=";", header=False)) == [(2.0, ), (4.0, )]
+
+
+def write_values(path, values):
+    write_column([array("d", values)], path)
+    return path
+
+
+def test_columns(tmp_path):
+    x0 = write_values(tmp_path / "x0.bin", [0.5 * i for i in range(10)])
+    x1 = write_values(tmp_path / "x1.bin", range(10))
+    fun = compile_formula("X0 * X1", n_args=2)
+
+    chunks = list(evaluate_columns(fun, [x0, x1], chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert [v for chunk in chunks for v in chunk] == [0.5 * i * i for i in range(10)]
+
+    # Abandoning the generator releases the memory maps.
+    chunks = evaluate_columns(fun, [x0, x1], chunksize=3)
+    next(chunks)
+    chunks.close()
+
+
+def test_columns_errors(tmp_path):
+    fun = compile_formula("X0 * X1", n_args=2)
+    x0 = write_values(tmp_path / "x0.bin", [1.0, 2.0])
+    x1 = write_values(tmp_path / "x1.bin", [1.0])
+    with pytest.raises(ValueError):
+        list(evaluate_columns(fun, [x0, x1]))
+
+    (tmp_path / "odd.bin").write_bytes(b"123")
+    with pytest.raises(ValueError):
+        list(evaluate_columns(fun, [x0, tmp_path / "odd.bin"]))
+
+    empty = write_values(tmp_path / "empty.bin", [])
+    assert list(evaluate_columns(fun, [empty, empty])) == []
+
+
+def test_write_column_is_little_endian(tmp_path):
+    path = tmp_path / "out.bin"
+    assert write_column(iter([array("d", [1.0]), array("d", [2.0, 3.0])]), path) == 3
+    data = path.read_bytes()
+    assert data[:8] == b"\x00\x00\x00\x00\x00\x00\xf0?"
+    assert len(data) == 24
+
+
+def test_write_csv(tmp_path):
+    path = tmp_path / "out.csv"
+    assert write_csv([array("d", [0.1, math.pi])], path) == 2
+    assert path.read_text().splitlines() == ["result", "0.1", repr(math.pi)]
+
+
+def test_pipeline_memory_is_flat(tmp_path):
+    n = 200_000
+    x0 = write_values(tmp_path / "x0.bin", range(n))
+    fun = compile_formula("SQRT(X)")
+
+    tracemalloc.start()
+    try:
+        written = write_column(evaluate_columns(fun, [x0], chunksize=1000), tmp_path / "out.bin")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert written == n
+    # The input and output are 1.6 MB each, a chunk only 8 KB.
+    assert peak < 200_000
@@ -0,0 +1,101 @@
+import math
+import threading
+
+import pytest
+
+from formula_compiler import compile_formula
+from formula_compiler.interpreter import Program
+from formula_compiler.tiered import TieredFunction, tier_statistics, INTERPRETED, COMPILED
+
+
+def test_promotes_after_threshold():
+    fun = compile_formula("SIN(X) + 2*X", engine="tiered", tier_threshold=3, cache=False)
+    assert isinstance(fun, TieredFunction)
+
+    results = [fun(0.5) for _ in range(3)]
+    assert fun.tier == INTERPRETED
+    assert fun.stats().promoted_at is None
+
+    results.append(fun(0.5))
+    assert fun.tier == COMPILED
+    assert not isinstance(fun._current, Program)
+    assert len(set(results)) == 1
+    assert results[0] == math.sin(0.5) + 2 * 0.5
+
+    stats = fun.stats()
+    assert stats.calls == 4
+    assert stats.promoted_at == 4
+    assert stats.threshold == 3
+    assert stats.compile_seconds > 0
+
+
+@pytest.mark.parametrize("options", [{}, {"bind_locals": True}, {"cse": True}, {"optimize": True}])
+def test_tiers_agree(options):
+    formula = "ROUND(EXP(X1) / (1 + X0^2)) + EXP(X1) / (1 + X0^2)"
+    expected = compile_formula(formula, n_args=2, cache=False, **options)
+    fun = compile_formula(formula, n_args=2, engine="tiered", tier_threshold=1, cache=False, **options)
+    assert fun(0.3, 1.7) == expected(0.3, 1.7)
+    assert fun(0.3, 1.7) == expected(0.3, 1.7)
+    assert fun.tier == COMPILED
+
+
+def test_non_strict_padding():
+    fun = compile_formula("X0 * 2", n_args=3, strict=False, engine="tiered", tier_threshold=0,
+                          cache=False)
+    assert fun(1.5, 7, 8) == 3.0
+    assert fun.tier == COMPILED
+
+
+def test_default_threshold_is_break_even():
+    fun = compile_formula("X + 1", engine="tiered", cache=False)
+    assert 0 < fun.threshold < 10_000
+
+
+def test_deep_formula_remains_interpreted():
+    fun = compile_formula("+".join(["X"] * 5000), engine="tiered", tier_threshold=0, cache=False)
+    assert fun(1.0) == 5000.0
+    assert fun.tier == INTERPRETED
+
+
+def test_concurrent_promotion():
+    fun = compile_formula("X * 3", engine="tiered", tier_threshold=10, cache=False)
+    compiled = []
+    original = fun._compile
+
+    def counting_compile():
+        compiled.append(1)
+        return original()
+
+    fun._compile = counting_compile
+
+    def work():
+        for _ in range(1000):
+            assert fun(2) == 6
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert compiled == [1]
+    assert fun.tier == COMPILED
+
+
+def test_tier_statistics():
+    fun = compile_formula("X - 4", engine="tiered", tier_threshold=100, cache=False)
+    fun(1)
+    stats = [s for s in tier_statistics() if s.formula == "X - 4"]
+    assert len(stats) == 1
+    assert stats[0].calls == 1
+    assert stats[0].tier == INTERPRETED
+
+
+def test_cached():
+    first = compile_formula("X / 7", engine="tiered", tier_threshold=5)
+    assert compile_formula("X / 7", engine="tiered", tier_threshold=5) is first
+    assert compile_formula("X / 7", engine="tiered", tier_threshold=6) is not first
+
+
+def test_numpy_backend_rejected():
+    with pytest.raises(ValueError):
+        compile_formula("X", engine="tiered", backend="numpy")
@@ -0,0 +1,76 @@
+import ast
+import pytest
+
+from formula_compiler.parser import IterativeParser
+from formula_compiler.scanner import Scanner
+from formula_compiler.token_buffer import TokenBuffer
+from formula_compiler.tokens import TokenType
+
+FORMULAS = [
+    "X",
+    "ROUND(2^1 + 2^3 + EXP(5*LN(x)))",
+    "SIN(X1)*cos(x2) - PI() / LOG10(3,25e2)",
+    "123456789012345678901234567890 + 2^53 + 9007199254740993",
+    "-(+x)^-2",
+]
+
+
+def drain(lexer):
+    tokens = []
+    while (token := lexer.get_next_token()).type != TokenType.EOF:
+        tokens.append((token.type, getattr(token, "value", None), getattr(token, "index", None),
+                       lexer.offset))
+    return tokens
+
+
+def test_same_tokens_as_scanner():
+    buffer = TokenBuffer.from_formulas(FORMULAS)
+    assert len(buffer) == len(FORMULAS)
+    for i, formula in enumerate(FORMULAS):
+        assert drain(buffer.reader(i)) == drain(Scanner(formula))
+
+
+def test_integer_types():
+    buffer = TokenBuffer.from_formulas(["2 + 2.0 + 9007199254740993"])
+    values = [t[1] for t in drain(buffer.reader(0)) if t[0] in (TokenType.Integer, TokenType.Float)]
+    assert [type(v) for v in values] == [int, float, int]
+    assert values[2] == 9007199254740993
+
+
+def test_parser_consumes_buffer():
+    buffer = TokenBuffer.from_formulas(FORMULAS)
+    for i, formula in enumerate(FORMULAS):
+        expected = IterativeParser(lexer=Scanner(formula)).parse()
+        assert ast.dump(IterativeParser(lexer=buffer.reader(i)).parse()) == ast.dump(expected)
+
+
+def test_invalid_formula_leaves_buffer_unchanged():
+    buffer = TokenBuffer.from_formulas(["X + 1"])
+    n_tokens = buffer.n_tokens
+    with pytest.raises(ValueError):
+        buffer.append("X + 12345678901234567890 + FOO")
+    assert buffer.n_tokens == n_tokens
+    assert len(buffer) == 1
+    assert not buffer.big_integers
+    assert buffer.append("X") == 1
+
+
+def test_index_overflow_leaves_buffer_unchanged():
+    buffer = TokenBuffer.from_formulas(["X + 1"])
+    with pytest.raises(OverflowError):
+        buffer.append("X1 + X99999999999999999999")
+    assert len({len(column) for column in (buffer.codes, buffer.values, buffer.indices,
+                                           buffer.offsets)}) == 1
+    assert buffer.append("X2 * 2") == 1
+    assert drain(buffer.reader(1)) == drain(Scanner("X2 * 2"))
+
+
+def test_reader_index():
+    with pytest.raises(IndexError):
+        TokenBuffer().reader(0)
+
+
+def test_nbytes():
+    buffer = TokenBuffer.from_formulas(["X0 + X1 * 2.5"] * 100)
+    assert buffer.n_tokens == 500
+    assert buffer.nbytes == 500 * (1 + 8 + 8 + 8) + 101 * 8
@@ -0,0 +1,64 @@
+import ast
+
+import pytest
+
+from formula_compiler import ir
+from formula_compiler.ast_compiler import compile_module
+from formula_compiler.compiler import parse_formula
+from formula_compiler.validation import validate_module
+
+
+@pytest.mark.parametrize("formula", [
+    "SQRT(X0) + LN(X1) * PI() - ROUND(X0 / 3) ^ -2",
+    "SIN(X0) * SIN(X0) + SIN(X0) * COS(X1)",
+])
+@pytest.mark.parametrize("bind_locals", [False, True])
+def test_safe_compilation(formula, bind_locals):
+    for module in [parse_formula(formula), parse_formula(formula, optimize=True, cse=True)]:
+        validate_module(module)
+        fun = compile_module(module, n_args=2, safe=True, bind_locals=bind_locals)
+        assert fun.__globals__["__builtins__"] == {}
+        assert fun(4.0, 1.0) == compile_module(parse_formula(formula), n_args=2)(4.0, 1.0)
+
+
+def test_safe_compilation_options():
+    fun = compile_module(ir.to_module(ir.parse("X2 * 2"), dense=True), n_args=3,
+                         packed_args=True, safe=True)
+    assert fun((1, 2, 3)) == 6
+    fun = compile_module(parse_formula("X0 + 1"), n_args=2, strict=False, safe=True)
+    assert fun(1, 2) == 2
+    with pytest.raises(ValueError):
+        compile_module(parse_formula("X"), backend="numpy", safe=True)
+
+
+@pytest.mark.parametrize("source", [
+    "import os\ndef fun(x0): return x0",
+    "import math as m\ndef fun(x0): return x0",
+    "def fun(x0): return x0\nprint(1)",
+    "def g(x0): return x0",
+    "@cache\ndef fun(x0): return x0",
+    "def fun(x0, *args): return x0",
+    "def fun(x0=1): return x0",
+    "def fun(x0: int): return x0",
+    "def fun(x0): pass",
+    "def fun(x0):\n  x0.real = 1\n  return x0",
+    "def fun(x0):\n  math = x0\n  return x0",
+    "def fun(__builtins__): return 1",
+    "def fun(x0): return __import__('os')",
+    "def fun(x0): return open",
+    "def fun(x0): return round",
+    "def fun(x0): return math.sin.__self__",
+    "def fun(x0): return math.factorial(x0)",
+    "def fun(x0): return round(x0, ndigits=2)",
+    "def fun(x0): return math.sqrt(x0, x0)",
+    "def fun(x0): return 'x' * 1000",
+    "def fun(x0): return x0 // 2",
+    "def fun(x0): return [x0]",
+    "def fun(x0): return (lambda: x0)()",
+    "def fun(x0): return x1",
+])
+def test_rejected_modules(source):
+    with pytest.raises(ValueError):
+        validate_module(ast.parse(source))
+    with pytest.raises(ValueError):
+        compile_module(ast.parse(source), safe=True)